@@ -1,3 +1,82 @@
+import io
+import os
+import pstats
+
 from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import Dataset, RequestProfile
+
+
+@admin.register(Dataset)
+class DatasetAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'num_rows', 'num_columns', 'size', 'upload_date')
+    list_filter = ('status',)
+    search_fields = ('name',)
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Profils de requêtes (?profile=1), avec téléchargement du .prof et résumé des fonctions"""
+    list_display = ('created_at', 'endpoint', 'dataset', 'num_rows', 'num_columns', 'status_code',
+                    'duration_ms', 'peak_memory_mb', 'username', 'downloads')
+    list_filter = ('endpoint',)
+    search_fields = ('path', 'username')
+    readonly_fields = [field.name for field in RequestProfile._meta.fields] + ['downloads', 'top_functions',
+                                                                                'allocations']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='Pic mémoire (Mo)')
+    def peak_memory_mb(self, obj):
+        return round(obj.peak_memory / (1024 * 1024), 1)
+
+    @admin.display(description='Fichiers')
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">.prof</a> · <a href="{}">allocations</a>',
+            reverse('admin:eda_app_requestprofile_download', args=[obj.pk, 'prof']),
+            reverse('admin:eda_app_requestprofile_download', args=[obj.pk, 'alloc']),
+        )
+
+    @admin.display(description='Fonctions les plus coûteuses (temps cumulé)')
+    def top_functions(self, obj):
+        path = obj.get_file_path(obj.profile_file)
+        if not os.path.exists(path):
+            return '-'
+        output = io.StringIO()
+        pstats.Stats(path, stream=output).sort_stats('cumulative').print_stats(30)
+        return format_html('<pre>{}</pre>', output.getvalue())
+
+    @admin.display(description='Allocations')
+    def allocations(self, obj):
+        path = obj.get_file_path(obj.allocations_file)
+        if not os.path.exists(path):
+            return '-'
+        with open(path, 'r', encoding='utf-8') as f:
+            return format_html('<pre>{}</pre>', f.read())
+
+    def get_urls(self):
+        return [
+            path('<int:profile_id>/download/<str:kind>/', self.admin_site.admin_view(self.download_view),
+                 name='eda_app_requestprofile_download'),
+        ] + super().get_urls()
+
+    def download_view(self, request, profile_id, kind):
+        if not self.has_view_permission(request):
+            raise Http404
+        profile = get_object_or_404(RequestProfile, pk=profile_id)
+        name = {'prof': profile.profile_file, 'alloc': profile.allocations_file}.get(kind)
+        if not name or not os.path.exists(profile.get_file_path(name)):
+            raise Http404('Fichier de profil introuvable')
+        return FileResponse(open(profile.get_file_path(name), 'rb'), as_attachment=True,
+                            filename=os.path.basename(name))
 
-# Register your models here.
+    def delete_queryset(self, request, queryset):
+        # Suppression une à une : les fichiers du profil partent avec l'entrée
+        for profile in queryset:
+            profile.delete()
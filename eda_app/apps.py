@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class EdaAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'eda_app'
+
+    def ready(self):
+        # Reprend dès le démarrage les analyses en file ou interrompues par un redémarrage
+        from .jobs import autostart_runner
+        autostart_runner()
@@ -0,0 +1,271 @@
+"""
+Exécution des analyses en arrière-plan, sans broker externe.
+
+La file d'attente est la table AnalysisJob. Un JobRunner (thread de
+répartition + pool de processus) réclame les jobs en attente de façon
+atomique et les exécute dans des processus séparés, qui font avancer
+Dataset.status : queued -> parsing -> profiling -> analyzed (ou error).
+Au démarrage, le runner remet en file les analyses interrompues par
+l'arrêt d'un processus (voir recover_interrupted_jobs).
+
+Avec ANALYSIS_RUNNER_AUTOSTART, le runner démarre avec le processus web
+(EdaAppConfig.ready) : les jobs restés en file avant un redémarrage sont
+repris sans attendre un nouvel upload. Sinon, il tourne à part avec
+`manage.py run_analysis_worker`.
+"""
+import functools
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.utils import timezone
+
+# Les modèles sont importés dans les fonctions : les processus du pool
+# importent ce module avant django.setup() (voir _init_worker).
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def run_job(job_id):
+    """Exécute un job d'analyse (dans un processus du pool)"""
+    from .models import AnalysisJob
+    
+    close_old_connections()
+    job = AnalysisJob.objects.select_related('dataset').get(pk=job_id)
+    start = time.perf_counter()
+    try:
+        if job.dataset.analyze_and_update():
+            job.state = 'done'
+            job.error = ''
+        else:
+            job.state = 'failed'
+            job.error = job.dataset.error_message
+    except Exception:
+        job.state = 'failed'
+        job.error = traceback.format_exc()
+    job.finished_at = timezone.now()
+    job.save(update_fields=['state', 'error', 'finished_at'])
+    logger.info("Analyse du dataset %s: %s", job.dataset_id, job.state, extra={
+        'job_id': job.pk,
+        'dataset_id': job.dataset_id,
+        'state': job.state,
+        'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+    })
+    return job.state
+
+
+def claim_next_job():
+    """Réclame le plus ancien job en attente ; sûr entre plusieurs processus"""
+    from .models import AnalysisJob
+    
+    for job_id in AnalysisJob.objects.filter(state='queued').values_list('pk', flat=True)[:10]:
+        claimed = AnalysisJob.objects.filter(pk=job_id, state='queued').update(
+            state='running', started_at=timezone.now(), worker_pid=os.getpid()
+        )
+        if claimed:
+            return job_id
+    return None
+
+
+def _pid_alive(pid):
+    """Le processus `pid` existe-t-il encore ? (sans moyen de le savoir, on le suppose vivant)"""
+    if not pid or pid == os.getpid():
+        # Le processus courant vient de démarrer : les jobs à son nom datent d'une exécution précédente
+        return False
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def recover_interrupted_jobs():
+    """
+    Remet en file les jobs 'running' dont le processus qui les a réclamés a
+    disparu (redémarrage du serveur ou du worker), et réanalyse les datasets
+    restés en cours de traitement sans job actif. Retourne le nombre de jobs remis en file.
+    """
+    from .models import AnalysisJob, Dataset
+    
+    requeued = 0
+    for job in AnalysisJob.objects.filter(state='running'):
+        if _pid_alive(job.worker_pid):
+            continue
+        if AnalysisJob.objects.filter(pk=job.pk, state='running', worker_pid=job.worker_pid).update(
+            state='queued', started_at=None, worker_pid=None
+        ):
+            Dataset.objects.filter(pk=job.dataset_id).update(status='queued', progress=0)
+            requeued += 1
+    
+    stuck = Dataset.objects.filter(status__in=('parsing', 'profiling')).exclude(jobs__state__in=('queued', 'running'))
+    for dataset in stuck:
+        dataset.status = 'queued'
+        dataset.progress = 0
+        dataset.save(update_fields=['status', 'progress'])
+        AnalysisJob.objects.create(dataset=dataset)
+        requeued += 1
+    
+    if requeued:
+        logger.warning("Analyses interrompues remises en file", extra={'jobs': requeued})
+    return requeued
+
+
+class JobRunner:
+    def __init__(self, max_workers=None, poll_interval=None):
+        self.max_workers = max_workers or getattr(settings, 'ANALYSIS_WORKERS', 2)
+        self.poll_interval = poll_interval or getattr(settings, 'ANALYSIS_POLL_INTERVAL', 2.0)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._slots = threading.Semaphore(self.max_workers)
+        self._executor = None
+        self._thread = None
+
+    def _new_executor(self):
+        # 'spawn' : les workers ne partagent ni threads ni connexions avec le processus web
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+
+    def start(self):
+        self._executor = self._new_executor()
+        self._thread = threading.Thread(target=self._dispatch_loop, name='analysis-job-runner', daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def stop(self, wait=True):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    def run_forever(self):
+        self.start()
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            self.stop()
+
+    def _dispatch_loop(self):
+        try:
+            recover_interrupted_jobs()
+        except Exception:
+            logger.exception("Reprise des analyses interrompues impossible")
+        finally:
+            connections.close_all()
+        
+        while not self._stopping.is_set():
+            try:
+                while self._slots.acquire(blocking=False):
+                    job_id = claim_next_job()
+                    if job_id is None:
+                        self._slots.release()
+                        break
+                    try:
+                        future = self._executor.submit(run_job, job_id)
+                    except Exception:
+                        # Pool cassé ou arrêté (fin du processus) : le job retourne dans la file
+                        from .models import AnalysisJob
+                        AnalysisJob.objects.filter(pk=job_id).update(state='queued', started_at=None, worker_pid=None)
+                        self._slots.release()
+                        raise
+                    future.add_done_callback(functools.partial(self._job_finished, job_id))
+            except BrokenProcessPool:
+                self._executor = self._new_executor()
+            except RuntimeError:
+                # Pool arrêté : normal pendant stop(), anormal sinon (la file ne se viderait plus)
+                if self._stopping.is_set():
+                    break
+                logger.exception("Erreur du répartiteur d'analyses")
+            except Exception:
+                logger.exception("Erreur du répartiteur d'analyses")
+            finally:
+                connections.close_all()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _job_finished(self, job_id, future):
+        if future.exception() is not None:
+            # Le processus worker a planté avant d'avoir pu enregistrer l'échec
+            from .models import AnalysisJob, Dataset
+            error = repr(future.exception())
+            AnalysisJob.objects.filter(pk=job_id).update(state='failed', error=error, finished_at=timezone.now())
+            Dataset.objects.filter(jobs__pk=job_id).update(status='error', error_message=error)
+            connections.close_all()
+        self._slots.release()
+        self._wakeup.set()
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    """Runner du processus courant, démarré à la demande"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+            _runner.start()
+    return _runner
+
+
+def _is_server_process(argv):
+    """Processus qui sert des requêtes : serveur WSGI/ASGI, ou runserver (hors processus de l'autoreloader)"""
+    program = os.path.basename(argv[0]) if argv else ''
+    if program not in ('manage.py', 'django-admin', '__main__.py'):
+        return True
+    if argv[1:2] != ['runserver']:
+        # Autres commandes de gestion (migrate, test, run_analysis_worker...)
+        return False
+    # Avec l'autoreloader, seul le processus enfant (RUN_MAIN) sert les requêtes
+    return os.environ.get('RUN_MAIN') == 'true' or '--noreload' in argv
+
+
+def autostart_runner():
+    """Démarre le runner du processus web (ANALYSIS_RUNNER_AUTOSTART) ; None s'il ne doit pas tourner ici"""
+    if not getattr(settings, 'ANALYSIS_RUNNER_AUTOSTART', True):
+        return None
+    if multiprocessing.parent_process() is not None:
+        # Processus d'un pool (analyses, rendu des graphiques) : ils ne répartissent pas de jobs
+        return None
+    if not _is_server_process(sys.argv):
+        return None
+    return get_runner()
+
+
+def enqueue_analysis(dataset):
+    """Met en file l'analyse d'un dataset et retourne le job créé"""
+    from .models import AnalysisJob
+    
+    dataset.error_message = ''
+    dataset.status = 'queued'
+    dataset.progress = 0
+    dataset.save(update_fields=['status', 'progress', 'error_message'])
+    job = AnalysisJob.objects.create(dataset=dataset)
+
+    if getattr(settings, 'ANALYSIS_RUNNER_AUTOSTART', True):
+        get_runner().notify()
+    return job
@@ -0,0 +1,176 @@
+import itertools
+import json
+import os
+import platform
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from eda_app.utils.benchmark import DTYPE_MIXES, compare_to_baseline, measure, synthetic_frame
+from eda_app.utils.charts import CHART_FORMATS, render_histogram
+from eda_app.utils.data_analyzer import DatasetAnalyzer
+
+
+class Command(BaseCommand):
+    help = ("Banc d'essai de DatasetAnalyzer et des vues AJAX sur des datasets synthétiques "
+            "(durée et pic mémoire, résultats JSON comparables à une référence)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help="Nombres de lignes")
+        parser.add_argument('--columns', type=int, nargs='+', default=[10, 50], help="Nombres de colonnes")
+        parser.add_argument('--mixes', nargs='+', default=['mixed'], choices=sorted(DTYPE_MIXES),
+                            help="Mélanges de types de colonnes")
+        parser.add_argument('--missing', type=float, nargs='+', default=[0.0, 0.1],
+                            help="Taux de valeurs manquantes")
+        parser.add_argument('--repeat', type=int, default=3, help="Exécutions par mesure (meilleur temps retenu)")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-memory', action='store_true', help="Ne pas mesurer le pic mémoire (tracemalloc)")
+        parser.add_argument('--no-views', action='store_true', help="Ne pas mesurer les vues via le client de test")
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats")
+        parser.add_argument('--baseline', help="Résultats JSON de référence à comparer")
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help="Dégradation tolérée par rapport à la référence (0.25 = +25%%)")
+
+    def handle(self, *args, **options):
+        work_dir = tempfile.mkdtemp(prefix='analyzer-bench-')
+        self.repeat = options['repeat']
+        self.memory = not options['no_memory']
+        results = []
+        try:
+            with override_settings(MEDIA_ROOT=work_dir, CHART_RENDER_WORKERS=0, ANALYSIS_RUNNER_AUTOSTART=False):
+                if not options['no_views']:
+                    setup_test_environment()
+                    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+                try:
+                    grid = itertools.product(options['rows'], options['columns'], options['mixes'], options['missing'])
+                    for rows, columns, mix, missing in grid:
+                        case = f'r{rows}_c{columns}_{mix}_m{missing:g}'
+                        self.stdout.write(f"== {case}")
+                        df = synthetic_frame(rows, columns, mix, missing, seed=options['seed'])
+                        path = os.path.join(work_dir, 'datasets', f'{case}.csv')
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        df.to_csv(path, index=False)
+
+                        metrics = self.bench_analyzer(path, os.path.join(work_dir, 'bench-snapshots', case))
+                        if not options['no_views']:
+                            metrics.update(self.bench_views(case, os.path.relpath(path, work_dir), path))
+                        results.append({
+                            'case': case,
+                            'params': {'rows': rows, 'columns': columns, 'mix': mix, 'missing_rate': missing},
+                            'metrics': metrics,
+                        })
+                finally:
+                    if not options['no_views']:
+                        connection.creation.destroy_test_db(old_name, verbosity=0)
+                        teardown_test_environment()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'numpy': np.__version__,
+                'repeat': self.repeat,
+                'seed': options['seed'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+        if options['baseline']:
+            with open(options['baseline'], 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            regressions = compare_to_baseline(results, baseline, threshold=options['threshold'])
+            for r in regressions:
+                self.stdout.write(self.style.ERROR(
+                    f"{r['case']} {r['stage']} {r['metric']}: {r['baseline']} -> {r['current']} (x{r['ratio']})"
+                ))
+            if regressions:
+                raise CommandError(f"{len(regressions)} régression(s) au-delà de +{options['threshold']:.0%}")
+            self.stdout.write(self.style.SUCCESS("Aucune régression par rapport à la référence"))
+
+    def record(self, metrics, stage, func):
+        result, metrics[stage] = measure(func, repeat=self.repeat, memory=self.memory)
+        line = f"  {stage:<28} {metrics[stage]['seconds']:>9.4f}s"
+        if 'peak_bytes' in metrics[stage]:
+            line += f" {metrics[stage]['peak_bytes'] / (1024 * 1024):>9.1f} Mo"
+        self.stdout.write(line)
+        return result
+
+    def bench_analyzer(self, path, snapshot_dir):
+        metrics = {}
+        analyzer = self.record(metrics, 'load_data', lambda: DatasetAnalyzer(path))
+        analyzer.snapshot_dir = snapshot_dir
+        analyzer.save_snapshot()
+        self.record(metrics, 'load_snapshot', lambda: DatasetAnalyzer(path, snapshot_dir=snapshot_dir))
+
+        self.record(metrics, 'detect_column_types', analyzer.detect_column_types)
+        self.record(metrics, 'get_descriptive_stats', analyzer.get_descriptive_stats)
+
+        def correlation_pairs():
+            # Sans le cache de matrices de l'analyseur : on mesure le calcul
+            return DatasetAnalyzer(path, snapshot_dir=snapshot_dir).get_correlation_pairs()
+        self.record(metrics, 'get_correlation_pairs', correlation_pairs)
+
+        column_info = analyzer.detect_column_types()
+        numeric = analyzer.get_numeric_columns()
+        categorical = [col for col, info in column_info.items() if info['type'] == 'catégoriel']
+        if numeric:
+            self.record(metrics, 'generate_histogram', lambda: analyzer.generate_histogram(numeric[0]))
+            # Rendu seul, par format de sortie (données de l'histogramme déjà calculées)
+            data = analyzer.get_histogram_data(numeric[0])
+            for image_format in CHART_FORMATS:
+                self.record(metrics, f'render_histogram:{image_format}',
+                            lambda image_format=image_format: render_histogram(numeric[0], data, image_format=image_format))
+        if categorical:
+            self.record(metrics, 'generate_bar_chart', lambda: analyzer.generate_bar_chart(categorical[0]))
+        if len(numeric) > 1:
+            self.record(metrics, 'generate_correlation_heatmap', analyzer.generate_correlation_heatmap)
+        return metrics
+
+    def bench_views(self, case, file_path, path):
+        from eda_app.models import Dataset
+        from eda_app.utils.analyzer_cache import get_analyzer_cache
+        from eda_app.utils.chart_cache import get_chart_cache
+
+        metrics = {}
+        dataset = Dataset.objects.create(name=case, file_path=file_path, size=os.path.getsize(path))
+        client = Client()
+
+        def analyze():
+            dataset.delete_artifacts()
+            if not dataset.analyze_and_update():
+                raise CommandError(f"Analyse de {case} en échec: {dataset.error_message}")
+        self.record(metrics, 'job:analyze_and_update', analyze)
+
+        for endpoint in ('statistics', 'distributions', 'correlations'):
+            url = f'/dataset/{dataset.id}/{endpoint}/'
+
+            def get():
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"GET {url}: HTTP {response.status_code}")
+                return response
+
+            def cold_get():
+                # Ni résultat persisté, ni analyseur, ni graphique en cache : la vue recalcule depuis le snapshot
+                dataset.results.all().delete()
+                get_analyzer_cache().clear()
+                get_chart_cache().purge(dataset.id)
+                return get()
+
+            self.record(metrics, f'GET /{endpoint}/ (cold)', cold_get)
+            self.record(metrics, f'GET /{endpoint}/', get)
+        return metrics
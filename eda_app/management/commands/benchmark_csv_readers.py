@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from eda_app.utils.readers import available_engines, read_csv, resolve_encoding
+
+
+def write_synthetic_csv(path, size_mb, chunk_rows=100_000, seed=0):
+    """Écrit un CSV synthétique (numériques, entiers, catégories, texte) d'environ size_mb Mo"""
+    rng = np.random.default_rng(seed)
+    target = size_mb * 1024 * 1024
+    rows = 0
+    header = True
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        while f.tell() < target:
+            chunk = pd.DataFrame({
+                'mesure': rng.normal(size=chunk_rows),
+                'montant': rng.lognormal(3, 1, chunk_rows).round(2),
+                'quantite': rng.integers(0, 1000, chunk_rows),
+                'categorie': rng.choice(['nord', 'sud', 'est', 'ouest', 'centre'], chunk_rows),
+                'libelle': [f'article-{i}' for i in range(rows, rows + chunk_rows)],
+            })
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+            rows += chunk_rows
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Compare les moteurs de lecture CSV (pyarrow, C) sur des fichiers synthétiques"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100],
+                            help="Tailles des fichiers générés, en Mo (ex. 100 500 2000)")
+        parser.add_argument('--engines', nargs='+', default=None,
+                            help="Moteurs à comparer (par défaut : tous ceux disponibles)")
+        parser.add_argument('--repeat', type=int, default=1, help="Nombre de lectures par moteur (meilleur temps retenu)")
+        parser.add_argument('--dir', default=None, help="Répertoire des fichiers générés (temporaire par défaut)")
+        parser.add_argument('--keep', action='store_true', help="Conserver les fichiers générés")
+
+    def handle(self, *args, **options):
+        engines = options['engines'] or available_engines()
+        unavailable = set(engines) - set(available_engines())
+        if unavailable:
+            raise CommandError(f"Moteur(s) indisponible(s) : {', '.join(sorted(unavailable))}")
+
+        work_dir = options['dir'] or tempfile.mkdtemp(prefix='csv-bench-')
+        os.makedirs(work_dir, exist_ok=True)
+        try:
+            self.stdout.write(f"{'taille':>8} {'lignes':>11} {'étape':>10} {'secondes':>9} {'Mo/s':>8}")
+            for size_mb in options['sizes']:
+                path = os.path.join(work_dir, f'synthetic_{size_mb}mb.csv')
+                if not os.path.exists(path):
+                    write_synthetic_csv(path, size_mb)
+                actual_mb = os.path.getsize(path) / (1024 * 1024)
+
+                start = time.perf_counter()
+                encoding = resolve_encoding(path)
+                self._report(size_mb, '', 'encodage', time.perf_counter() - start, actual_mb)
+
+                for engine in engines:
+                    timings = []
+                    for _ in range(options['repeat']):
+                        start = time.perf_counter()
+                        df = read_csv(path, encoding, engine=engine)
+                        timings.append(time.perf_counter() - start)
+                    self._report(size_mb, len(df), engine, min(timings), actual_mb)
+                    del df
+        finally:
+            if not options['keep'] and not options['dir']:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _report(self, size_mb, rows, step, seconds, actual_mb):
+        self.stdout.write(f"{size_mb:>6}Mo {rows:>11} {step:>10} {seconds:>9.3f} {actual_mb / seconds:>8.1f}")
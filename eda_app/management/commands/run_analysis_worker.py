@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from eda_app.jobs import JobRunner
+
+
+class Command(BaseCommand):
+    help = "Exécute les analyses de datasets en attente (pool de processus alimenté par la table AnalysisJob)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help="Nombre de processus d'analyse")
+        parser.add_argument('--poll-interval', type=float, default=None, help="Intervalle de scrutation de la file (s)")
+
+    def handle(self, *args, **options):
+        runner = JobRunner(max_workers=options['workers'], poll_interval=options['poll_interval'])
+        self.stdout.write(self.style.SUCCESS(f"Worker d'analyse démarré ({runner.max_workers} processus)"))
+        runner.run_forever()
@@ -0,0 +1,60 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .utils.metrics import REQUEST_SECONDS, collect_timings, format_server_timing, record_cache_lookup
+
+
+logger = logging.getLogger('eda_app.requests')
+
+
+class ServerTimingMiddleware:
+    """
+    Chronomètre chaque requête : latence par vue (mesures Prometheus), log
+    structuré, et en-tête Server-Timing détaillant les étapes (parse, kde,
+    image_encode, serialize...) visibles dans les outils du navigateur.
+
+    Compatible sync et async : sous ASGI, les vues async ne sont pas
+    ramenées dans un thread par ce middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with collect_timings() as timings:
+            start = time.perf_counter()
+            response = self.get_response(request)
+            total = time.perf_counter() - start
+        return self.finish(request, response, timings, total)
+
+    async def __acall__(self, request):
+        with collect_timings() as timings:
+            start = time.perf_counter()
+            response = await self.get_response(request)
+            total = time.perf_counter() - start
+        return self.finish(request, response, timings, total)
+
+    def finish(self, request, response, timings, total):
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else 'unmatched'
+        REQUEST_SECONDS.observe(total, view=view, method=request.method, status=response.status_code)
+        if request.headers.get('If-None-Match'):
+            # Revalidation par ETag : un 304 évite tout recalcul et tout transfert
+            record_cache_lookup('http', response.status_code == 304)
+
+        response['Server-Timing'] = format_server_timing(timings, total)
+        logger.info("%s %s %s", request.method, request.path, response.status_code, extra={
+            'view': view,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 1),
+            **{f'{stage}_ms': round(seconds * 1000, 1) for stage, (seconds, count) in timings.items()},
+        })
+        return response
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eda_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('key', models.CharField(blank=True, default='', max_length=255)),
+                ('analyzer_version', models.IntegerField()),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='eda_app.dataset')),
+            ],
+            options={
+                'unique_together': {('dataset', 'kind', 'key', 'analyzer_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eda_app', '0003_analysis_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='encoding',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+    ]
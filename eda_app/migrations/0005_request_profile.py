@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eda_app', '0004_dataset_encoding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=100)),
+                ('path', models.CharField(max_length=500)),
+                ('username', models.CharField(blank=True, default='', max_length=150)),
+                ('num_rows', models.IntegerField(blank=True, null=True)),
+                ('num_columns', models.IntegerField(blank=True, null=True)),
+                ('status_code', models.IntegerField(blank=True, null=True)),
+                ('duration_ms', models.FloatField()),
+                ('peak_memory', models.BigIntegerField(default=0)),
+                ('profile_file', models.CharField(max_length=500)),
+                ('allocations_file', models.CharField(max_length=500)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('dataset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profiles', to='eda_app.dataset')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eda_app', '0005_request_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='delimiter',
+            field=models.CharField(blank=True, default='', max_length=5),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eda_app', '0006_dataset_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='sheet_name',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+    ]
@@ -4,6 +4,9 @@ import os
 from django.conf import settings
 
 class Dataset(models.Model):
+    # Étapes du traitement en arrière-plan, dans l'ordre
+    PROCESSING_STATUSES = ('queued', 'parsing', 'profiling')
+    
     name = models.CharField(max_length=200)
     file_path = models.CharField(max_length=500)
     size = models.IntegerField()
@@ -11,26 +14,251 @@ class Dataset(models.Model):
     num_rows = models.IntegerField(null=True, blank=True)
     num_columns = models.IntegerField(null=True, blank=True)
     status = models.CharField(max_length=50, default='uploaded')
+    progress = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True, default='')
+    # Encodage validé à la première lecture, réutilisé ensuite sans nouvelle détection
+    encoding = models.CharField(max_length=50, blank=True, default='')
+    # Séparateur des CSV, détecté pendant l'upload (vide : virgule)
+    delimiter = models.CharField(max_length=5, blank=True, default='')
+    # SHA-256 du contenu : un fichier identique déjà importé est réutilisé
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    # Feuille analysée d'un classeur Excel (vide : première feuille non vide, choisie à l'analyse)
+    sheet_name = models.CharField(max_length=200, blank=True, default='')
     
     def __str__(self):
         return self.name
     
+    @property
+    def is_processing(self):
+        return self.status in self.PROCESSING_STATUSES
+    
+    def set_progress(self, status, progress):
+        self.status = status
+        self.progress = progress
+        self.save(update_fields=['status', 'progress'])
+    
     def get_full_path(self):
         return os.path.join(settings.MEDIA_ROOT, self.file_path)
     
+    @property
+    def is_excel(self):
+        from .utils.excel import is_excel_file
+        return is_excel_file(self.file_path)
+    
+    def get_snapshot_root(self):
+        return os.path.join(settings.MEDIA_ROOT, 'snapshots', str(self.id))
+    
+    def get_snapshot_dir(self):
+        """Snapshot analysé : celui de la feuille choisie pour un classeur Excel"""
+        if self.is_excel and self.sheet_name:
+            from .utils.excel import sheet_snapshot_dir
+            return sheet_snapshot_dir(self.get_snapshot_root(), self.sheet_name)
+        return self.get_snapshot_root()
+    
+    def get_cache_key(self):
+        stat = os.stat(self.get_full_path())
+        return (self.id, stat.st_mtime_ns, stat.st_size, self.sheet_name)
+    
+    def get_analyzer(self, use_cache=True, columns=None):
+        """
+        Analyseur du dataset ; avec `columns`, seules ces colonnes sont chargées.
+        Un fichier profilé par morceaux n'est jamais chargé : ses résultats persistés sont servis.
+        """
+        if self.should_stream():
+            from .results import PersistedProfile
+            return PersistedProfile(self)
+        
+        from .utils.data_analyzer import DatasetAnalyzer
+        
+        def load():
+            return DatasetAnalyzer(
+                self.get_full_path(),
+                snapshot_dir=self.get_snapshot_dir(),
+                arrow_strings=getattr(settings, 'ANALYZER_ARROW_STRINGS', False),
+                columns=columns,
+                encoding=self.encoding or None,
+                delimiter=self.delimiter or None,
+                sheet_name=self.sheet_name or None,
+                engine=getattr(settings, 'CSV_READER_ENGINE', None),
+                sample_size=getattr(settings, 'CHART_SAMPLE_SIZE', None),
+            )
+        
+        if not use_cache:
+            return load()
+        
+        from .utils.analyzer_cache import get_analyzer_cache
+        # Une projection est une entrée distincte (et plus légère) du cache
+        key = self.get_cache_key() + ((tuple(columns),) if columns is not None else ())
+        return get_analyzer_cache().get_or_load(key, load)
+    
+    def delete_artifacts(self):
+        """Supprime les fichiers et caches dérivés du dataset (snapshot colonnaire, cache mémoire, graphiques)"""
+        from .utils.analyzer_cache import get_analyzer_cache
+        from .utils.chart_cache import get_chart_cache
+        from .utils.snapshot import delete_snapshot
+        get_analyzer_cache().invalidate(self.id)
+        delete_snapshot(self.get_snapshot_root())
+        get_chart_cache().purge(self.id)
+    
+    def should_stream(self):
+        """CSV trop gros pour être chargé en entier : profilage par morceaux"""
+        threshold = getattr(settings, 'STREAMING_PROFILE_THRESHOLD', None)
+        if threshold is None or not self.file_path.lower().endswith('.csv'):
+            return False
+        return os.path.getsize(self.get_full_path()) > threshold
+    
+    @classmethod
+    def find_duplicate(cls, content_hash):
+        """Dataset déjà importé avec le même contenu (et dont le fichier existe encore), ou None"""
+        if not content_hash:
+            return None
+        candidates = cls.objects.filter(content_hash=content_hash).exclude(status='error').order_by('-upload_date')
+        for dataset in candidates:
+            if os.path.exists(dataset.get_full_path()):
+                return dataset
+        return None
+    
+    def resolve_encoding(self):
+        """Détermine (une seule fois) l'encodage d'un CSV et le mémorise"""
+        if not self.encoding and self.file_path.lower().endswith('.csv'):
+            from .utils.readers import resolve_encoding
+            self.encoding = resolve_encoding(self.get_full_path())
+            self.save(update_fields=['encoding'])
+        return self.encoding
+    
+    def get_sheet_names(self):
+        """Feuilles du classeur (liste vide pour un CSV), lues dans le manifeste écrit à la conversion"""
+        if not self.is_excel:
+            return []
+        from .utils.excel import workbook_sheets
+        return workbook_sheets(self.get_full_path(), self.get_snapshot_root())
+    
+    def prepare_workbook(self):
+        """Convertit toutes les feuilles d'un classeur en snapshots (une seule lecture) et fixe la feuille analysée"""
+        if not self.is_excel:
+            return
+        from .utils.excel import convert_workbook, default_sheet
+        sizes = convert_workbook(self.get_full_path(), self.get_snapshot_root(),
+                                 arrow_strings=getattr(settings, 'ANALYZER_ARROW_STRINGS', False))
+        if self.sheet_name not in sizes:
+            self.sheet_name = default_sheet(sizes) or ''
+            self.save(update_fields=['sheet_name'])
+    
     def analyze_and_update(self):
         try:
-            from .utils.data_analyzer import DatasetAnalyzer
-            analyzer = DatasetAnalyzer(self.get_full_path())
-            basic_info = analyzer.get_basic_info()
+            self.set_progress('parsing', 5)
+            self.resolve_encoding()
+            self.prepare_workbook()
+            if self.should_stream():
+                from .utils.streaming import StreamingProfiler
+                analyzer = StreamingProfiler(
+                    self.get_full_path(), chunksize=getattr(settings, 'STREAMING_CHUNKSIZE', 100_000),
+                    encoding=self.encoding or None, **({'sep': self.delimiter} if self.delimiter else {}),
+                ).profile()
+            else:
+                # Processus d'analyse : rien ne relira ce DataFrame, inutile de l'installer dans le cache
+                analyzer = self.get_analyzer(use_cache=False)
+                if not analyzer.loaded_from_snapshot:
+                    self.set_progress('parsing', 30)
+                    analyzer.save_snapshot()
+                # Échantillon des visuels tiré une fois, enregistré avec le snapshot
+                analyzer.get_sample_index()
             
+            self.set_progress('profiling', 50)
+            basic_info = analyzer.get_basic_info()
             self.num_rows = basic_info['num_rows']
             self.num_columns = basic_info['num_columns']
+            
+            # Résultats servis ensuite directement par les vues AJAX
+            from .results import precompute_results
+            precompute_results(self, analyzer, progress_callback=self.set_progress)
+            if not getattr(analyzer, 'streaming', False):
+                # Graphiques des premières colonnes prêts avant la première visite
+                self.set_progress('profiling', 90)
+                from .results import prewarm_charts
+                prewarm_charts(self, analyzer)
+            
             self.status = 'analyzed'
+            self.progress = 100
+            self.error_message = ''
             self.save()
             
             return True
         except Exception as e:
             self.status = 'error'
+            self.error_message = str(e)
             self.save()
-            return False
\ No newline at end of file
+            return False
+
+
+class AnalysisResult(models.Model):
+    """Résultat d'analyse pré-calculé (JSON), par dataset et version de l'analyseur"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='results')
+    kind = models.CharField(max_length=50)
+    key = models.CharField(max_length=255, blank=True, default='')
+    analyzer_version = models.IntegerField()
+    payload = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        unique_together = ('dataset', 'kind', 'key', 'analyzer_version')
+    
+    def __str__(self):
+        return f'{self.dataset} - {self.kind} {self.key}'.strip()
+
+
+
+class AnalysisJob(models.Model):
+    """File d'attente (en base) des analyses à exécuter en arrière-plan"""
+    STATES = [
+        ('queued', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminé'),
+        ('failed', 'Échec'),
+    ]
+    
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='jobs')
+    state = models.CharField(max_length=20, choices=STATES, default='queued', db_index=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker_pid = models.IntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    
+    class Meta:
+        ordering = ['created_at']
+    
+    def __str__(self):
+        return f'Analyse {self.dataset} ({self.state})'
+
+
+class RequestProfile(models.Model):
+    """Profil (cProfile + tracemalloc) d'une requête, demandé par un membre du staff"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.SET_NULL, null=True, blank=True, related_name='profiles')
+    endpoint = models.CharField(max_length=100)
+    path = models.CharField(max_length=500)
+    username = models.CharField(max_length=150, blank=True, default='')
+    num_rows = models.IntegerField(null=True, blank=True)
+    num_columns = models.IntegerField(null=True, blank=True)
+    status_code = models.IntegerField(null=True, blank=True)
+    duration_ms = models.FloatField()
+    peak_memory = models.BigIntegerField(default=0)
+    # Chemins relatifs à MEDIA_ROOT
+    profile_file = models.CharField(max_length=500)
+    allocations_file = models.CharField(max_length=500)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f'{self.endpoint} ({self.dataset_id}) {self.created_at:%Y-%m-%d %H:%M:%S}'
+    
+    def get_file_path(self, name):
+        return os.path.join(settings.MEDIA_ROOT, name)
+    
+    def delete(self, *args, **kwargs):
+        for name in (self.profile_file, self.allocations_file):
+            if name and os.path.exists(self.get_file_path(name)):
+                os.remove(self.get_file_path(name))
+        return super().delete(*args, **kwargs)
@@ -0,0 +1,168 @@
+"""
+Exécution des calculs d'analyse (pandas, matplotlib) hors de la boucle
+asyncio, pour les vues async.
+
+- Pool de threads borné (ASYNC_ANALYSIS_WORKERS) et file d'attente bornée
+  (ASYNC_ANALYSIS_MAX_PENDING) : au-delà, OffloadBusy et la vue répond 503.
+- Single-flight : des requêtes identiques concurrentes (même dataset, même
+  vue, mêmes paramètres) attendent un seul et même calcul.
+- Annulation : quand le dernier client en attente se déconnecte, le calcul
+  est retiré de la file s'il n'a pas commencé. Sinon il est prévenu par un
+  threading.Event, qu'il consulte entre deux étapes (check_cancelled).
+
+Les futures sont celles de concurrent.futures : elles peuvent être attendues
+depuis n'importe quelle boucle (ASGI, ou une boucle par requête sous WSGI).
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .request_profiler import run_profiled
+from .utils.metrics import REGISTRY, record_cache_lookup, timed
+
+
+class OffloadBusy(Exception):
+    """File d'attente des calculs pleine"""
+
+
+class OffloadCancelled(Exception):
+    """Calcul abandonné : plus aucun client ne l'attend"""
+
+
+_cancel_event = contextvars.ContextVar('offload_cancel_event', default=None)
+
+
+def check_cancelled():
+    """À appeler entre deux étapes d'un calcul déporté : l'interrompt si plus personne ne l'attend"""
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise OffloadCancelled()
+
+
+def _discard_outcome(future):
+    if not future.cancelled():
+        future.exception()
+
+
+class _Flight:
+    def __init__(self):
+        self.future = None
+        self.cancel_event = threading.Event()
+        self.waiters = 0
+
+
+class Offloader:
+    def __init__(self, max_workers=4, max_pending=32):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        # Réentrant : un callback de future déjà terminée s'exécute tout de suite, sous le verrou
+        self._lock = threading.RLock()
+        self._flights = {}
+        self.pending = 0
+
+    def _submit(self, func, flight):
+        # Contexte de la requête (timings Server-Timing, profil demandé) propagé au thread
+        context = contextvars.copy_context()
+
+        def call():
+            _cancel_event.set(flight.cancel_event)
+            close_old_connections()
+            try:
+                check_cancelled()
+                return run_profiled(func)
+            finally:
+                close_old_connections()
+
+        future = self._executor.submit(context.run, call)
+        self.pending += 1
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    def _forget(self, key, flight):
+        if key is not None and self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def run(self, func, key=None):
+        """
+        Exécute func() dans le pool et attend son résultat. Avec `key`, un
+        calcul identique déjà en cours est partagé au lieu d'être relancé.
+        """
+        with self._lock:
+            flight = self._flights.get(key) if key is not None else None
+            if key is not None:
+                record_cache_lookup('single_flight', flight is not None)
+            if flight is None:
+                if self.pending >= self.max_pending:
+                    raise OffloadBusy()
+                flight = _Flight()
+                flight.future = self._submit(func, flight)
+                if key is not None:
+                    self._flights[key] = flight
+                    flight.future.add_done_callback(lambda f: self._remove_done(key, flight))
+            flight.waiters += 1
+
+        waiter = asyncio.wrap_future(flight.future)
+        # Calcul abandonné (OffloadCancelled) : son issue n'est plus attendue par personne
+        waiter.add_done_callback(_discard_outcome)
+        abandoned = False
+        try:
+            with timed('offload'):
+                return await asyncio.shield(waiter)
+        finally:
+            with self._lock:
+                flight.waiters -= 1
+                if flight.waiters == 0 and not flight.future.done():
+                    # Dernier client parti (déconnexion) : personne ne rejoindra ce calcul
+                    abandoned = True
+                    self._forget(key, flight)
+            if abandoned:
+                flight.cancel_event.set()
+                flight.future.cancel()
+
+    def _remove_done(self, key, flight):
+        with self._lock:
+            self._forget(key, flight)
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.max_workers, 'pending': self.pending, 'in_flight': len(self._flights)}
+
+
+_offloader = None
+_offloader_lock = threading.Lock()
+
+
+def get_offloader():
+    """Pool de calcul du processus, créé à la demande avec les bornes des settings"""
+    global _offloader
+    if _offloader is None:
+        with _offloader_lock:
+            if _offloader is None:
+                _offloader = Offloader(
+                    max_workers=getattr(settings, 'ASYNC_ANALYSIS_WORKERS', 4),
+                    max_pending=getattr(settings, 'ASYNC_ANALYSIS_MAX_PENDING', 32),
+                )
+    return _offloader
+
+
+async def offload(func, key=None):
+    return await get_offloader().run(func, key=key)
+
+
+def _offload_gauges():
+    if _offloader is None:
+        return []
+    stats = _offloader.stats()
+    return [({'measure': 'pending'}, stats['pending']), ({'measure': 'in_flight'}, stats['in_flight'])]
+
+
+REGISTRY.gauge('vizaur_offload_tasks', "Calculs déportés en file ou en cours (vues async)", _offload_gauges)
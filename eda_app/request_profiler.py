@@ -0,0 +1,187 @@
+"""
+Profilage à la demande d'une seule requête sur les vues d'un dataset.
+
+Un membre du staff ajoute `?profile=1` (ou l'en-tête `X-Profile: 1`) : la vue
+s'exécute sous cProfile et tracemalloc. Le fichier .prof (lisible avec
+pstats ou snakeviz) et les plus grosses allocations sont écrits dans
+PROFILES_DIR, puis listés dans l'admin (RequestProfile).
+
+Un seul profil à la fois par processus : tracemalloc est global. Le rendu
+délégué au pool de processus (CHART_RENDER_WORKERS) n'est pas profilé. Pour
+les vues async, cProfile couvre les calculs déportés dans le pool de threads
+(voir offload.py), là où le temps CPU est passé.
+"""
+import asyncio
+import cProfile
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+TOP_ALLOCATIONS = 50
+_profiling_lock = threading.Lock()
+# Profileur de la requête async en cours de profilage, repris par les calculs déportés
+_active_profiler = contextvars.ContextVar('active_profiler', default=None)
+
+
+def get_profiles_dir():
+    return getattr(settings, 'PROFILES_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'profiles')
+
+
+def _flag_set(request):
+    return request.GET.get('profile') == '1' or request.headers.get('X-Profile') == '1'
+
+
+def _is_staff(user):
+    return bool(user and user.is_active and user.is_staff)
+
+
+def profile_requested(request):
+    return _flag_set(request) and _is_staff(getattr(request, 'user', None))
+
+
+def run_profiled(func):
+    """Exécute func(), sous le profileur de la requête en cours s'il y en a un"""
+    profiler = _active_profiler.get()
+    return profiler.runcall(func) if profiler is not None else func()
+
+
+def write_allocations(snapshot, path, peak, limit=TOP_ALLOCATIONS):
+    """Plus grosses allocations encore vivantes en fin de requête, par ligne de code"""
+    stats = snapshot.statistics('lineno')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'Pic mémoire (tracemalloc): {peak / (1024 * 1024):.1f} Mo\n')
+        f.write(f'Allocations vivantes: {sum(s.size for s in stats) / (1024 * 1024):.1f} Mo\n\n')
+        for stat in stats[:limit]:
+            f.write(f'{stat}\n')
+
+
+class ProfileCapture:
+    """
+    cProfile et tracemalloc le temps d'un bloc ; à la sortie, écrit
+    `<base_name>.prof` et `<base_name>.alloc.txt` dans le répertoire des profils.
+    """
+
+    def __init__(self, base_name):
+        profiles_dir = get_profiles_dir()
+        os.makedirs(profiles_dir, exist_ok=True)
+        self.profile_path = os.path.join(profiles_dir, f'{base_name}.prof')
+        self.allocations_path = os.path.join(profiles_dir, f'{base_name}.alloc.txt')
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self):
+        tracemalloc.start()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 1)
+        snapshot = tracemalloc.take_snapshot()
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if exc_type is None:
+            self.profiler.dump_stats(self.profile_path)
+            write_allocations(snapshot, self.allocations_path, self.peak_memory)
+        return False
+
+
+def profile_call(func, base_name):
+    """Exécute func() sous cProfile et tracemalloc ; retourne (résultat, ProfileCapture)"""
+    with ProfileCapture(base_name) as capture:
+        result = capture.profiler.runcall(func)
+    return result, capture
+
+
+def _profile_context(request, view, kwargs):
+    """Dataset visé, nom de l'endpoint et nom de base des fichiers du profil"""
+    from .models import Dataset
+
+    dataset = Dataset.objects.filter(id=kwargs.get('dataset_id')).first()
+    endpoint = request.resolver_match.url_name if request.resolver_match else view.__name__
+    shape = f'{dataset.num_rows}x{dataset.num_columns}' if dataset else 'na'
+    base_name = '_'.join([
+        timezone.now().strftime('%Y%m%d-%H%M%S-%f'),
+        f'ds{kwargs.get("dataset_id", "na")}', endpoint, shape,
+    ])
+    return dataset, endpoint, base_name
+
+
+def _record_profile(request, user, dataset, endpoint, response, capture):
+    from .models import RequestProfile
+
+    record = RequestProfile.objects.create(
+        dataset=dataset,
+        endpoint=endpoint,
+        path=request.get_full_path()[:500],
+        username=user.get_username(),
+        num_rows=dataset.num_rows if dataset else None,
+        num_columns=dataset.num_columns if dataset else None,
+        status_code=response.status_code,
+        duration_ms=capture.duration_ms,
+        peak_memory=capture.peak_memory,
+        profile_file=os.path.relpath(capture.profile_path, settings.MEDIA_ROOT),
+        allocations_file=os.path.relpath(capture.allocations_path, settings.MEDIA_ROOT),
+    )
+    logger.info("Profil de %s enregistré", endpoint, extra={
+        'profile_id': record.pk, 'dataset_id': record.dataset_id,
+        'duration_ms': record.duration_ms, 'peak_bytes': record.peak_memory,
+    })
+    response['X-Profile-Id'] = str(record.pk)
+    return record
+
+
+def profilable(view):
+    """Décorateur des vues d'un dataset (sync ou async) : profil de la requête si un membre du staff le demande"""
+    if asyncio.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if not _flag_set(request) or not _is_staff(await request.auser()):
+                return await view(request, *args, **kwargs)
+            if not _profiling_lock.acquire(blocking=False):
+                response = await view(request, *args, **kwargs)
+                response['X-Profile'] = 'busy'
+                return response
+
+            try:
+                dataset, endpoint, base_name = await sync_to_async(_profile_context)(request, view, kwargs)
+                with ProfileCapture(base_name) as capture:
+                    token = _active_profiler.set(capture.profiler)
+                    try:
+                        response = await view(request, *args, **kwargs)
+                    finally:
+                        _active_profiler.reset(token)
+                await sync_to_async(_record_profile)(request, await request.auser(), dataset, endpoint,
+                                                     response, capture)
+            finally:
+                _profiling_lock.release()
+            return response
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not profile_requested(request):
+            return view(request, *args, **kwargs)
+        if not _profiling_lock.acquire(blocking=False):
+            # Un autre profil est en cours dans ce processus : requête servie normalement
+            response = view(request, *args, **kwargs)
+            response['X-Profile'] = 'busy'
+            return response
+
+        try:
+            dataset, endpoint, base_name = _profile_context(request, view, kwargs)
+            response, capture = profile_call(lambda: view(request, *args, **kwargs), base_name)
+            _record_profile(request, request.user, dataset, endpoint, response, capture)
+        finally:
+            _profiling_lock.release()
+        return response
+    return wrapper
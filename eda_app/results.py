@@ -0,0 +1,335 @@
+import hashlib
+import math
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.db import IntegrityError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import AnalysisResult
+from .utils.chart_cache import get_chart_cache
+from .utils.charts import (
+    CHART_DPI, DEFAULT_FORMAT, HEATMAP_ANNOTATION_MAX_COLUMNS, HEATMAP_MAX_COLUMNS, HEATMAP_TILE_SIZE, chart_parameters,
+    render_charts,
+)
+from .utils.data_analyzer import ANALYZER_VERSION
+from .utils.metrics import record_cache_lookup, timed
+
+
+def convert_numpy_types(obj):
+    """Convertit les types numpy/pandas en types Python natifs pour la sérialisation JSON"""
+    if isinstance(obj, (float, np.floating)) and not math.isfinite(obj):
+        # NaN/inf ne sont pas du JSON valide
+        return None
+    elif isinstance(obj, np.integer):
+        return int(obj)
+    elif isinstance(obj, np.floating):
+        return float(obj)
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    elif isinstance(obj, pd.Series):
+        return obj.tolist()
+    elif isinstance(obj, pd.DataFrame):
+        return obj.to_dict()
+    elif isinstance(obj, dict):
+        return {key: convert_numpy_types(value) for key, value in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_numpy_types(item) for item in obj]
+    else:
+        return obj
+
+
+def build_statistics_payload(analyzer):
+    """Statistiques descriptives et types de colonnes (onglet Statistiques)"""
+    descriptive_stats = analyzer.get_descriptive_stats()
+    return convert_numpy_types({
+        'descriptive_stats': descriptive_stats.to_dict() if descriptive_stats is not None else None,
+        'column_info': analyzer.detect_column_types(),
+        'numeric_columns': analyzer.get_numeric_columns(),
+    })
+
+
+def build_column_stats_payload(analyzer, column_name):
+    return convert_numpy_types({'column_stats': analyzer.get_column_stats(column_name)})
+
+
+def build_correlations_payload(analyzer, method='pearson'):
+    """Matrice et paires de corrélations (onglet Corrélations)"""
+    correlation_matrix = analyzer.get_correlation_matrix(method=method)
+    return convert_numpy_types({
+        'method': method,
+        'correlation_matrix': correlation_matrix.to_dict() if correlation_matrix is not None else None,
+        'numeric_columns': analyzer.get_numeric_columns(),
+        'correlation_pairs': analyzer.get_correlation_pairs(method=method),
+    })
+
+
+def build_profile_payload(analyzer):
+    """Informations générales et aperçu (page du dataset) d'un profil par morceaux"""
+    return convert_numpy_types({
+        'basic_info': analyzer.get_basic_info(),
+        'data_preview': analyzer.get_data_preview(),
+    })
+
+
+def build_chart_data_payload(analyzer, column_name, chart_type):
+    """Données du graphique de distribution d'une colonne, tirées des résumés d'un profil par morceaux"""
+    if chart_type == 'histogram':
+        data = analyzer.get_histogram_data(column_name)
+    else:
+        data = analyzer.get_bar_chart_data(column_name)
+    return convert_numpy_types({'chart_type': chart_type, 'data': data})
+
+
+def get_or_compute_result(dataset, kind, compute, key=''):
+    """
+    Retourne le résultat persisté (dataset, kind, key) pour la version courante
+    de l'analyseur, en le calculant et l'enregistrant au premier accès.
+    """
+    lookup = {'dataset': dataset, 'kind': kind, 'key': key, 'analyzer_version': ANALYZER_VERSION}
+    result = AnalysisResult.objects.filter(**lookup).first()
+    record_cache_lookup('results', result is not None)
+    if result is not None:
+        return result
+
+    payload = compute()
+    try:
+        return AnalysisResult.objects.create(payload=payload, **lookup)
+    except IntegrityError:
+        # Calculé en parallèle par une autre requête
+        return AnalysisResult.objects.get(**lookup)
+
+
+def precompute_results(dataset, analyzer, progress_callback=None):
+    """Recalcule les résultats servis par les onglets Statistiques et Corrélations"""
+    dataset.results.all().delete()
+    get_or_compute_result(dataset, 'statistics', lambda: build_statistics_payload(analyzer))
+    if progress_callback:
+        progress_callback('profiling', 75)
+    
+    if getattr(analyzer, 'streaming', False):
+        # Profil par morceaux : toutes les statistiques par colonne sont déjà là,
+        # on les enregistre pour que les vues ne rechargent jamais le fichier entier
+        # (voir PersistedProfile)
+        get_or_compute_result(dataset, 'profile', lambda: build_profile_payload(analyzer))
+        for column_name in analyzer.get_numeric_columns():
+            get_or_compute_result(dataset, 'column_stats',
+                                  lambda: build_column_stats_payload(analyzer, column_name), key=column_name)
+        for index, column_name, chart_type in chartable_columns(dataset):
+            get_or_compute_result(dataset, 'chart_data',
+                                  lambda: build_chart_data_payload(analyzer, column_name, chart_type), key=column_name)
+    
+    get_or_compute_result(dataset, 'correlations', lambda: build_correlations_payload(analyzer))
+
+
+def chartable_columns(dataset):
+    """Colonnes ayant un graphique de distribution : (index, nom, type de graphique), numériques d'abord"""
+    payload = get_or_compute_result(
+        dataset, 'statistics', lambda: build_statistics_payload(dataset.get_analyzer())
+    ).payload
+    column_info = payload['column_info']
+    numeric_columns = set(payload['numeric_columns'])
+    
+    indexed = list(enumerate(column_info.items()))
+    numeric = [(i, name, 'histogram') for i, (name, info) in indexed if name in numeric_columns]
+    categorical = [(i, name, 'bar_chart') for i, (name, info) in indexed
+                   if name not in numeric_columns and info['type'] == 'catégoriel']
+    return numeric + categorical
+
+
+def chart_options():
+    """Options de rendu des graphiques servis (CHART_DPI, CHART_FORMAT)"""
+    return {
+        'dpi': getattr(settings, 'CHART_DPI', CHART_DPI),
+        'image_format': getattr(settings, 'CHART_FORMAT', DEFAULT_FORMAT),
+    }
+
+
+def chart_digest(dataset, column_name, chart_type):
+    """Empreinte d'un graphique : fichier source (et feuille), colonne, type et paramètres de rendu"""
+    parameters = chart_parameters(chart_type, **chart_options())
+    if chart_type == 'histogram':
+        # La courbe de densité dépend de l'échantillon
+        parameters['sample_size'] = getattr(settings, 'CHART_SAMPLE_SIZE', None)
+    key = repr((dataset.get_cache_key(), ANALYZER_VERSION, column_name, chart_type, sorted(parameters.items())))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def cached_charts(dataset, load_analyzer, columns, workers=0):
+    """
+    Graphiques (PNG par défaut, voir CHART_FORMAT) de `columns` ([(nom, type de graphique)]) dans le cache
+    disque : seuls les absents sont rendus (en un seul appel à render_charts),
+    et `load_analyzer()` n'est appelé que s'il y en a. Retourne, dans
+    l'ordre, des couples (chemin de l'image ou None si colonne vide, exception).
+    """
+    cache = get_chart_cache()
+    options = chart_options()
+    extension = options['image_format']
+    digests = [chart_digest(dataset, name, chart_type) for name, chart_type in columns]
+    results = [(cache.get(dataset.id, digest, extension), None) for digest in digests]
+    missing = [i for i, (path, error) in enumerate(results) if path is None]
+    if not missing:
+        return results
+    
+    analyzer = load_analyzer()
+    tasks = []
+    for i in missing:
+        name, chart_type = columns[i]
+        if chart_type == 'histogram':
+            tasks.append(('histogram', name, analyzer.get_histogram_data(name), options))
+        elif getattr(analyzer, 'streaming', False):
+            # Profil par morceaux : pas de valeurs, seulement les comptages persistés
+            tasks.append(('bar_chart_data', name, analyzer.get_bar_chart_data(name), options))
+        else:
+            tasks.append(('bar_chart', name, analyzer.get_chart_values(name), options))
+    with timed('render_charts', charts=len(tasks)):
+        rendered = render_charts(tasks, workers=workers)
+    for i, (image, error) in zip(missing, rendered):
+        path = cache.put(dataset.id, digests[i], image, extension) if image is not None else None
+        results[i] = (path, error)
+    return results
+
+
+def read_chart(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def cached_image(dataset, digest, render):
+    """
+    Chemin dans le cache disque de l'image d'empreinte `digest`, rendue par
+    `render()` (octets ou None) si elle n'y est pas encore. None si rien à rendre.
+    """
+    cache = get_chart_cache()
+    extension = chart_options()['image_format']
+    path = cache.get(dataset.id, digest, extension)
+    if path is None:
+        image = render()
+        if image is None:
+            return None
+        path = cache.put(dataset.id, digest, image, extension)
+    return path
+
+
+def heatmap_options():
+    """Colonnes de l'image d'ensemble (HEATMAP_MAX_COLUMNS) et côté des blocs (HEATMAP_TILE_SIZE)"""
+    return {
+        'max_columns': getattr(settings, 'HEATMAP_MAX_COLUMNS', HEATMAP_MAX_COLUMNS),
+        'tile_size': max(1, getattr(settings, 'HEATMAP_TILE_SIZE', HEATMAP_TILE_SIZE)),
+    }
+
+
+def heatmap_digest(dataset, method, order, view):
+    """Empreinte d'une image de heatmap (`view` : image d'ensemble ou bloc) et de ses paramètres de rendu"""
+    parameters = {**chart_options(), 'annotate': HEATMAP_ANNOTATION_MAX_COLUMNS}
+    key = repr((dataset.get_cache_key(), ANALYZER_VERSION, 'heatmap', method, order, view, sorted(parameters.items())))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def correlation_frame(payload):
+    """Matrice de corrélations (DataFrame carré, NaN pour les valeurs manquantes) d'un résultat persisté"""
+    matrix = payload.get('correlation_matrix')
+    if not matrix:
+        return None
+    columns = list(matrix)
+    return pd.DataFrame(matrix, dtype=float).reindex(index=columns, columns=columns)
+
+
+def prewarm_charts(dataset, analyzer):
+    """Rend à l'avance les graphiques des premières colonnes (CHART_PREWARM_COLUMNS) pour le cache disque"""
+    limit = getattr(settings, 'CHART_PREWARM_COLUMNS', 24)
+    columns = [(name, chart_type) for index, name, chart_type in chartable_columns(dataset)[:limit]]
+    if columns:
+        cached_charts(dataset, lambda: analyzer, columns)
+
+
+class StreamedDatasetError(BadRequest):
+    """Opération qui demanderait de charger en entier un fichier profilé par morceaux (réponse 400)"""
+
+
+class PersistedProfile:
+    """
+    Analyseur d'un dataset profilé par morceaux (Dataset.should_stream) :
+    tout est lu dans les résultats enregistrés par l'analyse, le fichier
+    n'est jamais chargé. Ce qui n'y figure pas lève StreamedDatasetError.
+    """
+    streaming = True
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self._payloads = {}
+
+    def _payload(self, kind, key=''):
+        if (kind, key) not in self._payloads:
+            result = AnalysisResult.objects.filter(
+                dataset=self.dataset, kind=kind, key=key, analyzer_version=ANALYZER_VERSION
+            ).first()
+            record_cache_lookup('results', result is not None)
+            if result is None:
+                raise StreamedDatasetError(
+                    "Fichier profilé par morceaux : résultat indisponible sans recharger le fichier, relancez l'analyse"
+                )
+            self._payloads[(kind, key)] = result.payload
+        return self._payloads[(kind, key)]
+
+    def _unavailable(self, *args, **kwargs):
+        raise StreamedDatasetError("Opération indisponible pour les fichiers profilés par morceaux")
+
+    # Calculs qui demanderaient les données : seuls leurs résultats persistés sont servis
+    get_descriptive_stats = get_correlation_matrix = get_correlation_pairs = get_chart_values = _unavailable
+
+    def get_basic_info(self):
+        return self._payload('profile')['basic_info']
+
+    def get_data_preview(self):
+        return self._payload('profile')['data_preview']
+
+    def detect_column_types(self):
+        return self._payload('statistics')['column_info']
+
+    def get_numeric_columns(self):
+        return self._payload('statistics')['numeric_columns']
+
+    def get_column_stats(self, column_name):
+        if column_name not in self.get_numeric_columns():
+            return None
+        return self._payload('column_stats', column_name)['column_stats']
+
+    def _chart_data(self, column_name, chart_type):
+        if column_name not in self.detect_column_types():
+            return None
+        payload = self._payload('chart_data', column_name)
+        return payload['data'] if payload['chart_type'] == chart_type else None
+
+    def get_histogram_data(self, column_name):
+        return self._chart_data(column_name, 'histogram')
+
+    def get_bar_chart_data(self, column_name):
+        return self._chart_data(column_name, 'bar_chart')
+
+    def get_sample_info(self, column_name):
+        # Graphiques tirés des résumés de toutes les lignes, sans échantillon
+        info = self.detect_column_types()[column_name]
+        return {'sampled': False, 'sample_size': int(self.dataset.num_rows or 0) - int(info['missing_count'])}
+
+
+def results_response(request, results, build_response, variant=''):
+    """
+    Réponse revalidable par le navigateur : ETag et Last-Modified dérivés des
+    résultats persistés (et de `variant`, ce qui d'autre change la réponse),
+    304 si le client possède déjà la bonne version.
+    """
+    fingerprint = '|'.join(f'{r.pk}:{r.analyzer_version}:{r.created_at.timestamp()}' for r in results) + variant
+    etag = quote_etag(hashlib.sha1(fingerprint.encode()).hexdigest())
+    last_modified = int(max(r.created_at for r in results).timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build_response()
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -82,6 +82,65 @@ class AjaxLoader {
         }
     }
     
+    // Flux NDJSON : onMessage est appelé pour chaque ligne, dès sa réception
+    async streamDistributionColumns(datasetId, page, onMessage, pageSize = 12) {
+        try {
+            const url = `${this.baseUrl}/dataset/${datasetId}/distributions/stream/?page=${page}&page_size=${pageSize}`;
+            const response = await fetch(url, {
+                method: 'GET',
+                headers: {
+                    'X-Requested-With': 'XMLHttpRequest',
+                }
+            });
+            
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            const flush = () => {
+                let newline;
+                while ((newline = buffer.indexOf('\n')) >= 0) {
+                    const line = buffer.slice(0, newline).trim();
+                    buffer = buffer.slice(newline + 1);
+                    if (line) onMessage(JSON.parse(line));
+                }
+            };
+            
+            while (true) {
+                const {value, done} = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, {stream: true});
+                flush();
+            }
+            buffer += decoder.decode() + '\n';
+            flush();
+        } catch (error) {
+            throw new Error(`Erreur lors du chargement des distributions: ${error.message}`);
+        }
+    }
+    
+    async loadCorrelationHeatmap(datasetId, order = 'cluster') {
+        try {
+            const response = await fetch(`${this.baseUrl}/dataset/${datasetId}/correlations/heatmap/?order=${order}`, {
+                method: 'GET',
+                headers: {
+                    'X-Requested-With': 'XMLHttpRequest',
+                }
+            });
+            
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+            }
+            
+            return await response.json();
+        } catch (error) {
+            throw new Error(`Erreur lors du chargement de la heatmap: ${error.message}`);
+        }
+    }
+    
     async loadCorrelations(datasetId) {
         try {
             const response = await fetch(`${this.baseUrl}/dataset/${datasetId}/correlations/`, {
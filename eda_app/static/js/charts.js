@@ -0,0 +1,206 @@
+// Graphiques dessinés dans le navigateur (canvas) à partir des données JSON du serveur
+class Charts {
+    static COLORS = {
+        bar: 'rgba(31, 119, 180, 0.7)',
+        line: '#1f77b4',
+        category: 'rgba(135, 206, 235, 0.8)',
+        grid: 'rgba(0, 0, 0, 0.08)',
+        axis: '#374151',
+        text: '#4b5563',
+    };
+
+    // Canvas net sur les écrans haute densité ; retourne le contexte et la taille en pixels CSS
+    static setupCanvas(canvas) {
+        const ratio = window.devicePixelRatio || 1;
+        const width = canvas.clientWidth || 600;
+        const height = canvas.clientHeight || 300;
+        canvas.width = Math.round(width * ratio);
+        canvas.height = Math.round(height * ratio);
+        const ctx = canvas.getContext('2d');
+        ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+        ctx.clearRect(0, 0, width, height);
+        ctx.font = '11px sans-serif';
+        return {ctx, width, height};
+    }
+
+    static niceTicks(max, count = 5) {
+        if (!(max > 0)) return [0];
+        const raw = max / count;
+        const magnitude = Math.pow(10, Math.floor(Math.log10(raw)));
+        const step = [1, 2, 5, 10].map(m => m * magnitude).find(s => s >= raw);
+        const ticks = [];
+        for (let value = 0; value <= max + step / 2; value += step) {
+            ticks.push(value);
+        }
+        return ticks;
+    }
+
+    static formatTick(value) {
+        const abs = Math.abs(value);
+        if (abs >= 1e6 || (abs > 0 && abs < 1e-2)) return value.toExponential(1);
+        if (abs >= 1000) return Math.round(value).toLocaleString('fr-FR');
+        return parseFloat(value.toFixed(2)).toString();
+    }
+
+    static drawYAxis(ctx, plot, maxValue) {
+        const ticks = Charts.niceTicks(maxValue);
+        const top = ticks[ticks.length - 1] || 1;
+        ctx.textAlign = 'right';
+        ctx.textBaseline = 'middle';
+        ticks.forEach(tick => {
+            const y = plot.bottom - (tick / top) * plot.height;
+            ctx.strokeStyle = Charts.COLORS.grid;
+            ctx.beginPath();
+            ctx.moveTo(plot.left, y);
+            ctx.lineTo(plot.right, y);
+            ctx.stroke();
+            ctx.fillStyle = Charts.COLORS.text;
+            ctx.fillText(Charts.formatTick(tick), plot.left - 6, y);
+        });
+        return top;
+    }
+
+    static histogram(canvas, data) {
+        const {ctx, width, height} = Charts.setupCanvas(canvas);
+        const plot = {left: 56, right: width - 12, top: 12, bottom: height - 32};
+        plot.width = plot.right - plot.left;
+        plot.height = plot.bottom - plot.top;
+
+        const edges = data.bin_edges;
+        const xMin = edges[0];
+        const xMax = edges[edges.length - 1];
+        const xScale = value => plot.left + (xMax > xMin ? (value - xMin) / (xMax - xMin) : 0.5) * plot.width;
+
+        const kdeMax = data.kde ? Math.max(...data.kde.y) : 0;
+        const yTop = Charts.drawYAxis(ctx, plot, Math.max(...data.counts, kdeMax));
+        const yScale = value => plot.bottom - (value / yTop) * plot.height;
+
+        // Barres : comptages exacts
+        ctx.fillStyle = Charts.COLORS.bar;
+        ctx.strokeStyle = '#ffffff';
+        data.counts.forEach((count, i) => {
+            const x0 = xScale(edges[i]);
+            const x1 = xScale(edges[i + 1]);
+            ctx.fillRect(x0, yScale(count), Math.max(x1 - x0, 1), plot.bottom - yScale(count));
+            ctx.strokeRect(x0, yScale(count), Math.max(x1 - x0, 1), plot.bottom - yScale(count));
+        });
+
+        // Courbe de densité (éventuellement estimée sur un échantillon)
+        if (data.kde) {
+            ctx.strokeStyle = Charts.COLORS.line;
+            ctx.lineWidth = 2;
+            ctx.beginPath();
+            data.kde.x.forEach((x, i) => {
+                const px = xScale(x);
+                const py = yScale(data.kde.y[i]);
+                if (i === 0) ctx.moveTo(px, py); else ctx.lineTo(px, py);
+            });
+            ctx.stroke();
+            ctx.lineWidth = 1;
+        }
+
+        // Axe des abscisses
+        ctx.strokeStyle = Charts.COLORS.axis;
+        ctx.beginPath();
+        ctx.moveTo(plot.left, plot.bottom);
+        ctx.lineTo(plot.right, plot.bottom);
+        ctx.stroke();
+        ctx.fillStyle = Charts.COLORS.text;
+        ctx.textAlign = 'center';
+        ctx.textBaseline = 'top';
+        for (let i = 0; i <= 4; i++) {
+            const value = xMin + (xMax - xMin) * i / 4;
+            ctx.fillText(Charts.formatTick(value), xScale(value), plot.bottom + 6);
+        }
+    }
+
+    static barChart(canvas, data) {
+        const {ctx, width, height} = Charts.setupCanvas(canvas);
+        const plot = {left: 56, right: width - 12, top: 18, bottom: height - 72};
+        plot.width = plot.right - plot.left;
+        plot.height = plot.bottom - plot.top;
+
+        const yTop = Charts.drawYAxis(ctx, plot, Math.max(...data.counts));
+        const slot = plot.width / data.counts.length;
+        const barWidth = slot * 0.8;
+
+        data.counts.forEach((count, i) => {
+            const x = plot.left + i * slot + (slot - barWidth) / 2;
+            const y = plot.bottom - (count / yTop) * plot.height;
+            ctx.fillStyle = Charts.COLORS.category;
+            ctx.fillRect(x, y, barWidth, plot.bottom - y);
+
+            // Effectif au-dessus de la barre
+            ctx.fillStyle = Charts.COLORS.text;
+            ctx.textAlign = 'center';
+            ctx.textBaseline = 'bottom';
+            ctx.fillText(count.toLocaleString('fr-FR'), x + barWidth / 2, y - 2);
+
+            // Libellé incliné sous l'axe
+            const label = data.labels[i].length > 14 ? `${data.labels[i].slice(0, 13)}…` : data.labels[i];
+            ctx.save();
+            ctx.translate(x + barWidth / 2, plot.bottom + 6);
+            ctx.rotate(-Math.PI / 4);
+            ctx.textAlign = 'right';
+            ctx.textBaseline = 'middle';
+            ctx.fillText(label, 0, 0);
+            ctx.restore();
+        });
+
+        ctx.strokeStyle = Charts.COLORS.axis;
+        ctx.beginPath();
+        ctx.moveTo(plot.left, plot.bottom);
+        ctx.lineTo(plot.right, plot.bottom);
+        ctx.stroke();
+    }
+
+    // Échelle divergente bleu (-1) / gris (0) / rouge (+1)
+    static correlationColor(value) {
+        const t = Math.max(-1, Math.min(1, value || 0));
+        const neutral = [221, 221, 221];
+        const end = t < 0 ? [59, 76, 192] : [180, 4, 38];
+        const mix = neutral.map((c, i) => Math.round(c + (end[i] - c) * Math.abs(t)));
+        return `rgb(${mix[0]}, ${mix[1]}, ${mix[2]})`;
+    }
+
+    // Triangle inférieur de la matrice (comme la heatmap serveur), valeurs affichées si la place le permet
+    static heatmap(canvas, matrix) {
+        const columns = Object.keys(matrix);
+        const n = columns.length;
+        if (n < 2) return;
+
+        const labelSpace = 90;
+        canvas.style.height = `${Math.min(Math.max(n * 32, 240), 720) + labelSpace}px`;
+        const {ctx, width, height} = Charts.setupCanvas(canvas);
+        const size = Math.min((width - labelSpace - 10) / n, (height - labelSpace - 10) / n);
+        const left = labelSpace;
+        const top = 10;
+
+        ctx.textAlign = 'center';
+        ctx.textBaseline = 'middle';
+        for (let i = 1; i < n; i++) {
+            for (let j = 0; j < i; j++) {
+                const value = matrix[columns[j]][columns[i]];
+                ctx.fillStyle = Charts.correlationColor(value);
+                ctx.fillRect(left + j * size, top + i * size, size - 1, size - 1);
+                if (size >= 28 && value !== null && value !== undefined) {
+                    ctx.fillStyle = Math.abs(value) > 0.6 ? '#ffffff' : '#111827';
+                    ctx.fillText(value.toFixed(2), left + j * size + size / 2, top + i * size + size / 2);
+                }
+            }
+        }
+
+        // Libellés : lignes à gauche, colonnes en bas (inclinés)
+        ctx.fillStyle = Charts.COLORS.text;
+        columns.forEach((column, i) => {
+            const label = column.length > 12 ? `${column.slice(0, 11)}…` : column;
+            ctx.textAlign = 'right';
+            ctx.fillText(label, left - 6, top + i * size + size / 2);
+            ctx.save();
+            ctx.translate(left + i * size + size / 2, top + n * size + 6);
+            ctx.rotate(-Math.PI / 4);
+            ctx.fillText(label, 0, 0);
+            ctx.restore();
+        });
+    }
+}
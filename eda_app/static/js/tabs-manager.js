@@ -6,6 +6,11 @@ class TabsManager {
         this.loadedTabs = new Set(['general']); // L'onglet général est déjà chargé
         this.datasetId = null;
         
+        // Chargement progressif de l'onglet Distributions
+        this.distributionsNextPage = null;
+        this.distributionsLoading = false;
+        this.pageObserver = null;
+        
         this.initializeEventListeners();
     }
     
@@ -81,8 +86,9 @@ class TabsManager {
                     break;
                     
                 case 'distributions':
-                    data = await this.ajaxLoader.loadDistributions(this.datasetId);
-                    this.renderDistributions(contentId, data);
+                    // Le contenu s'affiche dès l'en-tête du flux, les graphiques suivent colonne par colonne
+                    this.renderDistributions(contentId);
+                    await this.streamDistributionsPage(1, () => this.hideLoader(loaderId, contentId));
                     break;
                     
                 case 'correlations':
@@ -220,76 +226,107 @@ class TabsManager {
         container.innerHTML = html;
     }
     
-    renderDistributions(containerId, data) {
+    renderDistributions(containerId) {
         const container = document.getElementById(containerId);
         if (!container) return;
         
-        let html = `
+        container.innerHTML = `
             <div class="bg-gray-50 rounded-lg p-6">
                 <h3 class="text-lg font-semibold text-gray-800 mb-4 flex items-center">
                     <i class="fas fa-chart-bar mr-2 text-purple-600"></i>
                     Distributions des Variables
                 </h3>
-        `;
-        
-        // Variables numériques
-        if (data.numeric_distributions && Object.keys(data.numeric_distributions).length > 0) {
-            html += `
-                <div class="mb-8">
+                <div id="distributions-numeric" class="mb-8 hidden">
                     <h4 class="text-md font-semibold text-gray-700 mb-4 flex items-center">
                         <i class="fas fa-hashtag mr-2 text-blue-600"></i>
                         Variables Numériques
                     </h4>
-                    <div class="grid grid-cols-1 lg:grid-cols-2 gap-6">
-            `;
-            
-            Object.entries(data.numeric_distributions).forEach(([column, distData]) => {
-                if (distData.histogram) {
-                    html += `
-                        <div class="bg-white rounded-lg shadow p-4">
-                            <h5 class="font-medium text-gray-800 mb-3">${column}</h5>
-                            <img src="data:image/png;base64,${distData.histogram}" alt="Histogramme ${column}" class="w-full h-auto">
-                        </div>
-                    `;
-                }
-            });
-            
-            html += `
-                    </div>
+                    <div id="distributions-numeric-grid" class="grid grid-cols-1 lg:grid-cols-2 gap-6"></div>
                 </div>
-            `;
-        }
-        
-        // Variables catégorielles
-        if (data.categorical_distributions && Object.keys(data.categorical_distributions).length > 0) {
-            html += `
-                <div>
+                <div id="distributions-categorical" class="hidden">
                     <h4 class="text-md font-semibold text-gray-700 mb-4 flex items-center">
                         <i class="fas fa-tags mr-2 text-purple-600"></i>
                         Variables Catégorielles
                     </h4>
-                    <div class="grid grid-cols-1 lg:grid-cols-2 gap-6">
-            `;
-            
-            Object.entries(data.categorical_distributions).forEach(([column, distData]) => {
-                if (distData.bar_chart) {
-                    html += `
-                        <div class="bg-white rounded-lg shadow p-4">
-                            <h5 class="font-medium text-gray-800 mb-3">${column}</h5>
-                            <img src="data:image/png;base64,${distData.bar_chart}" alt="Graphique en barres ${column}" class="w-full h-auto">
-                        </div>
-                    `;
+                    <div id="distributions-categorical-grid" class="grid grid-cols-1 lg:grid-cols-2 gap-6"></div>
+                </div>
+                <div id="distributions-sentinel" class="h-4"></div>
+            </div>
+        `;
+        
+        // La page suivante du manifeste est chargée quand on atteint le bas de la liste
+        this.pageObserver = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                this.loadNextDistributionsPage();
+            }
+        }, {rootMargin: '400px'});
+        
+        this.pageObserver.observe(document.getElementById('distributions-sentinel'));
+    }
+    
+    // Lit une page du flux NDJSON ; chaque colonne est dessinée dès réception
+    async streamDistributionsPage(page, onStart = null) {
+        this.distributionsLoading = true;
+        try {
+            await this.ajaxLoader.streamDistributionColumns(this.datasetId, page, message => {
+                if (message.type === 'page') {
+                    this.distributionsNextPage = message.next_page;
+                    if (onStart) onStart();
+                } else if (message.type === 'column') {
+                    this.appendDistributionCard(message);
+                } else if (message.type === 'error') {
+                    Utils.showNotification(message.error, 'error');
                 }
             });
-            
-            html += `
-                    </div>
-                </div>
-            `;
+        } finally {
+            this.distributionsLoading = false;
         }
         
-        html += `</div>`;
-        container.innerHTML = html;
+        if (!this.distributionsNextPage && this.pageObserver) {
+            this.pageObserver.disconnect();
+        }
+    }
+    
+    appendDistributionCard(column) {
+        const isNumeric = column.chart_type === 'histogram';
+        const section = document.getElementById(isNumeric ? 'distributions-numeric' : 'distributions-categorical');
+        const grid = document.getElementById(isNumeric ? 'distributions-numeric-grid' : 'distributions-categorical-grid');
+        if (!section || !grid) return;
+        
+        const card = document.createElement('div');
+        card.className = 'bg-white rounded-lg shadow p-4';
+        card.innerHTML = `
+            <div class="flex items-center justify-between mb-3">
+                <h5 class="font-medium text-gray-800">${column.name}</h5>
+                <a href="${column.chart_url}" target="_blank" class="text-xs text-blue-600 hover:underline" title="Exporter en PNG">
+                    <i class="fas fa-download mr-1"></i>PNG
+                </a>
+            </div>
+            <canvas aria-label="${isNumeric ? 'Histogramme' : 'Graphique en barres'} ${column.name}" class="w-full h-72 bg-gray-50"></canvas>
+            ${column.sampled ? `<p class="text-xs text-gray-500 mt-2">Comptages exacts ; densité estimée sur un échantillon de ${column.sample_size.toLocaleString('fr-FR')} valeurs</p>` : ''}
+        `;
+        grid.appendChild(card);
+        section.classList.remove('hidden');
+        
+        const canvas = card.querySelector('canvas');
+        if (column.error) {
+            canvas.insertAdjacentHTML('afterend', `<p class="text-sm text-red-600 mt-2">Graphique indisponible : ${column.error}</p>`);
+        } else if (isNumeric) {
+            Charts.histogram(canvas, column.data);
+        } else {
+            Charts.barChart(canvas, column.data);
+        }
+    }
+    
+    async loadNextDistributionsPage() {
+        if (!this.distributionsNextPage || this.distributionsLoading) return;
+        
+        try {
+            await this.streamDistributionsPage(this.distributionsNextPage);
+        } catch (error) {
+            console.error('Erreur lors du chargement des distributions:', error);
+            Utils.showNotification('Erreur lors du chargement des distributions', 'error');
+        }
     }
     
     renderCorrelations(containerId, data) {
@@ -304,8 +341,22 @@ class TabsManager {
                 </h3>
         `;
         
-        if (data.correlation_matrix) {
+        // Matrice large : heatmap rendue par le serveur (ordre par classification, blocs à la demande)
+        const wide = data.correlation_matrix && Object.keys(data.correlation_matrix).length > TabsManager.HEATMAP_CLIENT_MAX_COLUMNS;
+        
+        if (wide) {
             html += `
+                <div class="bg-white rounded-lg shadow p-6 mb-6">
+                    <h4 class="text-md font-semibold text-gray-700 mb-4">Heatmap des Corrélations</h4>
+                    <div id="correlation-heatmap-tiles" class="text-sm text-gray-500">Chargement de la heatmap...</div>
+                </div>
+            `;
+        } else if (data.correlation_matrix) {
+            html += `
+                <div class="bg-white rounded-lg shadow p-6 mb-6">
+                    <h4 class="text-md font-semibold text-gray-700 mb-4">Heatmap des Corrélations</h4>
+                    <canvas id="correlation-heatmap" class="w-full"></canvas>
+                </div>
                 <div class="bg-white rounded-lg shadow p-6 mb-6">
                     <h4 class="text-md font-semibold text-gray-700 mb-4">Matrice de Corrélations</h4>
                     <div class="overflow-x-auto">
@@ -380,5 +431,66 @@ class TabsManager {
         
         html += `</div>`;
         container.innerHTML = html;
+        
+        const heatmap = document.getElementById('correlation-heatmap');
+        if (heatmap) {
+            Charts.heatmap(heatmap, data.correlation_matrix);
+        }
+        if (wide) {
+            this.renderHeatmapTiles('correlation-heatmap-tiles');
+        }
+    }
+    
+    // Vue d'ensemble de la matrice + grille des blocs (triangle inférieur), chaque bloc chargé au clic
+    async renderHeatmapTiles(containerId) {
+        const container = document.getElementById(containerId);
+        if (!container) return;
+        
+        let manifest;
+        try {
+            manifest = await this.ajaxLoader.loadCorrelationHeatmap(this.datasetId);
+        } catch (error) {
+            container.innerHTML = `<p class="text-red-600">${error.message}</p>`;
+            return;
+        }
+        
+        const columns = manifest.columns;
+        const range = ([start, end]) => `${columns[start]} … ${columns[end - 1]}`;
+        let html = `
+            <p class="mb-4">${columns.length} variables, regroupées par similarité. La vue d'ensemble montre les plus corrélées ; choisissez un bloc pour afficher toutes les variables en détail.</p>
+            <div class="grid grid-cols-1 lg:grid-cols-2 gap-6">
+                <div>
+                    <img src="${manifest.overview_url}" alt="Heatmap des variables les plus corrélées" class="w-full" loading="lazy">
+                    <div class="grid gap-px mt-4" style="grid-template-columns: repeat(${manifest.grid}, minmax(0, 1fr));">
+        `;
+        manifest.tiles.forEach(tile => {
+            html += `
+                <button type="button" class="heatmap-tile aspect-square bg-gray-200 hover:bg-blue-400"
+                        style="grid-row: ${tile.row + 1}; grid-column: ${tile.col + 1};"
+                        data-url="${tile.url}" title="${range(tile.rows)} × ${range(tile.cols)}"></button>
+            `;
+        });
+        html += `
+                    </div>
+                </div>
+                <div>
+                    <img id="correlation-heatmap-zoom" alt="Bloc de la heatmap" class="w-full hidden">
+                </div>
+            </div>
+        `;
+        container.innerHTML = html;
+        
+        const zoom = document.getElementById('correlation-heatmap-zoom');
+        container.querySelectorAll('.heatmap-tile').forEach(button => {
+            button.addEventListener('click', () => {
+                container.querySelectorAll('.heatmap-tile').forEach(other => other.classList.remove('bg-blue-600'));
+                button.classList.add('bg-blue-600');
+                zoom.src = button.dataset.url;
+                zoom.classList.remove('hidden');
+            });
+        });
     }
-}
\ No newline at end of file
+}
+
+// Au-delà, la heatmap est rendue par le serveur et la matrice n'est plus affichée en tableau
+TabsManager.HEATMAP_CLIENT_MAX_COLUMNS = 40;
\ No newline at end of file
@@ -1,3 +1,931 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from . import jobs, results, views
+from .models import AnalysisJob, AnalysisResult, Dataset
+from .offload import OffloadBusy, Offloader
+from .utils import chart_cache, column_stats, data_analyzer, excel, readers
+from .utils.sketches import FrequentItems, HyperLogLog, KLLSketch, RunningMoments
+from .utils.chart_cache import ChartCache
+from .utils.benchmark import compare_to_baseline, synthetic_frame
+from .utils.column_stats import numeric_column_stats
+from .utils.correlation import (
+    CorrelationAccumulator, arrange_heatmap, cluster_order, correlation_matrix, pearson_matrix, rank_pairs,
+    top_correlated,
+)
+from .utils.snapshot import is_snapshot_fresh, load_snapshot, write_snapshot
+from .utils.streaming import StreamingProfiler
+
+
+def _sample_frame(rows=200, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'a': rng.normal(size=rows),
+        'b': rng.integers(0, 50, rows),
+        'c': rng.choice(['x', 'y', 'z'], rows),
+    })
+    df['d'] = df['a'] * 2 + rng.normal(scale=0.1, size=rows)
+    return df
+
+
+class AnalyzedDatasetMixin:
+    """Datasets écrits et analysés dans un MEDIA_ROOT temporaire (vues : TransactionTestCase, le calcul se fait dans d'autres threads)"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        overridden = self.settings(MEDIA_ROOT=self.media_root, CHART_RENDER_WORKERS=0, CHART_PREWARM_COLUMNS=0)
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+        patcher = mock.patch.object(chart_cache, '_cache', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Une ligne de journal par requête : inutile ici
+        request_logger = logging.getLogger('eda_app.requests')
+        self.addCleanup(request_logger.setLevel, request_logger.level)
+        request_logger.setLevel(logging.WARNING)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.media_root, 'datasets', name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        mode = 'wb' if isinstance(content, bytes) else 'w'
+        with open(path, mode) as f:
+            f.write(content)
+        return path
+
+    def make_dataset(self, df=None, name='data.csv', analyze=True):
+        df = _sample_frame() if df is None else df
+        path = self.write_file(name, df.to_csv(index=False))
+        dataset = Dataset.objects.create(name=name, file_path=f'datasets/{name}', size=os.path.getsize(path))
+        if analyze:
+            self.assertTrue(dataset.analyze_and_update(), dataset.error_message)
+        return dataset
+
+
+def _chunks(values, size):
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+
+def _dead_pid():
+    """Pid d'un processus terminé"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+class SnapshotTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.source = os.path.join(self.tmp_dir, 'data.csv')
+        with open(self.source, 'w') as f:
+            f.write('x\n1\n')
+        self.snapshot_dir = os.path.join(self.tmp_dir, 'snapshot')
+
+    def test_round_trip(self):
+        df = pd.DataFrame({
+            'int': [1, 2, 3, 4],
+            'float': [1.5, np.nan, 3.0, -2.0],
+            'bool': [True, False, True, True],
+            'date': pd.to_datetime(['2024-01-01', '2024-02-01', None, '2024-03-01']),
+            # Texte manquant : NaN, comme le produit read_csv
+            'text': ['a', np.nan, 'b', 'a'],
+            'category': pd.Categorical(['x', 'y', 'x', None]),
+            'nullable': pd.array([1, None, 3, 4], dtype='Int64'),
+        })
+        write_snapshot(df, self.snapshot_dir, self.source)
+
+        self.assertTrue(is_snapshot_fresh(self.snapshot_dir, self.source))
+        pd.testing.assert_frame_equal(load_snapshot(self.snapshot_dir), df)
+        pd.testing.assert_frame_equal(load_snapshot(self.snapshot_dir, columns=['text', 'int']), df[['int', 'text']])
+
+    def test_stale_after_source_change(self):
+        write_snapshot(pd.DataFrame({'x': [1]}), self.snapshot_dir, self.source)
+        with open(self.source, 'a') as f:
+            f.write('2\n')
+        self.assertFalse(is_snapshot_fresh(self.snapshot_dir, self.source))
+
+    def test_unknown_column(self):
+        write_snapshot(pd.DataFrame({'x': [1]}), self.snapshot_dir, self.source)
+        with self.assertRaises(KeyError):
+            load_snapshot(self.snapshot_dir, columns=['y'])
+
+
+class ResultRevalidationTests(AnalyzedDatasetMixin, TransactionTestCase):
+    def test_unchanged_results_revalidate_with_304(self):
+        dataset = self.make_dataset()
+        url = f'/dataset/{dataset.id}/statistics/'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('numeric_columns', first.json())
+
+        # Servi depuis les résultats persistés : aucun rechargement du fichier
+        with mock.patch.object(Dataset, 'get_analyzer', side_effect=AssertionError('rechargé')):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_reanalysis_changes_etag(self):
+        dataset = self.make_dataset()
+        url = f'/dataset/{dataset.id}/statistics/'
+        etag = self.client.get(url)['ETag']
+
+        dataset.analyze_and_update()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_column_stats_persisted_once(self):
+        dataset = self.make_dataset()
+        url = f'/dataset/{dataset.id}/statistics/?column=a'
+        self.assertAlmostEqual(self.client.get(url).json()['column_stats']['mean'], _sample_frame()['a'].mean(), places=3)
+        self.client.get(url)
+        self.assertEqual(AnalysisResult.objects.filter(dataset=dataset, kind='column_stats').count(), 1)
+
+    def test_correlations_etag_depends_on_top(self):
+        dataset = self.make_dataset()
+        url = f'/dataset/{dataset.id}/correlations/'
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url + '?top=1', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.dataset = Dataset.objects.create(name='data.csv', file_path='datasets/data.csv', size=1, status='queued')
+
+    def test_claim_is_exclusive(self):
+        first = AnalysisJob.objects.create(dataset=self.dataset)
+        second = AnalysisJob.objects.create(dataset=self.dataset)
+
+        self.assertEqual(jobs.claim_next_job(), first.pk)
+        self.assertEqual(jobs.claim_next_job(), second.pk)
+        self.assertIsNone(jobs.claim_next_job())
+        first.refresh_from_db()
+        self.assertEqual((first.state, first.worker_pid), ('running', os.getpid()))
+
+    def test_recover_requeues_jobs_of_dead_processes(self):
+        self.dataset.set_progress('profiling', 50)
+        orphan = AnalysisJob.objects.create(dataset=self.dataset, state='running', worker_pid=_dead_pid())
+
+        with self.assertLogs('eda_app.jobs', 'WARNING'):
+            self.assertEqual(jobs.recover_interrupted_jobs(), 1)
+        orphan.refresh_from_db()
+        self.dataset.refresh_from_db()
+        self.assertEqual((orphan.state, orphan.worker_pid), ('queued', None))
+        self.assertEqual((self.dataset.status, self.dataset.progress), ('queued', 0))
+
+    def test_recover_leaves_live_jobs_alone(self):
+        job = AnalysisJob.objects.create(dataset=self.dataset, state='running', worker_pid=os.getppid())
+
+        self.assertEqual(jobs.recover_interrupted_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.state, 'running')
+
+    def test_recover_requeues_stuck_datasets(self):
+        self.dataset.set_progress('parsing', 30)
+        AnalysisJob.objects.create(dataset=self.dataset, state='failed')
+
+        with self.assertLogs('eda_app.jobs', 'WARNING'):
+            self.assertEqual(jobs.recover_interrupted_jobs(), 1)
+        self.assertEqual(self.dataset.jobs.filter(state='queued').count(), 1)
+
+
+class RunnerAutostartTests(TestCase):
+    def test_server_processes(self):
+        self.assertTrue(jobs._is_server_process(['/usr/bin/gunicorn', 'vizaur_project.wsgi']))
+        self.assertTrue(jobs._is_server_process(['manage.py', 'runserver', '--noreload']))
+        with mock.patch.dict(os.environ, {'RUN_MAIN': 'true'}):
+            self.assertTrue(jobs._is_server_process(['manage.py', 'runserver']))
+
+    def test_not_started_by_management_commands_or_reloader(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('RUN_MAIN', None)
+            self.assertFalse(jobs._is_server_process(['manage.py', 'runserver']))
+        for command in ('migrate', 'test', 'run_analysis_worker'):
+            self.assertFalse(jobs._is_server_process(['manage.py', command]))
+
+    @override_settings(ANALYSIS_RUNNER_AUTOSTART=False)
+    def test_disabled(self):
+        with mock.patch.object(sys, 'argv', ['gunicorn']), mock.patch.object(jobs, 'get_runner') as get_runner:
+            self.assertIsNone(jobs.autostart_runner())
+        get_runner.assert_not_called()
+
+
+class RunnerRestartTests(TransactionTestCase):
+    def test_leftover_jobs_picked_up_at_startup(self):
+        waiting = Dataset.objects.create(name='a.csv', file_path='datasets/a.csv', size=1, status='queued')
+        interrupted = Dataset.objects.create(name='b.csv', file_path='datasets/b.csv', size=1, status='profiling')
+        queued = AnalysisJob.objects.create(dataset=waiting)
+        running = AnalysisJob.objects.create(dataset=interrupted, state='running', worker_pid=_dead_pid())
+
+        executed = []
+        all_executed = threading.Event()
+
+        def fake_run_job(job_id):
+            # Sans accès à la base : SQLite en mémoire partagée verrouille les tables entre threads
+            executed.append(job_id)
+            if len(executed) == 2:
+                all_executed.set()
+            return 'done'
+
+        self.addCleanup(setattr, jobs, '_runner', None)
+        with mock.patch.object(jobs.JobRunner, '_new_executor', lambda runner: ThreadPoolExecutor(1)), \
+                mock.patch.object(jobs, 'run_job', fake_run_job), \
+                mock.patch.object(sys, 'argv', ['gunicorn', 'vizaur_project.wsgi']), \
+                self.assertLogs('eda_app.jobs', 'WARNING'):
+            # Redémarrage du processus web : aucun upload ne vient réveiller le runner
+            runner = jobs.autostart_runner()
+            all_executed.wait(10)
+            runner.stop()
+
+        self.assertEqual(sorted(executed), [queued.pk, running.pk])
+
+
+class RunningMomentsTests(SimpleTestCase):
+    def test_chunked_merge_matches_pandas(self):
+        values = np.random.default_rng(1).lognormal(3.0, 0.8, 10_000) + 1e6
+        moments = RunningMoments()
+        for chunk in _chunks(values, 777):
+            moments.update(chunk)
+        series = pd.Series(values)
+
+        self.assertEqual(moments.n, len(values))
+        self.assertAlmostEqual(moments.mean, series.mean(), delta=1e-9 * abs(series.mean()))
+        self.assertAlmostEqual(moments.variance, series.var(), delta=1e-8 * series.var())
+        self.assertAlmostEqual(moments.skewness, series.skew(), places=8)
+        self.assertAlmostEqual(moments.kurtosis, series.kurt(), places=8)
+        self.assertEqual((moments.min, moments.max), (series.min(), series.max()))
+
+    def test_constant_column(self):
+        moments = RunningMoments.from_values(np.full(10, 4.0))
+        self.assertEqual((moments.variance, moments.skewness, moments.kurtosis), (0.0, 0.0, 0.0))
+
+
+class KLLSketchTests(SimpleTestCase):
+    def test_exact_without_compaction(self):
+        values = np.random.default_rng(2).normal(size=300)
+        sketch = KLLSketch()
+        sketch.update(values)
+        self.assertTrue(sketch.is_exact)
+        for q in (0.0, 0.25, 0.5, 0.75, 1.0):
+            self.assertAlmostEqual(sketch.quantile(q), pd.Series(values).quantile(q), places=12)
+
+    def test_merged_quantiles_within_rank_error(self):
+        values = np.random.default_rng(3).normal(size=100_000)
+        sketch = KLLSketch()
+        for chunk in _chunks(values, 10_000):
+            part = KLLSketch()
+            part.update(chunk)
+            sketch.merge(part)
+        ordered = np.sort(values)
+
+        self.assertEqual(sketch.count, len(values))
+        for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+            rank = np.searchsorted(ordered, sketch.quantile(q)) / len(values)
+            self.assertLess(abs(rank - q), 0.01)
+
+    def test_count_below(self):
+        values = np.arange(300, dtype=np.float64)
+        sketch = KLLSketch()
+        sketch.update(values)
+        np.testing.assert_array_equal(sketch.count_below([0, 10.5, 300]), [0, 11, 300])
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def test_estimate_matches_nunique(self):
+        values = np.random.default_rng(4).integers(0, 200_000, 300_000)
+        left, right = HyperLogLog(), HyperLogLog()
+        left.update(values[:150_000])
+        right.update(values[150_000:])
+        expected = pd.Series(values).nunique()
+        self.assertLess(abs(left.merge(right).estimate() - expected) / expected, 0.03)
+
+    def test_small_cardinality(self):
+        sketch = HyperLogLog()
+        sketch.update(np.array(['a', 'b', 'c', 'a']))
+        self.assertEqual(sketch.estimate(), 3)
+
+
+class FrequentItemsTests(SimpleTestCase):
+    def test_heavy_hitters_and_mode(self):
+        rng = np.random.default_rng(5)
+        values = np.concatenate([np.repeat([7, 3, 11], [5000, 4000, 3000]), rng.integers(100, 10_000, 20_000)])
+        rng.shuffle(values)
+        sketch = FrequentItems(capacity=16)
+        for chunk in _chunks(values, 1000):
+            part = FrequentItems(capacity=16)
+            part.update(chunk)
+            sketch.merge(part)
+
+        expected = pd.Series(values).value_counts()
+        self.assertEqual([value for value, _ in sketch.most_common(3)], list(expected.index[:3]))
+        for value, count in sketch.most_common(3):
+            # Misra-Gries : comptes minorés, erreur au plus n / (capacité + 1)
+            self.assertLessEqual(count, expected[value])
+            self.assertGreaterEqual(count, expected[value] - len(values) / 17)
+        self.assertEqual(sketch.mode(), pd.Series(values).mode().iloc[0])
+
+    def test_mode_ties_like_pandas(self):
+        sketch = FrequentItems()
+        sketch.update(np.array([5, 2, 5, 2, 9]))
+        self.assertEqual(sketch.mode(), pd.Series([5, 2, 5, 2, 9]).mode().iloc[0])
+
+    def test_relabel_merges_counts(self):
+        sketch = FrequentItems()
+        sketch.update(np.array([1.0, 1.0, 2.0]))
+        sketch.relabel(lambda value: 'x')
+        self.assertEqual(sketch.most_common(), [('x', 3)])
+
+
+class StreamingProfilerTests(AnalyzedDatasetMixin, TransactionTestCase):
+    def test_chunked_profile_matches_pandas(self):
+        df = _sample_frame(rows=1000)
+        df.loc[::9, 'a'] = np.nan
+        path = self.write_file('data.csv', df.to_csv(index=False))
+        profiler = StreamingProfiler(path, chunksize=128).profile()
+
+        self.assertEqual(profiler.get_basic_info()['num_rows'], len(df))
+        self.assertEqual(profiler.get_numeric_columns(), ['a', 'b', 'd'])
+        stats = profiler.columns['a'].column_stats()
+        series = df['a']
+        self.assertEqual((stats['count'], stats['missing']), (series.count(), series.isna().sum()))
+        for name, expected in (('mean', series.mean()), ('std', series.std()),
+                               ('skewness', series.skew()), ('kurtosis', series.kurt())):
+            self.assertAlmostEqual(stats[name], expected, places=9, msg=name)
+        # Quantiles approchés (KLL) : erreur bornée sur le rang
+        self.assertLess(abs((series < stats['median']).mean() / series.notna().mean() - 0.5), 0.02)
+        self.assertEqual(profiler.get_column_stats('b')['mode'], df['b'].mode().iloc[0])
+
+        histogram = profiler.get_histogram_data('b')
+        expected_counts, _ = np.histogram(df['b'], bins=histogram['bin_edges'])
+        self.assertEqual(list(histogram['counts']), list(expected_counts))
+        bars = profiler.get_bar_chart_data('c')
+        self.assertEqual(dict(zip(bars['labels'], bars['counts'])), df['c'].value_counts().to_dict())
+
+    @override_settings(STREAMING_PROFILE_THRESHOLD=1000, STREAMING_CHUNKSIZE=500)
+    def test_views_never_load_streamed_file(self):
+        dataset = self.make_dataset(_sample_frame(rows=2000))
+        self.assertTrue(dataset.should_stream())
+
+        with mock.patch.object(data_analyzer.DatasetAnalyzer, '__init__', side_effect=AssertionError('chargé en entier')):
+            for url in ('', 'statistics/?column=b', 'distributions/columns/', 'chart/0/data/', 'chart/2/data/',
+                        'correlations/', 'correlations/heatmap/'):
+                with self.subTest(url=url):
+                    self.assertEqual(self.client.get(f'/dataset/{dataset.id}/{url}').status_code, 200)
+            chart = self.client.get(f'/dataset/{dataset.id}/chart/0/', follow=True)
+            chart.close()
+            self.assertEqual(chart.status_code, 200)
+
+            response = self.client.get(f'/dataset/{dataset.id}/correlations/?method=spearman')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.json())
+
+            # Résultat absent : 400 explicite plutôt qu'un chargement complet
+            dataset.results.filter(kind='chart_data', key='a').delete()
+            self.assertEqual(self.client.get(f'/dataset/{dataset.id}/chart/0/data/').status_code, 400)
+
+
+class CsvReaderTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+    def write(self, content, encoding='utf-8'):
+        path = os.path.join(self.tmp_dir, 'data.csv')
+        with open(path, 'w', encoding=encoding, newline='') as f:
+            f.write(content)
+        return path
+
+    def test_without_pyarrow_uses_c_engine(self):
+        path = self.write('a,b\n1,x\n2,y\n')
+        with mock.patch.object(readers, 'pyarrow_available', return_value=False):
+            self.assertEqual(readers.available_engines(), ['c'])
+            df = readers.read_csv(path, 'utf-8', engine='pyarrow')
+        pd.testing.assert_frame_equal(df, pd.read_csv(path))
+
+    def test_option_unsupported_by_pyarrow_falls_back(self):
+        path = self.write('a,b\n1,x\n2,y\n')
+        # nrows est refusé par le moteur pyarrow avant même de l'importer
+        with mock.patch.object(readers, 'pyarrow_available', return_value=True):
+            df = readers.read_csv(path, 'utf-8', engine='pyarrow', nrows=1)
+        pd.testing.assert_frame_equal(df, pd.read_csv(path, nrows=1))
+
+    def test_encoding_falls_back_when_detection_is_wrong(self):
+        path = self.write('ville,prix\n' + 'Orléans,3€\n' * 50, encoding='windows-1252')
+        with mock.patch.object(readers, 'detect_encoding', return_value='utf-8'):
+            encoding = readers.resolve_encoding(path)
+        self.assertEqual(encoding, 'windows-1252')
+        self.assertEqual(readers.read_csv(path, encoding)['ville'].iloc[0], 'Orléans')
+
+    def test_candidate_encodings_without_duplicates(self):
+        self.assertEqual(readers.candidate_encodings('UTF-8'), ['UTF-8', 'windows-1252', 'iso-8859-1'])
+        self.assertEqual(readers.candidate_encodings(None), readers.FALLBACK_ENCODINGS)
+
+
+class CorrelationMatrixTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        base = rng.normal(size=300)
+        self.df = pd.DataFrame({
+            'a': base,
+            'b': -base + rng.normal(scale=0.3, size=300),
+            'c': rng.normal(size=300),
+            'd': base * 0.5 + rng.normal(scale=1.0, size=300),
+            'constant': np.full(300, 3.0),
+            'empty': np.full(300, np.nan),
+        })
+        self.df.loc[rng.choice(300, 40, replace=False), 'c'] = np.nan
+
+    def test_blocked_pearson_matches_pandas(self):
+        with warnings.catch_warnings():
+            # Colonnes constante et vide : NaN, sans avertissement
+            warnings.simplefilter('error', RuntimeWarning)
+            matrix = pearson_matrix(self.df, block_size=2)
+        np.testing.assert_allclose(matrix, self.df.corr().to_numpy(), atol=1e-12)
+
+    def test_spearman_matches_pandas(self):
+        complete = self.df[['a', 'b', 'd']]
+        np.testing.assert_allclose(correlation_matrix(complete, 'spearman'),
+                                   complete.corr(method='spearman').to_numpy(), atol=1e-12)
+        with_missing = self.df[['a', 'c']]
+        np.testing.assert_allclose(correlation_matrix(with_missing, 'spearman'),
+                                   with_missing.corr(method='spearman').to_numpy(), atol=1e-12)
+
+    def test_rank_pairs(self):
+        columns = list(self.df.columns)
+        matrix = self.df.corr().to_numpy()
+        pairs = rank_pairs(matrix, columns, threshold=0.3)
+
+        expected = [(columns[i], columns[j], matrix[i, j]) for i in range(len(columns))
+                    for j in range(i + 1, len(columns)) if abs(matrix[i, j]) >= 0.3]
+        expected.sort(key=lambda pair: -abs(pair[2]))
+        self.assertEqual([(p['variable1'], p['variable2'], p['correlation']) for p in pairs], expected)
+        self.assertEqual(pairs[0]['direction'], 'négative')
+        self.assertEqual(len(rank_pairs(matrix, columns, threshold=0.3, top_n=1)), 1)
+
+
+class CorrelationAccumulatorTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(6)
+        base = rng.normal(size=5000)
+        self.df = pd.DataFrame({
+            'a': base * 1e3 + 1e9,
+            'b': base + rng.normal(scale=0.5, size=5000),
+            'c': rng.normal(size=5000),
+        })
+        self.df.loc[rng.choice(5000, 400, replace=False), 'b'] = np.nan
+        self.df.loc[rng.choice(5000, 400, replace=False), 'c'] = np.nan
+
+    def test_chunked_update_matches_pandas(self):
+        accumulator = CorrelationAccumulator()
+        for start in range(0, len(self.df), 600):
+            accumulator.update(self.df.iloc[start:start + 600])
+        np.testing.assert_allclose(accumulator.correlation_matrix(), self.df.corr().to_numpy(), atol=1e-10)
+
+    def test_merge_with_other_shifts_and_columns(self):
+        # Décalages différents (moyennes de chunks différents) et colonnes apparues en cours de route
+        left, right = CorrelationAccumulator(), CorrelationAccumulator()
+        left.update(self.df.iloc[:2000][['a', 'b']])
+        left.update(self.df.iloc[2000:2500])
+        right.update(self.df.iloc[2500:][['c', 'b', 'a']])
+        left.merge(right)
+
+        # Colonne absente d'un chunk : équivaut à des valeurs manquantes sur ces lignes
+        expected = self.df.copy()
+        expected.loc[:1999, 'c'] = np.nan
+        expected = expected.corr()
+        np.testing.assert_allclose(left.correlation_matrix(['a', 'b', 'c']), expected.to_numpy(), atol=1e-10)
+
+    def test_reshift_preserves_correlations(self):
+        accumulator = CorrelationAccumulator()
+        accumulator.update(self.df)
+        before = accumulator.correlation_matrix()
+        accumulator._reshift(accumulator.shift + np.array([25.0, 0.5, -0.5]))
+        np.testing.assert_allclose(accumulator.correlation_matrix(), before, atol=1e-10)
+
+
+class BenchmarkBaselineTests(SimpleTestCase):
+    def _run(self, **stages):
+        return [{'case': '1000x10-mixed', 'metrics': stages}]
+
+    def test_regressions_beyond_threshold_and_floor(self):
+        baseline = {'results': self._run(load={'seconds': 1.0, 'peak_bytes': 100 * 1024 * 1024},
+                                         profile={'seconds': 0.002})}
+        current = self._run(load={'seconds': 1.5, 'peak_bytes': 110 * 1024 * 1024},
+                            profile={'seconds': 0.004})
+
+        # load.seconds : +50 % ; peak_bytes (+10 %) et profile (+2 ms, sous le plancher) ne comptent pas
+        self.assertEqual(compare_to_baseline(current, baseline), [{
+            'case': '1000x10-mixed', 'stage': 'load', 'metric': 'seconds',
+            'baseline': 1.0, 'current': 1.5, 'ratio': 1.5,
+        }])
+
+    def test_new_cases_and_missing_metrics_are_ignored(self):
+        baseline = {'results': self._run(load={'seconds': 1.0})}
+        current = self._run(load={'peak_bytes': 10 ** 9}, correlations={'seconds': 100.0})
+        current.append({'case': 'other', 'metrics': {'load': {'seconds': 100.0}}})
+        self.assertEqual(compare_to_baseline(current, baseline), [])
+        self.assertEqual(compare_to_baseline(current, {}), [])
+
+    def test_synthetic_frame_is_reproducible(self):
+        df = synthetic_frame(100, 10, mix='mixed', missing_rate=0.1, seed=3)
+        pd.testing.assert_frame_equal(df, synthetic_frame(100, 10, mix='mixed', missing_rate=0.1, seed=3))
+        self.assertEqual(df.shape, (100, 10))
+        self.assertAlmostEqual(df.isna().to_numpy().mean(), 0.1, delta=0.05)
+
+
+class UploadDeduplicationTests(AnalyzedDatasetMixin, TestCase):
+    def upload(self, name, content):
+        with mock.patch.object(views, 'enqueue_analysis') as enqueue:
+            response = self.client.post('/upload/', {'file': SimpleUploadedFile(name, content)},
+                                        HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), enqueue
+
+    def test_identical_content_reuses_dataset(self):
+        content = 'ville;prix\nOrléans;3\nLyon;4\n'.encode('windows-1252')
+        first, enqueue = self.upload('prix.csv', content)
+        dataset = Dataset.objects.get(pk=first['dataset_id'])
+        self.assertEqual(dataset.content_hash, hashlib.sha256(content).hexdigest())
+        self.assertEqual(dataset.delimiter, ';')
+        self.assertEqual(pd.read_csv(dataset.get_full_path(), sep=';', encoding=dataset.encoding)['ville'][0], 'Orléans')
+        enqueue.assert_called_once_with(dataset)
+
+        second, enqueue = self.upload('copie.csv', content)
+        self.assertTrue(second['duplicate'])
+        self.assertEqual(second['dataset_id'], dataset.id)
+        self.assertEqual(Dataset.objects.count(), 1)
+        enqueue.assert_not_called()
+
+    def test_different_content_is_a_new_dataset(self):
+        first, _ = self.upload('a.csv', b'x,y\n1,2\n')
+        second, _ = self.upload('a.csv', b'x,y\n1,3\n')
+        self.assertNotEqual(first['dataset_id'], second['dataset_id'])
+
+    def test_missing_file_is_not_reused(self):
+        first, _ = self.upload('a.csv', b'x,y\n1,2\n')
+        os.remove(Dataset.objects.get(pk=first['dataset_id']).get_full_path())
+        second, _ = self.upload('a.csv', b'x,y\n1,2\n')
+        self.assertNotEqual(first['dataset_id'], second['dataset_id'])
+
+
+class DelimiterSniffingTests(SimpleTestCase):
+    def test_common_delimiters(self):
+        for delimiter in (',', ';', '\t', '|'):
+            text = delimiter.join(['a', 'b', 'c']) + '\n' + delimiter.join(['1', '2', 'x y']) + '\n'
+            self.assertEqual(readers.sniff_delimiter(text), delimiter, repr(delimiter))
+
+    def test_inconsistent_guess_falls_back_to_comma(self):
+        # csv.Sniffer devine ';' (champs entre guillemets séparés par ';'), qui ne découpe pas l'en-tête
+        quoted = 'id,note\n1,"a";"b"\n2,"c";"d"\n'
+        self.assertEqual(readers.sniff_delimiter(quoted), ',')
+        # Une seule colonne
+        self.assertEqual(readers.sniff_delimiter('name\nJean Dupont\nMarie Curie\n'), ',')
+
+    def test_streaming_sniffer_matches_whole_file(self):
+        text = 'ville;prix\n' + 'Orléans;3\n' * 2000
+        data = text.encode('windows-1252')
+        sniffer = readers.StreamingSniffer(header_size=1024)
+        for start in range(0, len(data), 1000):
+            sniffer.feed(data[start:start + 1000])
+        result = sniffer.finish()
+        self.assertEqual(result['delimiter'], ';')
+        self.assertEqual(data.decode(result['encoding']), text)
+
+
+class OffloadTests(SimpleTestCase):
+    def test_single_flight(self):
+        offloader = Offloader(max_workers=2)
+        self.addCleanup(offloader._executor.shutdown)
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return len(calls)
+
+        async def scenario():
+            first = asyncio.ensure_future(offloader.run(compute, key='same'))
+            second = asyncio.ensure_future(offloader.run(compute, key='same'))
+            await asyncio.sleep(0.05)
+            self.assertEqual(offloader.stats()['in_flight'], 1)
+            release.set()
+            return await asyncio.gather(first, second)
+
+        self.assertEqual(asyncio.run(scenario()), [1, 1])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(offloader.stats()['in_flight'], 0)
+
+    def test_distinct_keys_run_separately(self):
+        offloader = Offloader(max_workers=2)
+        self.addCleanup(offloader._executor.shutdown)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 'ok'
+
+        async def scenario():
+            return await asyncio.gather(offloader.run(compute, key='a'), offloader.run(compute, key='b'))
+
+        self.assertEqual(asyncio.run(scenario()), ['ok', 'ok'])
+        self.assertEqual(len(calls), 2)
+
+    def test_busy_when_queue_is_full(self):
+        offloader = Offloader(max_workers=1, max_pending=1)
+        self.addCleanup(offloader._executor.shutdown)
+        release = threading.Event()
+
+        async def scenario():
+            running = asyncio.ensure_future(offloader.run(lambda: release.wait(5), key='a'))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(OffloadBusy):
+                await offloader.run(lambda: None, key='b')
+            # Même calcul que celui en cours : partagé, donc accepté
+            joined = asyncio.ensure_future(offloader.run(lambda: None, key='a'))
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(running, joined)
+
+        self.assertEqual(asyncio.run(scenario()), [True, True])
+
+
+class NumericColumnStatsTests(SimpleTestCase):
+    def _frame(self):
+        rng = np.random.default_rng(7)
+        df = pd.DataFrame({
+            'normal': rng.normal(size=1000),
+            'ints': rng.integers(0, 5, 1000),
+            'constant': np.full(1000, 2.5),
+            'empty': np.full(1000, np.nan),
+            'few': np.r_[[1.0, 4.0], np.full(998, np.nan)],
+        })
+        df.loc[rng.choice(1000, 100, replace=False), 'normal'] = np.nan
+        return df
+
+    def _assert_matches_pandas(self, df, stats):
+        for name in df.columns:
+            series = df[name]
+            row = stats.loc[name]
+            with warnings.catch_warnings():
+                # Oracle pandas sur la colonne vide : "Mean of empty slice"
+                warnings.simplefilter('ignore', RuntimeWarning)
+                expected = self._pandas_stats(series)
+            for stat, value in expected.items():
+                with self.subTest(column=name, stat=stat):
+                    np.testing.assert_allclose(row[stat], value, rtol=1e-9, atol=1e-12)
+
+    @staticmethod
+    def _pandas_stats(series):
+        return {
+            'count': series.count(),
+            'mean': series.mean(),
+            'std': series.std(),
+            'variance': series.var(),
+            'min': series.min(),
+            'q1': series.quantile(0.25),
+            'median': series.median(),
+            'q3': series.quantile(0.75),
+            'max': series.max(),
+            'mode': series.mode().iloc[0] if series.count() else np.nan,
+            'skewness': series.skew(),
+            'kurtosis': series.kurt(),
+        }
+
+    def test_matches_pandas(self):
+        df = self._frame()
+        self._assert_matches_pandas(df, numeric_column_stats(df))
+
+    def test_batches_match_pandas(self):
+        df = self._frame()
+        with mock.patch.object(column_stats, 'BATCH_BYTES', 8 * len(df) * 2):
+            stats = numeric_column_stats(df)
+        self.assertEqual(list(stats.index), list(df.columns))
+        self._assert_matches_pandas(df, stats)
+
+
+class ExcelWorkbookTests(AnalyzedDatasetMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.sheets = {
+            'Vide': pd.DataFrame(),
+            'Ventes 2024': pd.DataFrame({'mois': range(1, 13), 'total': np.arange(12) * 1.5}),
+            'Clients': pd.DataFrame({'nom': ['a', 'b', 'c'], 'age': [31, 45, 27]}),
+        }
+        self.path = os.path.join(self.media_root, 'datasets', 'classeur.xlsx')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with pd.ExcelWriter(self.path) as writer:
+            for name, df in self.sheets.items():
+                df.to_excel(writer, sheet_name=name, index=False)
+        self.snapshot_root = os.path.join(self.media_root, 'snapshots', 'classeur')
+
+    def never_open_workbook(self):
+        return mock.patch.object(excel.pd, 'ExcelFile', side_effect=AssertionError('classeur relu'))
+
+    def test_converted_once(self):
+        sizes = excel.convert_workbook(self.path, self.snapshot_root)
+        self.assertEqual(sizes, {'Vide': 0, 'Ventes 2024': 12, 'Clients': 3})
+        self.assertEqual(excel.default_sheet(sizes), 'Ventes 2024')
+        clients = load_snapshot(excel.sheet_snapshot_dir(self.snapshot_root, 'Clients'))
+        self.assertEqual(list(clients['nom']), ['a', 'b', 'c'])
+
+        with self.never_open_workbook():
+            self.assertEqual(excel.convert_workbook(self.path, self.snapshot_root), sizes)
+            self.assertEqual(excel.workbook_sheets(self.path, self.snapshot_root), list(sizes))
+
+    def test_modified_workbook_is_reconverted(self):
+        excel.convert_workbook(self.path, self.snapshot_root)
+        with pd.ExcelWriter(self.path) as writer:
+            self.sheets['Clients'].to_excel(writer, sheet_name='Clients', index=False)
+        self.assertIsNone(excel.read_workbook_sheets(self.path, self.snapshot_root))
+        self.assertEqual(excel.convert_workbook(self.path, self.snapshot_root), {'Clients': 3})
+
+    def test_sheet_switch_never_reparses_workbook(self):
+        dataset = Dataset.objects.create(name='classeur.xlsx', file_path='datasets/classeur.xlsx',
+                                         size=os.path.getsize(self.path))
+        self.assertTrue(dataset.analyze_and_update(), dataset.error_message)
+        self.assertEqual((dataset.sheet_name, dataset.num_rows), ('Ventes 2024', 12))
+
+        with self.never_open_workbook(), mock.patch.object(views, 'enqueue_analysis') as enqueue:
+            overview = self.client.get(f'/dataset/{dataset.id}/')
+            self.assertContains(overview, 'Clients')
+            self.client.post(f'/dataset/{dataset.id}/sheet/', {'sheet_name': 'Clients'})
+            enqueue.assert_called_once()
+            dataset.refresh_from_db()
+            self.assertTrue(dataset.analyze_and_update(), dataset.error_message)
+        self.assertEqual((dataset.sheet_name, dataset.num_rows, dataset.num_columns), ('Clients', 3, 2))
+
+    def test_unknown_sheet_is_rejected(self):
+        dataset = Dataset.objects.create(name='classeur.xlsx', file_path='datasets/classeur.xlsx',
+                                         size=os.path.getsize(self.path))
+        dataset.analyze_and_update()
+        with mock.patch.object(views, 'enqueue_analysis') as enqueue:
+            self.client.post(f'/dataset/{dataset.id}/sheet/', {'sheet_name': 'Inconnue'})
+        enqueue.assert_not_called()
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.sheet_name, 'Ventes 2024')
+
+
+class ChartCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def disk_bytes(self):
+        return sum(size for _, _, size in ChartCache(self.root)._files())
+
+    def test_overwrite_counted_once(self):
+        cache = ChartCache(self.root, max_bytes=10_000)
+        cache.put(1, 'a', b'x' * 100)
+        cache.put(1, 'b', b'x' * 100)
+        cache.put(1, 'a', b'y' * 300)
+        self.assertEqual(cache.current_bytes, 400)
+        self.assertEqual(cache.current_bytes, self.disk_bytes())
+
+    def test_evicts_least_recently_used(self):
+        cache = ChartCache(self.root, max_bytes=1000)
+        for age, digest in enumerate(['first', 'second', 'third']):
+            path = cache.put(1, digest, b'x' * 300)
+            os.utime(path, (1_000_000 + age, 1_000_000 + age))
+        # Lecture : 'first' devient le plus récemment utilisé, 'second' le moins
+        self.assertIsNotNone(cache.get(1, 'first'))
+
+        cache.put(2, 'new', b'x' * 300)
+        self.assertIsNone(cache.get(1, 'second'))
+        for dataset_id, digest in ((1, 'first'), (1, 'third'), (2, 'new')):
+            self.assertIsNotNone(cache.get(dataset_id, digest))
+        # Éviction jusqu'au seuil bas (90 % du budget)
+        self.assertEqual((cache.current_bytes, cache.evictions), (900, 1))
+        self.assertEqual(cache.current_bytes, self.disk_bytes())
+
+    def test_purge(self):
+        cache = ChartCache(self.root)
+        cache.put(1, 'a', b'x' * 10)
+        cache.put(2, 'b', b'x' * 10)
+        cache.purge(1)
+        self.assertIsNone(cache.get(1, 'a'))
+        self.assertIsNotNone(cache.get(2, 'b'))
+        cache.put(2, 'c', b'x' * 10)
+        self.assertEqual(cache.current_bytes, 20)
+
+
+class ChartFileTests(AnalyzedDatasetMixin, TransactionTestCase):
+    def get_chart(self, url):
+        response = self.client.get(url)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_rendered_once_then_served_from_cache(self):
+        dataset = self.make_dataset()
+        redirect = self.client.get(f'/dataset/{dataset.id}/chart/0/')
+        self.assertEqual(redirect.status_code, 302)
+        url = redirect['Location']
+
+        first, image = self.get_chart(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('immutable', first['Cache-Control'])
+        with mock.patch.object(results, 'render_charts', side_effect=AssertionError('rendu à nouveau')):
+            second, cached = self.get_chart(url)
+        self.assertEqual((second.status_code, cached), (200, image))
+
+    def test_outdated_digest_redirects(self):
+        dataset = self.make_dataset()
+        url = self.client.get(f'/dataset/{dataset.id}/chart/0/')['Location']
+        outdated = url.rsplit('/', 1)[0] + '/0123456789abcdef.png'
+        response = self.client.get(outdated)
+        self.assertEqual((response.status_code, response['Location']), (302, url))
+
+
+class HeatmapLayoutTests(SimpleTestCase):
+    def setUp(self):
+        # Deux groupes de variables corrélées entre elles, entrelacés dans l'ordre du fichier
+        rng = np.random.default_rng(9)
+        first, second = rng.normal(size=(2, 500))
+        columns = {}
+        for i in range(3):
+            columns[f'a{i}'] = first + rng.normal(scale=0.3, size=500)
+            columns[f'b{i}'] = second + rng.normal(scale=0.3, size=500)
+        columns['bruit'] = rng.normal(size=500)
+        self.frame = pd.DataFrame(columns).corr()
+
+    def assert_grouped(self, names):
+        groups = [name[0] for name in names if name != 'bruit']
+        # Chaque groupe forme un bloc contigu
+        self.assertEqual(len([i for i in range(1, len(groups)) if groups[i] != groups[i - 1]]), 1, names)
+
+    def test_cluster_order_groups_correlated_columns(self):
+        self.assert_grouped(list(arrange_heatmap(self.frame).columns))
+
+    def test_cluster_order_without_scipy(self):
+        with mock.patch.dict(sys.modules, {'scipy.cluster': None, 'scipy.spatial.distance': None}):
+            order = cluster_order(self.frame.to_numpy())
+        self.assertEqual(sorted(order), list(range(len(self.frame))))
+        self.assert_grouped(list(self.frame.columns[order]))
+
+    def test_top_correlated_keeps_original_order(self):
+        keep = top_correlated(self.frame.to_numpy(), 6)
+        self.assertEqual(list(self.frame.columns[keep]), ['a0', 'b0', 'a1', 'b1', 'a2', 'b2'])
+        arranged = arrange_heatmap(self.frame, max_columns=2, order='original')
+        self.assertEqual(arranged.shape, (2, 2))
+        self.assertEqual(list(arranged.index), list(arranged.columns))
+
+    def test_unknown_order(self):
+        with self.assertRaises(ValueError):
+            arrange_heatmap(self.frame, order='alphabetical')
+
+
+@override_settings(HEATMAP_TILE_SIZE=2)
+class HeatmapViewTests(AnalyzedDatasetMixin, TransactionTestCase):
+    def get_image(self, url):
+        response = self.client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        response.close()
+        return response
+
+    def test_manifest_tiles_cover_lower_triangle(self):
+        dataset = self.make_dataset()
+        manifest = self.client.get(f'/dataset/{dataset.id}/correlations/heatmap/?order=original').json()
+        self.assertEqual(manifest['columns'], ['a', 'b', 'd'])
+        self.assertEqual(manifest['grid'], 2)
+        self.assertEqual([(tile['row'], tile['col']) for tile in manifest['tiles']], [(0, 0), (1, 0), (1, 1)])
+        self.assertEqual(manifest['tiles'][1]['rows'], [2, 3])
+
+        for url in [tile['url'] for tile in manifest['tiles']] + [manifest['overview_url']]:
+            response = self.get_image(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response['Content-Type'], manifest['image_type'])
+        self.assertEqual(self.get_image(f'/dataset/{dataset.id}/correlations/heatmap/5/0/').status_code, 404)
+
+    def test_overview_revalidates_and_depends_on_top(self):
+        dataset = self.make_dataset()
+        url = f'/dataset/{dataset.id}/correlations/heatmap/overview/'
+        etag = self.get_image(url)['ETag']
+        self.assertNotEqual(self.get_image(url + '?top=2')['ETag'], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_invalid_arguments(self):
+        dataset = self.make_dataset()
+        self.assertEqual(self.client.get(f'/dataset/{dataset.id}/correlations/heatmap/?order=x').status_code, 400)
+        self.assertEqual(
+            self.client.get(f'/dataset/{dataset.id}/correlations/heatmap/overview/?top=abc').status_code, 400)
@@ -0,0 +1,35 @@
+"""
+Réception des fichiers uploadés : écriture sur disque par morceaux, avec
+calcul de l'empreinte du contenu et détection de l'encodage et du séparateur
+des CSV pendant le transfert.
+"""
+import hashlib
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+from .utils.readers import StreamingSniffer
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Comme TemporaryFileUploadHandler (fichier temporaire, jamais en mémoire),
+    en calculant au passage le SHA-256 du contenu. Le fichier reçu porte
+    `content_hash` et, pour un CSV, `sniffed` ({'encoding', 'delimiter'}).
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+        self.sniffer = StreamingSniffer() if self.file_name.lower().endswith('.csv') else None
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        if self.sniffer is not None:
+            self.sniffer.feed(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.content_hash = self.hasher.hexdigest()
+        file.sniffed = self.sniffer.finish() if self.sniffer is not None else None
+        return file
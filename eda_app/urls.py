@@ -7,9 +7,28 @@ urlpatterns = [
     path('datasets/', views.dataset_list, name='dataset_list'),
     path('dataset/<int:dataset_id>/', views.dataset_overview, name='dataset_overview'),
     path('dataset/<int:dataset_id>/delete/', views.delete_dataset, name='delete_dataset'),
+    path('dataset/<int:dataset_id>/progress/', views.dataset_progress, name='dataset_progress'),
+    path('dataset/<int:dataset_id>/sheet/', views.select_sheet, name='select_sheet'),
     
     # URLs pour les vues AJAX des onglets
     path('dataset/<int:dataset_id>/statistics/', views.dataset_statistics, name='dataset_statistics'),
     path('dataset/<int:dataset_id>/distributions/', views.dataset_distributions, name='dataset_distributions'),
     path('dataset/<int:dataset_id>/correlations/', views.dataset_correlations, name='dataset_correlations'),
+    
+    # Heatmap des grandes matrices : manifeste, image d'ensemble et blocs rendus à la demande
+    path('dataset/<int:dataset_id>/correlations/heatmap/', views.dataset_correlation_heatmap, name='dataset_correlation_heatmap'),
+    path('dataset/<int:dataset_id>/correlations/heatmap/overview/', views.dataset_correlation_heatmap_overview, name='dataset_correlation_heatmap_overview'),
+    path('dataset/<int:dataset_id>/correlations/heatmap/<int:row>/<int:col>/', views.dataset_correlation_heatmap_tile, name='dataset_correlation_heatmap_tile'),
+    
+    # Onglet Distributions paginé : manifeste des colonnes + données (JSON) ou PNG par colonne
+    path('dataset/<int:dataset_id>/distributions/columns/', views.dataset_distribution_columns, name='dataset_distribution_columns'),
+    # Même pagination, en flux NDJSON : une ligne par colonne dès qu'elle est prête
+    path('dataset/<int:dataset_id>/distributions/stream/', views.dataset_distributions_stream, name='dataset_distributions_stream'),
+    path('dataset/<int:dataset_id>/chart/<int:column_index>/', views.dataset_column_chart, name='dataset_column_chart'),
+    path('dataset/<int:dataset_id>/chart/<int:column_index>/<slug:digest>.<slug:extension>', views.dataset_column_chart_file, name='dataset_column_chart_file'),
+    path('dataset/<int:dataset_id>/chart/<int:column_index>/data/', views.dataset_column_chart_data, name='dataset_column_chart_data'),
+    
+    # Supervision
+    path('cache/stats/', views.analyzer_cache_stats, name='analyzer_cache_stats'),
+    path('metrics/', views.metrics, name='metrics'),
 ]
\ No newline at end of file
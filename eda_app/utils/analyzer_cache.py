@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .metrics import REGISTRY, record_cache_lookup
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512MB
+
+
+class AnalyzerCache:
+    """
+    Cache LRU en mémoire des DatasetAnalyzer chargés, propre au processus.
+
+    Les entrées sont indexées par (id du dataset, mtime, taille du fichier) :
+    un fichier modifié donne une nouvelle clé, l'ancienne finit évincée.
+    L'éviction se fait au poids (memory_usage(deep=True) du DataFrame) par
+    rapport à un budget en octets, et non au nombre d'entrées.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def measure(analyzer):
+        if analyzer.df is None:
+            return 0
+        return int(analyzer.df.memory_usage(deep=True).sum())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            record_cache_lookup('analyzer', entry is not None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, analyzer):
+        size = self.measure(analyzer)
+        if size > self.max_bytes:
+            # Plus gros que le budget entier : on ne le garde pas
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (analyzer, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        analyzer = self.get(key)
+        if analyzer is None:
+            analyzer = loader()
+            self.put(key, analyzer)
+        return analyzer
+
+    def invalidate(self, dataset_id):
+        """Retire toutes les entrées d'un dataset, quelle que soit l'empreinte du fichier"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == dataset_id]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analyzer_cache():
+    """Retourne le cache du processus, créé à la demande avec le budget des settings"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnalyzerCache(getattr(settings, 'ANALYZER_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    return _cache
+
+
+def _cache_gauges():
+    stats = get_analyzer_cache().stats()
+    return [({'measure': 'entries'}, stats['entries']), ({'measure': 'bytes'}, stats['current_bytes']),
+            ({'measure': 'max_bytes'}, stats['max_bytes'])]
+
+
+REGISTRY.gauge('vizaur_analyzer_cache', "Occupation du cache des analyseurs du processus", _cache_gauges)
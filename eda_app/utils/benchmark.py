@@ -0,0 +1,101 @@
+"""
+Outils du banc d'essai de performance (commande `manage.py benchmark_analyzer`).
+
+Génère des datasets synthétiques reproductibles (lignes x colonnes x
+mélange de types x taux de valeurs manquantes), mesure durée et pic
+mémoire d'une étape, et compare des résultats à une référence.
+"""
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+
+DTYPE_MIXES = {
+    # Proportions (numérique, catégoriel, texte) des colonnes générées
+    'numeric': (1.0, 0.0, 0.0),
+    'mixed': (0.5, 0.3, 0.2),
+    'text': (0.2, 0.4, 0.4),
+}
+
+
+def synthetic_frame(rows, columns, mix='mixed', missing_rate=0.0, seed=0):
+    """DataFrame synthétique reproductible ; une colonne sur deux numériques est corrélée à la première"""
+    rng = np.random.default_rng(seed)
+    numeric_share, categorical_share, _ = DTYPE_MIXES[mix]
+    num_numeric = max(int(round(columns * numeric_share)), 1 if numeric_share else 0)
+    num_categorical = int(round(columns * categorical_share))
+    num_text = max(columns - num_numeric - num_categorical, 0)
+
+    data = {}
+    base = rng.normal(size=rows)
+    for i in range(num_numeric):
+        if i % 3 == 2:
+            data[f'num_{i}'] = rng.integers(0, 1000, rows)
+        elif i % 2:
+            data[f'num_{i}'] = base * rng.uniform(0.5, 2) + rng.normal(size=rows)
+        else:
+            data[f'num_{i}'] = rng.lognormal(2, 1, rows)
+    for i in range(num_categorical):
+        choices = np.array([f'cat{i}_{v}' for v in range(int(rng.integers(3, 12)))])
+        data[f'cat_{i}'] = rng.choice(choices, rows)
+    for i in range(num_text):
+        data[f'txt_{i}'] = np.char.add(f't{i}_', rng.integers(0, rows * 10, rows).astype(str))
+
+    df = pd.DataFrame(data)
+    if missing_rate:
+        mask = rng.random(df.shape) < missing_rate
+        df = df.mask(mask)
+    return df
+
+
+def measure(func, repeat=1, memory=True):
+    """
+    Exécute `func` et retourne (résultat, mesures) : meilleur temps sur
+    `repeat` exécutions, puis pic mémoire Python (tracemalloc) d'une exécution
+    séparée pour ne pas fausser le chronométrage.
+    """
+    seconds = []
+    result = None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - start)
+
+    metrics = {'seconds': round(min(seconds), 6)}
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            metrics['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, metrics
+
+
+def compare_to_baseline(results, baseline, threshold=0.25, min_seconds=0.01, min_bytes=1024 * 1024):
+    """
+    Liste des régressions : mesures dépassant la référence de plus de
+    `threshold` (fraction), au-delà d'un plancher absolu qui absorbe le bruit.
+    """
+    reference = {(case['case'], stage): metrics
+                 for case in baseline.get('results', [])
+                 for stage, metrics in case['metrics'].items()}
+    regressions = []
+    for case in results:
+        for stage, metrics in case['metrics'].items():
+            previous = reference.get((case['case'], stage))
+            if previous is None:
+                continue
+            for key, floor in (('seconds', min_seconds), ('peak_bytes', min_bytes)):
+                if key not in metrics or key not in previous:
+                    continue
+                old, new = previous[key], metrics[key]
+                if new > old * (1 + threshold) and new - old > floor:
+                    regressions.append({
+                        'case': case['case'], 'stage': stage, 'metric': key,
+                        'baseline': old, 'current': new,
+                        'ratio': round(new / old, 3) if old else None,
+                    })
+    return regressions
@@ -0,0 +1,144 @@
+"""
+Cache disque des graphiques rendus, partagé par tous les processus.
+
+Un fichier par graphique, `<racine>/<id du dataset>/<empreinte>.<format>` :
+l'empreinte couvre tout ce dont dépend l'image (fichier source, colonne,
+type de graphique, classes, dpi, thème...). Une image en cache ne change
+donc jamais et peut être servie avec des en-têtes de cache permanents.
+
+La taille totale est bornée (CHART_CACHE_MAX_BYTES) : au-delà, les fichiers
+les moins récemment servis (date de modification, rafraîchie à chaque
+lecture) sont supprimés.
+"""
+import logging
+import os
+import shutil
+import threading
+
+from django.conf import settings
+
+from .metrics import REGISTRY, record_cache_lookup
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256MB
+# Après une éviction, l'occupation redescend à cette fraction du budget
+LOW_WATERMARK = 0.9
+
+
+class ChartCache:
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Occupation connue de ce processus (None : à mesurer) ; recalculée à chaque éviction
+        self.current_bytes = None
+        self.evictions = 0
+
+    def path(self, dataset_id, digest, extension='png'):
+        return os.path.join(self.root, str(dataset_id), f'{digest}.{extension}')
+
+    def get(self, dataset_id, digest, extension='png'):
+        """Chemin du graphique s'il est en cache (et marqué comme récemment utilisé), sinon None"""
+        path = self.path(dataset_id, digest, extension)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            record_cache_lookup('chart', False)
+            return None
+        record_cache_lookup('chart', True)
+        return path
+
+    def put(self, dataset_id, digest, image, extension='png'):
+        """Enregistre un graphique (écriture atomique) et retourne son chemin"""
+        path = self.path(dataset_id, digest, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+        with open(tmp_path, 'wb') as f:
+            f.write(image)
+        try:
+            # Réécriture d'une empreinte déjà en cache : l'ancien fichier ne compte plus
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self.current_bytes is None:
+                self.current_bytes = sum(size for _, _, size in self._files())
+            else:
+                self.current_bytes += len(image) - replaced
+            if self.current_bytes > self.max_bytes:
+                self._evict()
+        return path
+
+    def _files(self):
+        """(date d'utilisation, chemin, taille) de chaque graphique en cache"""
+        if not os.path.isdir(self.root):
+            return []
+        files = []
+        for directory in os.scandir(self.root):
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                if '.tmp-' not in entry.name:
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, entry.path, stat.st_size))
+        return files
+
+    def _evict(self):
+        files = sorted(self._files())
+        total = sum(size for _, _, size in files)
+        target = self.max_bytes * LOW_WATERMARK
+        for _, path, size in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self.current_bytes = total
+
+    def purge(self, dataset_id):
+        """Supprime tous les graphiques d'un dataset"""
+        shutil.rmtree(os.path.join(self.root, str(dataset_id)), ignore_errors=True)
+        with self._lock:
+            self.current_bytes = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_chart_cache():
+    """Cache des graphiques, créé à la demande avec le répertoire et le budget des settings"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                root = getattr(settings, 'CHART_CACHE_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'charts')
+                _cache = ChartCache(root, getattr(settings, 'CHART_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    return _cache
+
+
+def _cache_gauges():
+    if _cache is None or _cache.current_bytes is None:
+        return []
+    return [({'measure': 'bytes'}, _cache.current_bytes), ({'measure': 'max_bytes'}, _cache.max_bytes)]
+
+
+REGISTRY.gauge('vizaur_chart_cache', "Occupation du cache disque des graphiques (vue de ce processus)", _cache_gauges)
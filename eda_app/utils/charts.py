@@ -0,0 +1,347 @@
+"""
+Rendu des graphiques (matplotlib) à partir des valeurs ou des comptages d'une colonne.
+
+Les fonctions de rendu ne dépendent ni de Django ni du DataFrame complet :
+elles peuvent tourner dans un pool de processus, chaque worker ne recevant
+que les données de sa colonne. Elles utilisent l'API objet de matplotlib
+(Figure + FigureCanvasAgg), sans l'état global de pyplot : le rendu est
+thread-safe, et chaque thread (ou worker) réutilise ses figures d'un
+graphique à l'autre. Les marges sont fixes par type de graphique : pas de
+tight_layout ni de bbox_inches='tight', qui dessinent la figure une fois de
+plus pour la mesurer.
+"""
+import base64
+import contextlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+import matplotlib.style
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .metrics import timed
+
+
+# Paramètres dont dépend l'image rendue : ils font partie de la clé du cache des graphiques
+CHART_DPI = 150
+CHART_THEME = 'default'
+HISTOGRAM_BINS = 30
+MAX_CATEGORIES = 20
+# Formats de sortie et leur type MIME
+CHART_FORMATS = {'png': 'image/png', 'webp': 'image/webp', 'svg': 'image/svg+xml'}
+DEFAULT_FORMAT = 'png'
+# Au-delà de ce nombre de colonnes, les valeurs ne sont plus écrites dans les cases de la heatmap
+HEATMAP_ANNOTATION_MAX_COLUMNS = 15
+# ... ni les noms des colonnes sur les axes
+HEATMAP_LABEL_MAX_COLUMNS = 80
+# Heatmap en une image : colonnes les plus corrélées gardées au plus
+HEATMAP_MAX_COLUMNS = 50
+# Côté (en colonnes) des blocs servis pour explorer une grande matrice
+HEATMAP_TILE_SIZE = 40
+# Libellés d'axe plus longs tronqués : ils doivent tenir dans les marges fixes
+MAX_LABEL_LENGTH = 24
+
+# Taille (pouces) et marges (fractions de la figure) de chaque type de graphique
+LAYOUTS = {
+    'histogram': ((10, 6), {'left': 0.09, 'right': 0.97, 'bottom': 0.1, 'top': 0.92}),
+    'bar_chart': ((12, 6), {'left': 0.08, 'right': 0.98, 'bottom': 0.3, 'top': 0.92}),
+    'heatmap': ((10, 8), {'left': 0.2, 'right': 0.98, 'bottom': 0.2, 'top': 0.94}),
+    'heatmap_tile': ((9, 8), {'left': 0.18, 'right': 0.98, 'bottom': 0.2, 'top': 0.98}),
+}
+
+# Options d'encodage : PNG peu compressé (rendu plus rapide), WebP sans perte (graphiques à aplats)
+ENCODER_OPTIONS = {
+    'png': {'pil_kwargs': {'compress_level': 3}},
+    'webp': {'pil_kwargs': {'lossless': True, 'quality': 80, 'method': 2}},
+    'svg': {},
+}
+
+_local = threading.local()
+# Les thèmes autres que celui par défaut modifient les rcParams globaux le temps du rendu
+_theme_lock = threading.Lock()
+
+
+def chart_parameters(chart_type, dpi=CHART_DPI, image_format=DEFAULT_FORMAT):
+    """Paramètres de rendu d'un type de graphique (classes ou catégories, dpi, format, thème)"""
+    parameters = {'dpi': dpi, 'format': image_format, 'theme': CHART_THEME}
+    if chart_type == 'histogram':
+        parameters['bins'] = HISTOGRAM_BINS
+    else:
+        parameters['max_categories'] = MAX_CATEGORIES
+    return parameters
+
+
+def _axes(chart_type):
+    """Axes d'une figure propre au thread courant (une par type de graphique), vidée et remise en page"""
+    figures = getattr(_local, 'figures', None)
+    if figures is None:
+        figures = _local.figures = {}
+    figsize, margins = LAYOUTS[chart_type]
+    fig = figures.get(chart_type)
+    if fig is None:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        figures[chart_type] = fig
+    else:
+        fig.clear()
+    fig.subplots_adjust(**margins)
+    return fig, fig.add_subplot()
+
+
+def _short(label):
+    label = str(label)
+    return label if len(label) <= MAX_LABEL_LENGTH else label[:MAX_LABEL_LENGTH - 1] + '…'
+
+
+@contextlib.contextmanager
+def _theme(theme=CHART_THEME):
+    if theme == 'default':
+        yield
+        return
+    with _theme_lock, matplotlib.style.context(theme):
+        yield
+
+
+def _encode(fig, dpi=CHART_DPI, image_format=DEFAULT_FORMAT):
+    if image_format not in CHART_FORMATS:
+        raise ValueError(f"Format d'image non supporté: {image_format}")
+    buffer = BytesIO()
+    with timed('image_encode', format=image_format):
+        fig.savefig(buffer, format=image_format, dpi=dpi, **ENCODER_OPTIONS[image_format])
+    return buffer.getvalue()
+
+
+def to_base64(image):
+    """Encode une image (octets) en base64 pour l'intégrer dans du HTML/JSON"""
+    if image is None:
+        return None
+    return base64.b64encode(image).decode()
+
+
+def render_histogram(column_name, data, dpi=CHART_DPI, image_format=DEFAULT_FORMAT):
+    """
+    Histogramme (avec KDE), à partir des données de sampling.histogram_data :
+    comptages exacts par classe, courbe de densité éventuellement estimée sur un échantillon.
+    """
+    if not data:
+        return None
+
+    with _theme():
+        fig, ax = _axes('histogram')
+
+        edges = np.asarray(data['bin_edges'])
+        ax.bar(edges[:-1], data['counts'], width=np.diff(edges), align='edge',
+               alpha=0.7, edgecolor='white', linewidth=0.5)
+        if data['kde']:
+            ax.plot(data['kde']['x'], data['kde']['y'], linewidth=2)
+
+        ax.set_title(f'Distribution de {column_name}', fontsize=14, fontweight='bold')
+        ax.set_xlabel(_short(column_name), fontsize=12)
+        ax.set_ylabel('Fréquence', fontsize=12)
+        ax.grid(True, alpha=0.3)
+        if data['sampled']:
+            ax.text(0.99, 0.98, f"Densité estimée sur un échantillon de {data['sample_size']:,} valeurs".replace(',', ' '),
+                    transform=ax.transAxes, ha='right', va='top', fontsize=9, color='gray')
+
+        return _encode(fig, dpi, image_format)
+
+
+def bar_chart_data(values, max_categories=MAX_CATEGORIES):
+    """Comptages des catégories les plus fréquentes ; les suivantes sont regroupées dans 'Autres'"""
+    if len(values) == 0:
+        return None
+
+    value_counts = pd.Series(values).value_counts()
+    labels = [str(label) for label in value_counts.index[:max_categories]]
+    counts = value_counts.iloc[:max_categories].tolist()
+
+    # Limiter le nombre de catégories pour la lisibilité
+    if len(value_counts) > max_categories:
+        labels = labels[:max_categories - 1] + ['Autres']
+        counts = counts[:max_categories - 1] + [int(value_counts.iloc[max_categories - 1:].sum())]
+
+    return {
+        'labels': labels,
+        'counts': [int(count) for count in counts],
+        'num_categories': len(value_counts),
+        'total': int(value_counts.sum()),
+    }
+
+
+def render_bar_chart(column_name, values, max_categories=MAX_CATEGORIES, dpi=CHART_DPI, image_format=DEFAULT_FORMAT):
+    """Graphique en barres des valeurs non manquantes d'une colonne catégorielle"""
+    return render_bar_chart_data(column_name, bar_chart_data(values, max_categories=max_categories),
+                                 dpi=dpi, image_format=image_format)
+
+
+def render_bar_chart_data(column_name, data, dpi=CHART_DPI, image_format=DEFAULT_FORMAT):
+    """Graphique en barres à partir de comptages déjà calculés (voir bar_chart_data)"""
+    if data is None:
+        return None
+
+    counts = data['counts']
+    with _theme():
+        fig, ax = _axes('bar_chart')
+
+        # Graphique en barres
+        bars = ax.bar(range(len(counts)), counts, alpha=0.7, color='skyblue')
+
+        # Personnalisation
+        ax.set_title(f'Distribution de {column_name}', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Catégories', fontsize=12)
+        ax.set_ylabel('Fréquence', fontsize=12)
+        ax.set_xticks(range(len(counts)))
+        ax.set_xticklabels([_short(label) for label in data['labels']], rotation=45, ha='right')
+        ax.grid(True, alpha=0.3, axis='y')
+
+        # Valeurs au-dessus des barres
+        ax.bar_label(bars, labels=[str(count) for count in counts], padding=2, fontsize=10)
+
+        return _encode(fig, dpi, image_format)
+
+
+def _draw_heatmap(fig, ax, values, row_labels, col_labels, annotate):
+    """
+    Cases d'une heatmap (NaN : case vide) avec barre de couleurs. Avec
+    `annotate`, cases séparées et valeurs écrites ; sinon une seule image
+    matricielle (une case par pixel de données), sans texte par case.
+    """
+    rows, cols = values.shape
+    if annotate:
+        cells = ax.pcolormesh(np.ma.masked_invalid(values), cmap='coolwarm', vmin=-1, vmax=1,
+                              edgecolors='white', linewidth=0.5)
+        ax.invert_yaxis()
+    else:
+        cells = ax.imshow(values, cmap='coolwarm', vmin=-1, vmax=1, interpolation='nearest',
+                          extent=(0, cols, rows, 0), rasterized=True)
+    fig.colorbar(cells, ax=ax, shrink=0.8)
+    ax.set_aspect('equal')
+
+    if max(rows, cols) <= HEATMAP_LABEL_MAX_COLUMNS:
+        fontsize = 10 if max(rows, cols) <= 30 else 6
+        ax.set_xticks(np.arange(cols) + 0.5, labels=[_short(name) for name in col_labels], rotation=90,
+                      fontsize=fontsize)
+        ax.set_yticks(np.arange(rows) + 0.5, labels=[_short(name) for name in row_labels], fontsize=fontsize)
+    else:
+        ax.set_xticks([])
+        ax.set_yticks([])
+    ax.tick_params(length=0)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    if annotate:
+        for (i, j), value in np.ndenumerate(values):
+            if np.isfinite(value):
+                ax.text(j + 0.5, i + 0.5, f'{value:.2f}', ha='center', va='center', fontsize=9,
+                        color='white' if abs(value) > 0.6 else 'black')
+
+
+def render_heatmap(matrix, annotate_max_columns=HEATMAP_ANNOTATION_MAX_COLUMNS, dpi=CHART_DPI,
+                   image_format=DEFAULT_FORMAT):
+    """
+    Heatmap (triangle inférieur) d'une matrice de corrélations (DataFrame carré).
+    Les valeurs ne sont écrites dans les cases que jusqu'à `annotate_max_columns`
+    colonnes ; au-delà les cases sont rendues en image matricielle.
+    """
+    if matrix is None or matrix.empty:
+        return None
+
+    size = len(matrix)
+    values = matrix.to_numpy(dtype=float, copy=True)
+    values[np.triu_indices(size)] = np.nan
+    with _theme():
+        fig, ax = _axes('heatmap')
+        _draw_heatmap(fig, ax, values, matrix.index, matrix.columns, annotate=size <= annotate_max_columns)
+        ax.set_title('Matrice de Corrélations', fontsize=14, fontweight='bold')
+        return _encode(fig, dpi, image_format)
+
+
+def render_heatmap_tile(block, annotate_max_columns=HEATMAP_ANNOTATION_MAX_COLUMNS, dpi=CHART_DPI,
+                        image_format=DEFAULT_FORMAT):
+    """Bloc rectangulaire (DataFrame lignes x colonnes) d'une matrice de corrélations, toutes ses cases"""
+    if block is None or block.empty:
+        return None
+
+    values = block.to_numpy(dtype=float)
+    with _theme():
+        fig, ax = _axes('heatmap_tile')
+        _draw_heatmap(fig, ax, values, block.index, block.columns,
+                      annotate=max(values.shape) <= annotate_max_columns)
+        return _encode(fig, dpi, image_format)
+
+
+CHART_RENDERERS = {
+    'histogram': render_histogram,
+    'bar_chart': render_bar_chart,
+    'bar_chart_data': render_bar_chart_data,
+}
+
+
+def render_chart(kind, column_name, data, options=None):
+    return CHART_RENDERERS[kind](column_name, data, **(options or {}))
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_chart_pool(workers):
+    """Pool de processus de rendu, partagé par le processus et créé à la demande"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def _reset_chart_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+
+def render_charts(tasks, workers=0):
+    """
+    Rend une liste de graphiques (kind, column_name, données, options) : données
+    d'histogramme pour 'histogram', valeurs de la colonne pour 'bar_chart',
+    comptages (bar_chart_data) pour 'bar_chart_data'.
+
+    Avec workers > 1 le rendu est réparti sur un pool de processus, sinon il
+    est fait en série dans le processus courant. Retourne, dans l'ordre des
+    tâches, une liste de couples (image PNG, exception).
+    """
+    if workers and workers > 1 and len(tasks) > 1:
+        try:
+            pool = get_chart_pool(workers)
+            futures = [pool.submit(render_chart, *task) for task in tasks]
+            results = []
+            for future in futures:
+                try:
+                    results.append((future.result(), None))
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    results.append((None, e))
+            return results
+        except BrokenProcessPool:
+            # Pool inutilisable : on le recrée au prochain appel et on rend en série
+            _reset_chart_pool()
+
+    results = []
+    for task in tasks:
+        try:
+            results.append((render_chart(*task), None))
+        except Exception as e:
+            results.append((None, e))
+    return results
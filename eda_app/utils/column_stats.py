@@ -0,0 +1,109 @@
+"""
+Statistiques des colonnes numériques en une passe par colonne, pour toutes
+les colonnes à la fois.
+
+Les colonnes sont converties en une matrice float64 (NaN pour les manquants)
+et triées une seule fois le long des lignes : minimum, maximum, quartiles et
+médiane se lisent dans la colonne triée, et le mode se déduit des plages de
+valeurs égales (ce que fait np.unique, sans second tri). Moyenne, variance,
+asymétrie et aplatissement viennent d'une seule passe sur les écarts à la
+moyenne. Les formules sont celles de pandas (variance ddof=1, skew et
+kurtosis corrigés du biais).
+
+La matrice est traitée par blocs de colonnes pour borner la mémoire.
+"""
+import numpy as np
+import pandas as pd
+
+
+BATCH_BYTES = 64 * 1024 * 1024
+QUANTILES = (0.25, 0.5, 0.75)
+# Somme des écarts au carré sous ce seuil : skew et kurtosis nuls (colonne constante, comme pandas)
+ZERO_TOLERANCE = 1e-14
+
+
+def _quantiles(sorted_values, counts, q):
+    """Quantile q (interpolation linéaire) de chaque colonne, triée avec ses NaN en fin"""
+    position = np.maximum(counts - 1, 0) * q
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+    fraction = position - lower
+    low = np.take_along_axis(sorted_values, lower[np.newaxis, :], axis=0)[0]
+    high = np.take_along_axis(sorted_values, upper[np.newaxis, :], axis=0)[0]
+    return low + (high - low) * fraction
+
+
+def _modes(sorted_values, counts):
+    """Plus petite des valeurs les plus fréquentes de chaque colonne (mode().iloc[0] de pandas)"""
+    modes = np.full(sorted_values.shape[1], np.nan)
+    for j, count in enumerate(counts):
+        if count == 0:
+            continue
+        values = sorted_values[:count, j]
+        starts = np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+        lengths = np.diff(np.append(starts, count))
+        modes[j] = values[starts[np.argmax(lengths)]]
+    return modes
+
+
+def _moments(sorted_values, counts):
+    """Moyenne, variance (ddof=1), skew et kurtosis de chaque colonne, en une passe sur les écarts"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n = counts.astype(np.float64)
+        mean = np.nansum(sorted_values, axis=0) / n
+        deviations = sorted_values - mean
+        squared = deviations * deviations
+        m2 = np.nansum(squared, axis=0)
+        m3 = np.nansum(squared * deviations, axis=0)
+        m4 = np.nansum(squared * squared, axis=0)
+
+        variance = np.where(n > 1, m2 / (n - 1), np.nan)
+        m2 = np.where(m2 < ZERO_TOLERANCE, 0.0, m2)
+        skewness = np.where(m2 == 0, 0.0, n * np.sqrt(n - 1) / (n - 2) * m3 / m2 ** 1.5)
+        skewness = np.where(n >= 3, skewness, np.nan)
+        kurtosis = np.where(
+            m2 == 0, 0.0,
+            n * (n + 1) * (n - 1) * m4 / ((n - 2) * (n - 3) * m2 ** 2) - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)),
+        )
+        kurtosis = np.where(n >= 4, kurtosis, np.nan)
+    return mean, variance, skewness, kurtosis
+
+
+def _batch_stats(df):
+    values = df.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    if values.shape[0] == 0:
+        values = np.full((1, values.shape[1]), np.nan)
+    values.sort(axis=0)  # NaN en fin de colonne
+    counts = values.shape[0] - np.isnan(values).sum(axis=0)
+    last = np.maximum(counts - 1, 0)[np.newaxis, :]
+
+    mean, variance, skewness, kurtosis = _moments(values, counts)
+    q1, median, q3 = (_quantiles(values, counts, q) for q in QUANTILES)
+    empty = counts == 0
+    return pd.DataFrame({
+        'count': counts,
+        'mean': mean,
+        'std': np.sqrt(variance),
+        'variance': variance,
+        'min': np.where(empty, np.nan, values[0]),
+        'q1': np.where(empty, np.nan, q1),
+        'median': np.where(empty, np.nan, median),
+        'q3': np.where(empty, np.nan, q3),
+        'max': np.where(empty, np.nan, np.take_along_axis(values, last, axis=0)[0]),
+        'mode': _modes(values, counts),
+        'skewness': skewness,
+        'kurtosis': kurtosis,
+    }, index=df.columns)
+
+
+def numeric_column_stats(df):
+    """
+    Statistiques de toutes les colonnes (numériques) de `df`, une ligne par
+    colonne : count, mean, std, variance, min, q1, median, q3, max, mode,
+    skewness, kurtosis.
+    """
+    if df.shape[1] == 0:
+        return _batch_stats(df)
+    per_batch = max(1, BATCH_BYTES // max(1, 8 * len(df)))
+    batches = [_batch_stats(df.iloc[:, start:start + per_batch]) for start in range(0, df.shape[1], per_batch)]
+    return pd.concat(batches) if len(batches) > 1 else batches[0]
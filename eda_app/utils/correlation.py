@@ -0,0 +1,279 @@
+"""
+Matrices de corrélation et classement des paires, en NumPy.
+
+Pearson est calculé par blocs de colonnes avec des produits matriciels
+masqués : chaque paire utilise les lignes où les deux colonnes sont
+renseignées (mêmes règles que DataFrame.corr), sans jamais construire la
+matrice complète en objets pandas. Spearman sans valeur manquante revient
+à Pearson sur les rangs ; avec valeurs manquantes (rangs recalculés par
+paire) et pour Kendall, le calcul est délégué à pandas.
+
+CorrelationAccumulator cumule les mêmes sommes chunk par chunk, pour les
+fichiers profilés en streaming.
+
+Pour les heatmaps des jeux de données larges, cluster_order rapproche les
+variables corrélées entre elles et top_correlated ne garde que les colonnes
+les plus corrélées.
+"""
+import copy
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+METHODS = ('pearson', 'spearman', 'kendall')
+DEFAULT_BLOCK_SIZE = 256
+# Ordres des colonnes d'une heatmap : classification hiérarchique ou ordre du fichier
+ORDERS = ('cluster', 'original')
+# Au-delà, l'ordre optimal des feuilles (coût cubique) n'est plus calculé
+OPTIMAL_ORDERING_MAX_COLUMNS = 500
+
+
+def _nanmean(values):
+    """Moyenne de chaque colonne hors NaN (NaN pour une colonne vide, sans RuntimeWarning)"""
+    if not len(values):
+        return np.zeros(values.shape[1])
+    with warnings.catch_warnings():
+        # "Mean of empty slice" pour les colonnes entièrement manquantes
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmean(values, axis=0)
+
+
+def _block_arrays(df, columns):
+    values = df.iloc[:, columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    mask = ~np.isnan(values)
+    # Centrage par la moyenne de chaque colonne : limite les pertes de précision des sommes
+    means = _nanmean(values)
+    centered = np.where(mask, values - np.nan_to_num(means), 0.0)
+    return centered, mask.astype(np.float64)
+
+
+def _pearson_from_sums(n, sum_a, sum_b, sum_aa, sum_bb, sum_ab):
+    """Corrélations à partir des effectifs et sommes (centrées) appariés par paire"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sum_ab - sum_a * sum_b / n
+        var_a = sum_aa - sum_a * sum_a / n
+        var_b = sum_bb - sum_b * sum_b / n
+        corr = cov / np.sqrt(var_a * var_b)
+    corr[(n < 2) | (var_a <= 0) | (var_b <= 0)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _unit_diagonal(matrix):
+    # Une colonne non constante est parfaitement corrélée à elle-même
+    diagonal = np.diag(matrix).copy()
+    diagonal[~np.isnan(diagonal)] = 1.0
+    np.fill_diagonal(matrix, diagonal)
+    return matrix
+
+
+def pearson_matrix(df, block_size=DEFAULT_BLOCK_SIZE):
+    """Matrice de Pearson (ndarray k x k) des colonnes de df, en données appariées par paire"""
+    k = df.shape[1]
+    result = np.full((k, k), np.nan)
+    blocks = [np.arange(start, min(start + block_size, k)) for start in range(0, k, block_size)]
+
+    for bi, rows in enumerate(blocks):
+        xa, ma = _block_arrays(df, rows)
+        for cols in blocks[bi:]:
+            xb, mb = (xa, ma) if cols is rows else _block_arrays(df, cols)
+            corr = _pearson_from_sums(
+                ma.T @ mb, xa.T @ mb, ma.T @ xb, (xa * xa).T @ mb, ma.T @ (xb * xb), xa.T @ xb,
+            )
+            result[np.ix_(rows, cols)] = corr
+            result[np.ix_(cols, rows)] = corr.T
+
+    return _unit_diagonal(result)
+
+
+class CorrelationAccumulator:
+    """
+    Corrélations de Pearson calculées par morceaux, en mémoire O(k²) quel que
+    soit le nombre de lignes, et fusionnables entre processus.
+
+    Pour chaque paire de colonnes (i, j) on cumule, sur les lignes où les deux
+    sont renseignées : l'effectif, les sommes et sommes des carrés de x_i, et
+    les produits croisés. Les valeurs sont décalées d'une constante par colonne
+    (la moyenne du premier chunk) pour éviter les pertes de précision.
+    """
+
+    def __init__(self):
+        self.columns = []
+        self.shift = np.empty(0)
+        self.n = np.zeros((0, 0))
+        self.sums = np.zeros((0, 0))      # sums[i, j] = somme de (x_i - shift_i) sur les lignes (i, j)
+        self.squares = np.zeros((0, 0))   # squares[i, j] = somme de (x_i - shift_i)²
+        self.products = np.zeros((0, 0))  # products[i, j] = somme de (x_i - shift_i)(x_j - shift_j)
+
+    MATRICES = ('n', 'sums', 'squares', 'products')
+
+    def _add_columns(self, names, shifts):
+        grow = len(names)
+        if not grow:
+            return
+        self.columns = self.columns + list(names)
+        self.shift = np.concatenate([self.shift, shifts])
+        for attr in self.MATRICES:
+            setattr(self, attr, np.pad(getattr(self, attr), ((0, grow), (0, grow))))
+
+    def update(self, numeric_df):
+        if numeric_df.shape[1] == 0 or len(numeric_df) == 0:
+            return
+        values = numeric_df.to_numpy(dtype=np.float64, na_value=np.nan)
+        names = list(numeric_df.columns)
+
+        new = [i for i, name in enumerate(names) if name not in self.columns]
+        if new:
+            shifts = np.nan_to_num(_nanmean(values[:, new]))
+            self._add_columns([names[i] for i in new], shifts)
+
+        positions = np.array([self.columns.index(name) for name in names])
+        mask = ~np.isnan(values)
+        x = np.where(mask, values - self.shift[positions], 0.0)
+        m = mask.astype(np.float64)
+
+        grid = np.ix_(positions, positions)
+        self.n[grid] += m.T @ m
+        self.sums[grid] += x.T @ m
+        self.squares[grid] += (x * x).T @ m
+        self.products[grid] += x.T @ x
+
+    def _reshift(self, shift):
+        """Ramène les sommes à un autre décalage (nécessaire pour fusionner)"""
+        delta = (shift - self.shift)[:, None]
+        delta_t = delta.T
+        self.products = self.products - delta_t * self.sums - delta * self.sums.T + self.n * delta * delta_t
+        self.squares = self.squares - 2 * delta * self.sums + self.n * delta * delta
+        self.sums = self.sums - self.n * delta
+        self.shift = shift.copy()
+
+    def merge(self, other):
+        missing = [name for name in other.columns if name not in self.columns]
+        self._add_columns(missing, other.shift[[other.columns.index(name) for name in missing]])
+
+        positions = np.array([self.columns.index(name) for name in other.columns], dtype=np.int64)
+        if len(positions) == 0:
+            return self
+        aligned = copy.deepcopy(other)
+        aligned._reshift(self.shift[positions])
+
+        grid = np.ix_(positions, positions)
+        for attr in self.MATRICES:
+            getattr(self, attr)[grid] += getattr(aligned, attr)
+        return self
+
+    def correlation_matrix(self, columns=None):
+        """Matrice de Pearson (ndarray) des colonnes demandées (toutes par défaut)"""
+        columns = self.columns if columns is None else list(columns)
+        positions = np.array([self.columns.index(name) for name in columns], dtype=np.int64)
+        grid = np.ix_(positions, positions)
+        n, sums, squares = self.n[grid], self.sums[grid], self.squares[grid]
+        return _unit_diagonal(_pearson_from_sums(n, sums, sums.T, squares, squares.T, self.products[grid]))
+
+
+def correlation_matrix(numeric_df, method='pearson', block_size=DEFAULT_BLOCK_SIZE):
+    """Matrice de corrélation (ndarray) selon `method` : 'pearson', 'spearman' ou 'kendall'"""
+    if method not in METHODS:
+        raise ValueError(f"Méthode de corrélation inconnue: {method}")
+
+    if method == 'pearson':
+        return pearson_matrix(numeric_df, block_size=block_size)
+    if method == 'spearman' and not numeric_df.isna().to_numpy().any():
+        ranks = numeric_df.rank(method='average')
+        return pearson_matrix(ranks, block_size=block_size)
+    return numeric_df.corr(method=method).to_numpy()
+
+
+def rank_pairs(matrix, columns, threshold=0.5, top_n=None):
+    """
+    Paires (triangle supérieur) dont |corrélation| >= threshold, triées par
+    valeur absolue décroissante (ordre des colonnes conservé à égalité).
+    """
+    rows, cols = np.triu_indices(len(columns), k=1)
+    values = matrix[rows, cols]
+    with np.errstate(invalid='ignore'):
+        selected = np.flatnonzero(np.abs(values) >= threshold)
+    order = selected[np.argsort(-np.abs(values[selected]), kind='stable')]
+    if top_n is not None:
+        order = order[:top_n]
+
+    pairs = []
+    for index in order:
+        value = float(values[index])
+        strength = abs(value)
+        pairs.append({
+            'variable1': columns[rows[index]],
+            'variable2': columns[cols[index]],
+            'correlation': value,
+            'strength': 'forte' if strength >= 0.7 else 'modérée' if strength >= 0.5 else 'faible',
+            'direction': 'positive' if value > 0 else 'négative',
+        })
+    return pairs
+
+
+def matrix_to_frame(matrix, columns):
+    return pd.DataFrame(matrix, index=columns, columns=columns)
+
+
+def _similarity(matrix):
+    """|corrélation| symétrique, corrélations manquantes à 0 et diagonale à 1"""
+    similarity = np.abs(np.nan_to_num(np.asarray(matrix, dtype=np.float64)))
+    similarity = (similarity + similarity.T) / 2
+    np.fill_diagonal(similarity, 1.0)
+    return similarity
+
+
+def cluster_order(matrix):
+    """
+    Permutation des colonnes qui regroupe les variables corrélées entre elles.
+
+    Classification hiérarchique (lien moyen, distance 1 - |r|) avec ordre
+    optimal des feuilles si SciPy est installé ; sinon, sériation spectrale
+    (tri selon le vecteur de Fiedler du laplacien de |r|).
+    """
+    size = len(matrix)
+    if size < 3:
+        return np.arange(size)
+    similarity = _similarity(matrix)
+
+    try:
+        from scipy.cluster import hierarchy
+        from scipy.spatial.distance import squareform
+    except ImportError:
+        laplacian = np.diag(similarity.sum(axis=1)) - similarity
+        _, vectors = np.linalg.eigh(laplacian)
+        return np.argsort(vectors[:, 1], kind='stable')
+
+    distances = squareform(np.clip(1.0 - similarity, 0.0, None), checks=False)
+    linkage = hierarchy.linkage(distances, method='average')
+    if size <= OPTIMAL_ORDERING_MAX_COLUMNS:
+        linkage = hierarchy.optimal_leaf_ordering(linkage, distances)
+    return hierarchy.leaves_list(linkage)
+
+
+def top_correlated(matrix, n):
+    """Indices (ordre d'origine) des n colonnes ayant la plus forte |corrélation| avec une autre colonne"""
+    size = len(matrix)
+    if n is None or size <= n:
+        return np.arange(size)
+    similarity = _similarity(matrix)
+    np.fill_diagonal(similarity, 0.0)
+    strongest = similarity.max(axis=1)
+    return np.sort(np.argsort(-strongest, kind='stable')[:max(n, 0)])
+
+
+def arrange_heatmap(frame, max_columns=None, order='cluster'):
+    """
+    Matrice de corrélations (DataFrame carré) prête pour une heatmap : réduite
+    aux `max_columns` colonnes les plus corrélées, puis réordonnée.
+    """
+    if order not in ORDERS:
+        raise ValueError(f"Ordre de heatmap inconnu: {order}")
+    if frame is None or frame.empty:
+        return frame
+    values = frame.to_numpy(dtype=np.float64)
+    keep = top_correlated(values, max_columns)
+    if order == 'cluster':
+        keep = keep[cluster_order(values[np.ix_(keep, keep)])]
+    return frame.iloc[keep, keep]
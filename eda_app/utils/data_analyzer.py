@@ -1,71 +1,147 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import matplotlib
-matplotlib.use('Agg')  # Backend non-interactif
-import matplotlib.pyplot as plt
-import seaborn as sns
-import base64
-from io import BytesIO
-import chardet
+import logging
+import os
 
+from .correlation import arrange_heatmap, correlation_matrix, matrix_to_frame, rank_pairs
+from .charts import (
+    DEFAULT_FORMAT, HEATMAP_MAX_COLUMNS, HISTOGRAM_BINS, MAX_CATEGORIES, bar_chart_data, render_bar_chart,
+    render_heatmap, render_histogram, to_base64,
+)
+from .column_stats import numeric_column_stats
+from .excel import is_excel_file, read_sheet
+from .profiling import READ_SAMPLE_ROWS, estimate_distinct, infer_read_dtypes, optimize_dtypes
+from .metrics import BYTES_LOADED, ROWS_PROCESSED, timed
+from .readers import detect_encoding, read_csv, resolve_encoding
+from .sampling import histogram_data, load_or_create_sample_index
+from .snapshot import is_snapshot_fresh, load_snapshot, snapshot_bytes, write_snapshot
+
+
+logger = logging.getLogger(__name__)
+
+
+# Version des résultats produits : l'incrémenter invalide les résultats persistés
+ANALYZER_VERSION = 4
 
 
 class DatasetAnalyzer:
-    def __init__(self, file_path):
+    def __init__(self, file_path, snapshot_dir=None, optimize_dtypes=True, arrow_strings=False, columns=None,
+                 encoding=None, delimiter=None, sheet_name=None, engine=None, sample_size=None):
         self.file_path = file_path
+        self.snapshot_dir = snapshot_dir
+        # Taille de l'échantillon des visuels coûteux (KDE) ; None = toutes les lignes
+        self.sample_size = sample_size
+        self._sample_index = None
+        # Matrices de corrélation déjà calculées, par méthode : (colonnes, ndarray arrondi)
+        self._correlations = {}
+        # Statistiques de toutes les colonnes numériques, calculées ensemble au premier besoin
+        self._numeric_stats = None
+        # Encodage déjà validé (mémorisé sur le Dataset) : aucune détection à refaire
+        self.encoding = encoding
+        # Séparateur des CSV (None : virgule)
+        self.delimiter = delimiter
+        # Feuille d'un classeur Excel (None : la première)
+        self.sheet_name = sheet_name
+        self.engine = engine
+        self.optimize_dtypes = optimize_dtypes
+        self.arrow_strings = arrow_strings
+        # Projection : seules ces colonnes sont chargées (None = toutes)
+        self.columns = list(columns) if columns is not None else None
+        self.loaded_from_snapshot = False
         self.df = None
         self.load_data()
     
     def load_data(self):
+        # Snapshot colonnaire à jour : pas de re-parsing du fichier brut
+        if self.snapshot_dir and is_snapshot_fresh(self.snapshot_dir, self.file_path):
+            try:
+                with timed('snapshot_load', path=self.snapshot_dir) as timer:
+                    self.df = load_snapshot(self.snapshot_dir, columns=self.columns)
+                    timer.fields.update(rows=len(self.df), columns=self.df.shape[1])
+                BYTES_LOADED.inc(snapshot_bytes(self.snapshot_dir, columns=self.columns), source='snapshot')
+                ROWS_PROCESSED.inc(len(self.df), source='snapshot')
+                self.loaded_from_snapshot = True
+                return
+            except Exception as e:
+                logger.warning("Snapshot illisible, rechargement du fichier brut: %s", e,
+                               extra={'path': self.snapshot_dir})
+        
+        self.load_raw_data()
+    
+    def load_raw_data(self):
         try:
-            if self.file_path.endswith('.csv'):                
-                # Lire un échantillon du fichier pour détecter l'encodage
-                with open(self.file_path, 'rb') as f:
-                    raw_data = f.read(10000)  # Lire les premiers 10KB
-                    detected = chardet.detect(raw_data)
-                    encoding = detected['encoding'] if detected['confidence'] > 0.7 else 'utf-8'
-                
-                try:
-                    self.df = pd.read_csv(self.file_path, encoding=encoding)
-                    print(f"Fichier chargé avec l'encodage détecté: {encoding}")
-                except:
-                    # Fallback avec les encodages courants
-                    encodings = ['utf-8', 'iso-8859-1', 'windows-1252', 'cp1252']
-                    for enc in encodings:
-                        try:
-                            self.df = pd.read_csv(self.file_path, encoding=enc)
-                            print(f"Fichier chargé avec l'encodage de secours: {enc}")
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                    else:
-                        self.df = pd.read_csv(self.file_path, encoding='utf-8', errors='replace')
+            if self.file_path.endswith('.csv'):
+                # Encodage validé sur tout le fichier avant la lecture : une seule passe de parsing
+                if not self.encoding:
+                    with timed('encoding'):
+                        self.encoding = resolve_encoding(self.file_path)
+                with timed('parse', path=self.file_path) as timer:
+                    self.df = self._read_csv(self.encoding)
+                    timer.fields.update(rows=len(self.df), columns=self.df.shape[1])
                         
-            elif self.file_path.endswith(('.xls', '.xlsx')):
-                self.df = pd.read_excel(self.file_path)
+            elif is_excel_file(self.file_path):
+                # Normalement inutile : le classeur est converti en snapshots par feuille à l'analyse
+                with timed('parse', path=self.file_path) as timer:
+                    self.df = read_sheet(self.file_path, self.sheet_name or 0, columns=self.columns)
+                    timer.fields.update(rows=len(self.df), columns=self.df.shape[1])
                 
         except Exception as e:
             raise Exception(f"Erreur lors du chargement du fichier: {str(e)}")
 
+        if self.df is not None:
+            BYTES_LOADED.inc(os.path.getsize(self.file_path), source='raw')
+            ROWS_PROCESSED.inc(len(self.df), source='raw')
+
+        # Types compacts dès le chargement : le snapshot et le cache en profitent
+        if self.optimize_dtypes and self.df is not None:
+            with timed('optimize_dtypes'):
+                self.df = optimize_dtypes(self.df, arrow_strings=self.arrow_strings)
+
+    def _read_csv(self, encoding, **options):
+        if self.columns is not None:
+            options['usecols'] = self.columns
+        if self.delimiter:
+            options['sep'] = self.delimiter
+        if self.optimize_dtypes:
+            # Passe d'échantillonnage : types compacts connus avant la lecture complète
+            sample = read_csv(self.file_path, encoding, engine='c', nrows=READ_SAMPLE_ROWS, **options)
+            dtype, parse_dates = infer_read_dtypes(sample)
+            options.update(dtype=dtype, parse_dates=parse_dates)
+        return read_csv(self.file_path, encoding, engine=self.engine, **options)
+
+    def save_snapshot(self):
+        """Écrit le snapshot colonnaire du DataFrame chargé (jamais pour une projection partielle)"""
+        if not self.snapshot_dir or self.df is None or self.columns is not None:
+            return False
+        with timed('snapshot_write', path=self.snapshot_dir):
+            write_snapshot(self.df, self.snapshot_dir, self.file_path)
+        return True
+
+    @timed('detect_types')
     def detect_column_types(self):
+        num_rows = len(self.df)
+        # Valeurs manquantes de toutes les colonnes en une seule passe
+        missing_counts = self.df.isna().sum().to_numpy()
+
         column_info = {}
-        for col in self.df.columns:
-            dtype = str(self.df[col].dtype)
-            if dtype in ['int64', 'float64']:
+        for i, col in enumerate(self.df.columns):
+            series = self.df.iloc[:, i]
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
                 col_type = 'numérique'
-            elif pd.api.types.is_datetime64_any_dtype(self.df[col]):
+            elif pd.api.types.is_datetime64_any_dtype(series):
                 col_type = 'date'
-            elif self.df[col].nunique() / len(self.df) < 0.05 and len(self.df) > 20:
+            elif num_rows > 20 and estimate_distinct(series) / num_rows < 0.05:
                 col_type = 'catégoriel'
             else:
                 col_type = 'texte'
             
+            missing = int(missing_counts[i])
             column_info[col] = {
                 'type': col_type,
-                'dtype': dtype,
-                'missing_count': self.df[col].isnull().sum(),
-                'missing_percent': round((self.df[col].isnull().sum() / len(self.df)) * 100, 2)
+                'dtype': str(series.dtype),
+                'missing_count': missing,
+                'missing_percent': round((missing / num_rows) * 100, 2) if num_rows else 0.0
             }
         
         return column_info
@@ -88,34 +164,25 @@ class DatasetAnalyzer:
         """Retourne la liste des colonnes numériques"""
         return self.df.select_dtypes(include=[np.number]).columns.tolist()
 
+    @timed('column_stats')
+    def get_numeric_stats(self):
+        """Statistiques de toutes les colonnes numériques (une ligne par colonne), calculées une seule fois"""
+        if self._numeric_stats is None:
+            self._numeric_stats = numeric_column_stats(self.df.select_dtypes(include=[np.number]))
+        return self._numeric_stats
+
+    @timed('describe')
     def get_descriptive_stats(self):
         """Calcule les statistiques descriptives pour toutes les colonnes numériques"""
-        numeric_df = self.df.select_dtypes(include=[np.number])
-        if numeric_df.empty:
+        if not self.get_numeric_columns():
             return None
         
         try:
-            stats = numeric_df.describe()
-            
-            # Ajouter quelques stats supplémentaires avec gestion d'erreur
-            try:
-                stats.loc['variance'] = numeric_df.var()
-            except:
-                stats.loc['variance'] = pd.Series([None] * len(numeric_df.columns), index=numeric_df.columns)
-            
-            try:
-                stats.loc['skewness'] = numeric_df.skew()
-            except:
-                stats.loc['skewness'] = pd.Series([None] * len(numeric_df.columns), index=numeric_df.columns)
-            
-            try:
-                stats.loc['kurtosis'] = numeric_df.kurtosis()
-            except:
-                stats.loc['kurtosis'] = pd.Series([None] * len(numeric_df.columns), index=numeric_df.columns)
-            
-            return stats.round(3)
+            stats = self.get_numeric_stats().rename(columns={'q1': '25%', 'median': '50%', 'q3': '75%'})
+            rows = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max', 'variance', 'skewness', 'kurtosis']
+            return stats[rows].T.astype(float).round(3)
         except Exception as e:
-            print(f"Erreur dans get_descriptive_stats: {e}")
+            logger.exception("Erreur dans get_descriptive_stats")
             return None
 
     def get_column_stats(self, column_name):
@@ -127,78 +194,68 @@ class DatasetAnalyzer:
         if not pd.api.types.is_numeric_dtype(col_data):
             return None
         
-        # Supprimer les valeurs manquantes pour les calculs
-        clean_data = col_data.dropna()
-        
-        if len(clean_data) == 0:
-            return None
-        
         try:
+            row = self.get_numeric_stats().loc[column_name]
+            if row['count'] == 0:
+                return None
+            
+            # Les valeurs lues dans la colonne gardent son type (entier ou flottant)
+            as_value = int if pd.api.types.is_integer_dtype(col_data) else float
             stats = {
-                'count': len(clean_data),
-                'missing': col_data.isnull().sum(),
-                'mean': clean_data.mean(),
-                'median': clean_data.median(),
-                'mode': clean_data.mode().iloc[0] if not clean_data.mode().empty else None,
-                'std': clean_data.std(),
-                'variance': clean_data.var(),
-                'min': clean_data.min(),
-                'max': clean_data.max(),
-                'q1': clean_data.quantile(0.25),
-                'q3': clean_data.quantile(0.75),
-                'iqr': clean_data.quantile(0.75) - clean_data.quantile(0.25),
-                'range': clean_data.max() - clean_data.min()
+                'count': int(row['count']),
+                'missing': len(col_data) - int(row['count']),
+                'mean': row['mean'],
+                'median': row['median'],
+                'mode': as_value(row['mode']),
+                'std': row['std'],
+                'variance': row['variance'],
+                'min': as_value(row['min']),
+                'max': as_value(row['max']),
+                'q1': row['q1'],
+                'q3': row['q3'],
+                'iqr': row['q3'] - row['q1'],
+                'range': as_value(row['max'] - row['min']),
+                'skewness': row['skewness'],
+                'kurtosis': row['kurtosis'],
             }
-            
-            # Ajouter skewness et kurtosis avec gestion d'erreur
-            try:
-                stats['skewness'] = clean_data.skew()
-            except:
-                stats['skewness'] = None
-                
-            try:
-                stats['kurtosis'] = clean_data.kurtosis()
-            except:
-                stats['kurtosis'] = None
-            
-            return {k: round(v, 3) if isinstance(v, (int, float)) and v is not None else v for k, v in stats.items()}
+            return {k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()}
             
         except Exception as e:
-            print(f"Erreur dans get_column_stats pour {column_name}: {e}")
+            logger.exception("Erreur dans get_column_stats pour %s", column_name)
             return None
 
-    def generate_histogram(self, column_name, bins=30):
-        """Génère un histogramme pour une colonne numérique"""
+    def get_sample_index(self):
+        """Lignes de l'échantillon du dataset, tirées une fois puis relues depuis le snapshot (None = toutes)"""
+        if self._sample_index is None and self.sample_size:
+            sample_dir = self.snapshot_dir if self.snapshot_dir and is_snapshot_fresh(self.snapshot_dir, self.file_path) else None
+            self._sample_index = load_or_create_sample_index(len(self.df), self.sample_size, sample_dir)
+        return self._sample_index
+
+    @timed('histogram')
+    def get_histogram_data(self, column_name, bins=HISTOGRAM_BINS):
+        """Comptages exacts (colonne complète) et courbe KDE (sur l'échantillon) d'une colonne numérique"""
         if column_name not in self.df.columns:
             return None
         
-        col_data = self.df[column_name].dropna()
-        if not pd.api.types.is_numeric_dtype(col_data) or len(col_data) == 0:
+        col_data = self.df[column_name]
+        if not pd.api.types.is_numeric_dtype(col_data):
             return None
         
-        plt.style.use('default')
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        # Histogramme avec seaborn pour un meilleur style
-        sns.histplot(data=col_data, bins=bins, kde=True, ax=ax, alpha=0.7)
-        
-        ax.set_title(f'Distribution de {column_name}', fontsize=14, fontweight='bold')
-        ax.set_xlabel(column_name, fontsize=12)
-        ax.set_ylabel('Fréquence', fontsize=12)
-        ax.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        
-        # Convertir en base64
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close(fig)
+        values = col_data.dropna().to_numpy()
+        index = self.get_sample_index()
+        sample = col_data.iloc[index].dropna().to_numpy() if index is not None else None
+        return histogram_data(values, bins=bins, sample=sample)
+
+    def generate_histogram(self, column_name, bins=HISTOGRAM_BINS):
+        """Génère un histogramme pour une colonne numérique"""
+        data = self.get_histogram_data(column_name, bins=bins)
+        if data is None:
+            return None
         
-        return image_base64
+        with timed('render'):
+            return to_base64(render_histogram(column_name, data))
 
-    def generate_bar_chart(self, column_name, max_categories=20):
+    def generate_bar_chart(self, column_name, max_categories=MAX_CATEGORIES):
         """Génère un graphique en barres pour une colonne catégorielle"""
         if column_name not in self.df.columns:
             return None
@@ -207,107 +264,66 @@ class DatasetAnalyzer:
         if len(col_data) == 0:
             return None
         
-        # Compter les occurrences
-        value_counts = col_data.value_counts()
-        
-        # Limiter le nombre de catégories pour la lisibilité
-        if len(value_counts) > max_categories:
-            top_values = value_counts.head(max_categories - 1)
-            other_count = value_counts.iloc[max_categories - 1:].sum()
-            value_counts = pd.concat([top_values, pd.Series({'Autres': other_count})])
-        
-        plt.style.use('default')
-        fig, ax = plt.subplots(figsize=(12, 6))
-        
-        # Graphique en barres
-        bars = ax.bar(range(len(value_counts)), value_counts.values, alpha=0.7, color='skyblue')
-        
-        # Personnalisation
-        ax.set_title(f'Distribution de {column_name}', fontsize=14, fontweight='bold')
-        ax.set_xlabel('Catégories', fontsize=12)
-        ax.set_ylabel('Fréquence', fontsize=12)
-        ax.set_xticks(range(len(value_counts)))
-        ax.set_xticklabels(value_counts.index, rotation=45, ha='right')
-        ax.grid(True, alpha=0.3, axis='y')
-        
-        # Ajouter les valeurs sur les barres
-        for i, bar in enumerate(bars):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                   f'{int(height)}', ha='center', va='bottom', fontsize=10)
-        
-        plt.tight_layout()
-        
-        # Convertir en base64
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close(fig)
-        
-        return image_base64
+        with timed('render'):
+            return to_base64(render_bar_chart(column_name, col_data.to_numpy(), max_categories=max_categories))
+
+    def get_chart_values(self, column_name):
+        """Valeurs non manquantes d'une colonne, à transmettre à un worker de rendu"""
+        return self.df[column_name].dropna().to_numpy()
+
+    def get_bar_chart_data(self, column_name, max_categories=MAX_CATEGORIES):
+        """Comptages des catégories les plus fréquentes d'une colonne (graphique dessiné côté client)"""
+        if column_name not in self.df.columns:
+            return None
+        return bar_chart_data(self.get_chart_values(column_name), max_categories=max_categories)
+
+    def get_chart_data(self, chart_type, column_name):
+        """Données à transmettre au rendu d'un graphique (voir charts.CHART_RENDERERS)"""
+        if chart_type == 'histogram':
+            return self.get_histogram_data(column_name)
+        return self.get_chart_values(column_name)
+
+    def get_sample_info(self, column_name):
+        """Indique si les visuels d'une colonne sont estimés sur un échantillon, et sa taille"""
+        index = self.get_sample_index()
+        col_data = self.df[column_name]
+        if index is None:
+            return {'sampled': False, 'sample_size': int(col_data.notna().sum())}
+        return {'sampled': True, 'sample_size': int(col_data.iloc[index].notna().sum())}
 
-    def get_correlation_matrix(self):
+    def _correlations_for(self, method='pearson'):
+        """Matrice de corrélation calculée une seule fois par méthode, puis réutilisée"""
+        if method not in self._correlations:
+            numeric_df = self.df.select_dtypes(include=[np.number])
+            if numeric_df.shape[1] < 2:
+                self._correlations[method] = None
+            else:
+                with timed('correlations', method=method, columns=numeric_df.shape[1]):
+                    matrix = correlation_matrix(numeric_df, method=method).round(3)
+                self._correlations[method] = (numeric_df.columns.tolist(), matrix)
+        return self._correlations[method]
+
+    def get_correlation_matrix(self, method='pearson'):
         """Calcule la matrice de corrélations pour les colonnes numériques"""
-        numeric_df = self.df.select_dtypes(include=[np.number])
-        if numeric_df.empty or numeric_df.shape[1] < 2:
+        correlations = self._correlations_for(method)
+        if correlations is None:
             return None
         
-        # Calculer la matrice de corrélations
-        corr_matrix = numeric_df.corr()
-        
-        return corr_matrix.round(3)
+        columns, matrix = correlations
+        return matrix_to_frame(matrix, columns)
 
-    def get_correlation_pairs(self, threshold=0.5):
+    def get_correlation_pairs(self, threshold=0.5, method='pearson', top_n=None):
         """Retourne les paires de variables avec une corrélation significative"""
-        corr_matrix = self.get_correlation_matrix()
-        if corr_matrix is None:
+        correlations = self._correlations_for(method)
+        if correlations is None:
             return []
         
-        # Créer une liste de paires avec leurs corrélations
-        pairs = []
-        for i in range(len(corr_matrix.columns)):
-            for j in range(i+1, len(corr_matrix.columns)):
-                col1 = corr_matrix.columns[i]
-                col2 = corr_matrix.columns[j]
-                corr_value = corr_matrix.iloc[i, j]
-                
-                if abs(corr_value) >= threshold:
-                    pairs.append({
-                        'variable1': col1,
-                        'variable2': col2,
-                        'correlation': corr_value,
-                        'strength': 'forte' if abs(corr_value) >= 0.7 else 'modérée' if abs(corr_value) >= 0.5 else 'faible',
-                        'direction': 'positive' if corr_value > 0 else 'négative'
-                    })
-        
-        # Trier par valeur absolue de corrélation décroissante
-        pairs.sort(key=lambda x: abs(x['correlation']), reverse=True)
-        
-        return pairs
+        # Triées par valeur absolue de corrélation décroissante
+        columns, matrix = correlations
+        return rank_pairs(matrix, columns, threshold=threshold, top_n=top_n)
 
-    def generate_correlation_heatmap(self):
-        """Génère une heatmap des corrélations"""
-        corr_matrix = self.get_correlation_matrix()
-        if corr_matrix is None:
-            return None
-        
-        plt.style.use('default')
-        fig, ax = plt.subplots(figsize=(10, 8))
-        
-        # Heatmap avec seaborn
-        mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
-        sns.heatmap(corr_matrix, mask=mask, annot=True, cmap='coolwarm', center=0,
-                   square=True, linewidths=0.5, cbar_kws={"shrink": .8}, ax=ax)
-        
-        ax.set_title('Matrice de Corrélations', fontsize=14, fontweight='bold')
-        plt.tight_layout()
-        
-        # Convertir en base64
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close(fig)
-        
-        return image_base64
\ No newline at end of file
+    @timed('heatmap')
+    def generate_correlation_heatmap(self, image_format=DEFAULT_FORMAT, max_columns=HEATMAP_MAX_COLUMNS, order='cluster'):
+        """Génère une heatmap des corrélations (colonnes les plus corrélées, regroupées par classification)"""
+        matrix = arrange_heatmap(self.get_correlation_matrix(), max_columns=max_columns, order=order)
+        return to_base64(render_heatmap(matrix, image_format=image_format))
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""
+Import des classeurs Excel : conversion unique de toutes les feuilles en
+snapshots colonnaires.
+
+Le classeur est ouvert une seule fois (calamine si python-calamine est
+installé, sinon openpyxl en lecture seule, qui lit les lignes en flux sans
+construire le modèle objet complet) et chaque feuille est écrite dans son
+propre snapshot. La liste des feuilles est enregistrée à côté (manifeste
+du classeur) : changer de feuille ou afficher la liste relit ensuite des
+snapshots et ce manifeste, jamais le classeur.
+"""
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+
+import pandas as pd
+
+from .metrics import BYTES_LOADED, ROWS_PROCESSED, timed
+from .profiling import optimize_dtypes
+from .snapshot import file_fingerprint, is_snapshot_fresh, read_manifest, write_snapshot
+
+
+logger = logging.getLogger(__name__)
+
+SHEETS_DIR = 'sheets'
+WORKBOOK_MANIFEST_NAME = 'workbook.json'
+
+
+def is_excel_file(file_path):
+    return file_path.lower().endswith(('.xls', '.xlsx'))
+
+
+def excel_engine(file_path):
+    """Lecteur le plus rapide disponible pour ce classeur (None : choix de pandas)"""
+    if importlib.util.find_spec('python_calamine') is not None:
+        return 'calamine'
+    return 'openpyxl' if file_path.lower().endswith('.xlsx') else None
+
+
+def list_sheets(file_path):
+    """Noms des feuilles du classeur, dans l'ordre (sans lire les cellules)"""
+    with pd.ExcelFile(file_path, engine=excel_engine(file_path)) as workbook:
+        return [str(name) for name in workbook.sheet_names]
+
+
+def sheet_snapshot_dir(snapshot_root, sheet_name):
+    """Répertoire du snapshot d'une feuille (nom lisible + empreinte : deux feuilles ne se confondent pas)"""
+    slug = re.sub(r'[^A-Za-z0-9_-]+', '_', sheet_name).strip('_')[:40] or 'sheet'
+    digest = hashlib.sha1(sheet_name.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(snapshot_root, SHEETS_DIR, f'{slug}-{digest}')
+
+
+def _workbook_manifest_path(snapshot_root):
+    return os.path.join(snapshot_root, SHEETS_DIR, WORKBOOK_MANIFEST_NAME)
+
+
+def read_workbook_sheets(file_path, snapshot_root):
+    """{nom de feuille: nombre de lignes} enregistré par convert_workbook, ou None s'il manque ou date d'un autre fichier"""
+    try:
+        with open(_workbook_manifest_path(snapshot_root), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('source') != file_fingerprint(file_path):
+            return None
+    except (OSError, ValueError):
+        return None
+    return {name: rows for name, rows in manifest['sheets']}
+
+
+def _write_workbook_sheets(file_path, snapshot_root, sizes):
+    path = _workbook_manifest_path(snapshot_root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        # Liste de paires : l'ordre des feuilles est conservé
+        json.dump({'source': file_fingerprint(file_path), 'sheets': list(sizes.items())}, f)
+    os.replace(tmp_path, path)
+
+
+def workbook_sheets(file_path, snapshot_root):
+    """Noms des feuilles : depuis le manifeste du classeur, ou en ouvrant le classeur s'il n'a pas encore été converti"""
+    sizes = read_workbook_sheets(file_path, snapshot_root)
+    return list(sizes) if sizes is not None else list_sheets(file_path)
+
+
+def read_sheet(file_path, sheet_name=0, columns=None):
+    """Une feuille du classeur en DataFrame (sans snapshot)"""
+    return pd.read_excel(file_path, sheet_name=sheet_name, usecols=columns, engine=excel_engine(file_path))
+
+
+def convert_workbook(file_path, snapshot_root, optimize=True, arrow_strings=False):
+    """
+    Écrit le snapshot de chaque feuille qui n'en a pas de frais, en une seule
+    ouverture du classeur. Retourne {nom de feuille: nombre de lignes}, dans
+    l'ordre du classeur. Si toutes les feuilles sont déjà à jour, le classeur
+    n'est pas ouvert.
+    """
+    sizes = read_workbook_sheets(file_path, snapshot_root)
+    if sizes is not None and all(is_snapshot_fresh(sheet_snapshot_dir(snapshot_root, name), file_path)
+                                 for name in sizes):
+        return sizes
+
+    sizes = {}
+    parsed = 0
+    with pd.ExcelFile(file_path, engine=excel_engine(file_path)) as workbook:
+        for name in workbook.sheet_names:
+            sheet_name = str(name)
+            snapshot_dir = sheet_snapshot_dir(snapshot_root, sheet_name)
+            if is_snapshot_fresh(snapshot_dir, file_path):
+                sizes[sheet_name] = read_manifest(snapshot_dir)['num_rows']
+                continue
+
+            with timed('parse', path=file_path, sheet=sheet_name) as timer:
+                df = workbook.parse(name)
+                timer.fields.update(rows=len(df), columns=df.shape[1])
+            ROWS_PROCESSED.inc(len(df), source='raw')
+            if optimize:
+                with timed('optimize_dtypes'):
+                    df = optimize_dtypes(df, arrow_strings=arrow_strings)
+            with timed('snapshot_write', path=snapshot_dir):
+                write_snapshot(df, snapshot_dir, file_path)
+            sizes[sheet_name] = len(df)
+            parsed += 1
+    _write_workbook_sheets(file_path, snapshot_root, sizes)
+    if parsed:
+        BYTES_LOADED.inc(os.path.getsize(file_path), source='raw')
+        logger.info("Classeur converti", extra={'path': file_path, 'sheets': len(sizes), 'parsed': parsed})
+    return sizes
+
+
+def default_sheet(sizes):
+    """Première feuille non vide (à défaut, la première)"""
+    for name, rows in sizes.items():
+        if rows:
+            return name
+    return next(iter(sizes), None)
@@ -0,0 +1,31 @@
+"""
+Formateur de logs structurés : le message suivi des champs passés en `extra`
+sous forme clé=valeur (logfmt), exploitables par les outils d'agrégation.
+"""
+import logging
+
+
+# Attributs présents sur tout LogRecord : le reste vient de `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _quote(value):
+    text = str(value)
+    if not text or any(c in text for c in ' ="\n'):
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+    return text
+
+
+class KeyValueFormatter(logging.Formatter):
+    def __init__(self, fmt='%(asctime)s %(levelname)s %(name)s %(message)s', *args, **kwargs):
+        super().__init__(fmt, *args, **kwargs)
+
+    def format(self, record):
+        text = super().format(record)
+        fields = {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+        if not fields:
+            return text
+        pairs = ' '.join(f'{key}={_quote(value)}' for key, value in fields.items())
+        # La trace éventuelle reste en fin de message
+        first, sep, rest = text.partition('\n')
+        return f'{first} {pairs}{sep}{rest}'
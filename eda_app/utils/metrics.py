@@ -0,0 +1,256 @@
+"""
+Mesures de performance du processus : durée des étapes d'analyse, latence
+des requêtes, volumes lus et taux de succès des caches, exposés au format
+texte de Prometheus (vue `metrics`).
+
+`timed(stage)`, gestionnaire de contexte ou décorateur, chronomètre une
+étape. La durée alimente l'histogramme des étapes et un log structuré. Elle
+s'ajoute aussi aux timings de la requête en cours, renvoyés dans l'en-tête
+Server-Timing (voir eda_app.middleware).
+
+Les compteurs sont propres au processus : les workers d'analyse et de rendu
+ont les leurs, qui ne remontent pas ici.
+"""
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+logger = logging.getLogger(__name__)
+
+# Bornes (secondes) des histogrammes de durée
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple((name, str(labels.get(name, ''))) for name in self.labels)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+    def samples(self):
+        for key, value in sorted(self.items()):
+            yield self.name, key, value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # clé des labels -> [comptes par borne, somme, effectif]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple((name, str(labels.get(name, ''))) for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        for key, (counts, total, count) in series:
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield f'{self.name}_bucket', key + (('le', _format_value(bound)),), bucket_count
+            yield f'{self.name}_bucket', key + (('le', '+Inf'),), count
+            yield f'{self.name}_sum', key, total
+            yield f'{self.name}_count', key, count
+
+
+class Gauge:
+    """Valeur lue au moment de l'export : `callback()` retourne des couples (labels, valeur)"""
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, callback):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+
+    def samples(self):
+        for labels, value in self.callback():
+            if value is not None:
+                yield self.name, tuple(sorted(labels.items())), value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name, help_text, callback):
+        return self.register(Gauge(name, help_text, callback))
+
+    def render(self):
+        """Export au format texte de Prometheus (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                logger.exception("Export de la mesure %s impossible", metric.name)
+                continue
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in samples:
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'vizaur_stage_duration_seconds', "Durée des étapes d'analyse et de rendu", labels=('stage',))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'vizaur_request_duration_seconds', "Latence des requêtes HTTP par vue", labels=('view', 'method', 'status'))
+BYTES_LOADED = REGISTRY.counter(
+    'vizaur_bytes_loaded_total', "Octets lus depuis les fichiers sources ou les snapshots", labels=('source',))
+ROWS_PROCESSED = REGISTRY.counter(
+    'vizaur_rows_processed_total', "Lignes chargées ou profilées", labels=('source',))
+CACHE_LOOKUPS = REGISTRY.counter(
+    'vizaur_cache_lookups_total', "Consultations des caches, par résultat (hit/miss)", labels=('cache', 'result'))
+
+
+def _cache_hit_ratios():
+    lookups = {}
+    for key, value in CACHE_LOOKUPS.items():
+        labels = dict(key)
+        hits, total = lookups.get(labels['cache'], (0, 0))
+        lookups[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0), total + value)
+    return [({'cache': cache}, hits / total) for cache, (hits, total) in sorted(lookups.items()) if total]
+
+
+REGISTRY.gauge('vizaur_cache_hit_ratio', "Part des consultations servies par le cache", _cache_hit_ratios)
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_LOOKUPS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+# Timings de la requête en cours : étape -> [durée cumulée, nombre d'appels]
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+@contextmanager
+def collect_timings():
+    """Collecte les durées des étapes exécutées dans ce contexte (une requête)"""
+    timings = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def record_stage(stage, seconds, **fields):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        entry = timings.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    logger.debug("Étape %s: %.1f ms", stage, seconds * 1000,
+                 extra={'stage': stage, 'duration_ms': round(seconds * 1000, 3), **fields})
+
+
+class timed:
+    """
+    Chronomètre une étape : `with timed('parse', rows=n):` ou `@timed('kde')`.
+
+    Les champs nommés sont ajoutés au log ; ils peuvent être complétés dans le
+    bloc (`with timed('parse') as t: ... t.fields['rows'] = n`).
+    """
+
+    def __init__(self, stage, **fields):
+        self.stage = stage
+        self.fields = fields
+        self.seconds = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._start
+        record_stage(self.stage, self.seconds, **self.fields)
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Une nouvelle instance par appel : sûr entre threads et en récursion
+            with timed(self.stage, **self.fields):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def format_server_timing(timings, total=None):
+    """Valeur de l'en-tête Server-Timing (durées en millisecondes)"""
+    entries = []
+    for stage, (seconds, count) in timings.items():
+        entry = f'{stage};dur={seconds * 1000:.1f}'
+        if count > 1:
+            entry += f';desc="x{count}"'
+        entries.append(entry)
+    if total is not None:
+        entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
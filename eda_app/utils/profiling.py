@@ -0,0 +1,136 @@
+"""
+Profilage des colonnes au chargement : cardinalité estimée et types compacts.
+"""
+import math
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+DISTINCT_SAMPLE_SIZE = 50_000
+DATETIME_SAMPLE_SIZE = 1_000
+READ_SAMPLE_ROWS = 10_000
+# Au-delà de cette proportion de valeurs distinctes, le type category n'économise rien
+CATEGORY_MAX_RATIO = 0.5
+
+_NUMBER_RE = re.compile(r'^\s*[-+]?\d+([.,]\d+)?\s*$')
+
+
+def estimate_distinct(series, sample_size=DISTINCT_SAMPLE_SIZE):
+    """
+    Nombre de valeurs distinctes (hors valeurs manquantes).
+
+    Exact pour les petites colonnes et les catégories ; au-delà, estimé sur un
+    échantillon avec l'estimateur GEE : sqrt(n/s) * f1 + somme des f_j (j >= 2),
+    où f_j est le nombre de valeurs vues exactement j fois dans l'échantillon.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.nunique()
+
+    values = series.dropna()
+    n = len(values)
+    if n <= sample_size:
+        return values.nunique()
+
+    sample = values.sample(sample_size, random_state=0)
+    frequencies = sample.value_counts().value_counts()
+    singletons = int(frequencies.get(1, 0))
+    repeated = int(frequencies.sum()) - singletons
+    return min(int(round(math.sqrt(n / sample_size) * singletons + repeated)), n)
+
+
+def _smallest_int_dtype(values):
+    low, high = int(values.min()), int(values.max())
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        # L'étendue (max - min) doit tenir aussi : get_column_stats la calcule dans ce dtype
+        if info.min <= low and high <= info.max and high - low <= info.max:
+            return dtype
+    return None
+
+
+def _looks_like_datetime(series):
+    sample = series.dropna().head(DATETIME_SAMPLE_SIZE)
+    if sample.empty or not sample.map(lambda v: isinstance(v, str)).all():
+        return False
+    if sample.str.match(_NUMBER_RE).any() or not sample.str.contains(r'\d').all():
+        return False
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        parsed = pd.to_datetime(sample, errors='coerce')
+    return not parsed.isna().any()
+
+
+def arrow_strings_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def infer_read_dtypes(sample):
+    """
+    Types à passer à read_csv, déduits d'un échantillon des premières lignes.
+
+    Retourne (dtype, parse_dates) : les textes répétitifs sont lus directement
+    en category et les colonnes de dates parsées, ce qui évite de matérialiser
+    une chaîne Python par cellule pendant la lecture. Les entiers et flottants
+    gardent l'inférence de pandas (un échantillon ne garantit ni l'étendue ni
+    l'absence de valeurs manquantes) et sont réduits ensuite par optimize_dtypes.
+    """
+    dtype = {}
+    parse_dates = []
+    for col in sample.columns:
+        series = sample[col]
+        if series.dtype != object:
+            continue
+        if _looks_like_datetime(series):
+            parse_dates.append(col)
+        elif len(series) and series.nunique() / len(series) < CATEGORY_MAX_RATIO:
+            dtype[col] = 'category'
+    return dtype, parse_dates
+
+
+def optimize_column(series, arrow_strings=False):
+    """Retourne la colonne dans le type le plus compact qui ne perd aucune information"""
+    dtype = series.dtype
+
+    if dtype.kind == 'i' and dtype.itemsize > 1 and len(series):
+        target = _smallest_int_dtype(series)
+        if target is not None and np.dtype(target).itemsize < dtype.itemsize:
+            return series.astype(target)
+        return series
+
+    # Les flottants restent en float64 : pandas accumule moyenne et variance
+    # dans le dtype de la colonne, float32 changerait les statistiques affichées
+
+    if dtype == object:
+        if _looks_like_datetime(series):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                parsed = pd.to_datetime(series, errors='coerce')
+            # Conversion acceptée seulement si aucune valeur n'est devenue NaT
+            if parsed.isna().sum() == series.isna().sum():
+                return parsed
+        if len(series) and estimate_distinct(series) / len(series) < CATEGORY_MAX_RATIO:
+            return series.astype('category')
+        if arrow_strings and series.map(lambda v: isinstance(v, str) or v is None or v != v).all():
+            return series.astype('string[pyarrow]')
+
+    return series
+
+
+def optimize_dtypes(df, arrow_strings=False):
+    """
+    Réduit la mémoire d'un DataFrame : entiers réduits sans perte, textes
+    répétitifs en category, dates parsées et, si demandé (pyarrow installé),
+    textes restants en chaînes Arrow.
+    """
+    arrow_strings = arrow_strings and arrow_strings_available()
+    optimized = {i: optimize_column(df.iloc[:, i], arrow_strings) for i in range(df.shape[1])}
+    result = pd.DataFrame(optimized, index=df.index, copy=False)
+    result.columns = df.columns
+    return result
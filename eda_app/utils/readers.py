@@ -0,0 +1,182 @@
+"""
+Lecture des CSV : choix du moteur de parsing et de l'encodage.
+
+Le moteur pyarrow (multi-thread) est utilisé quand il est installé, avec
+repli transparent sur le moteur C de pandas pour les options qu'il ne gère
+pas. L'encodage est déterminé une seule fois par fichier, en décodant le
+flux d'octets par blocs (sans parser le CSV), puis mémorisé par l'appelant.
+"""
+import codecs
+import csv
+import io
+import itertools
+
+import chardet
+import pandas as pd
+
+
+FALLBACK_ENCODINGS = ['utf-8', 'windows-1252', 'iso-8859-1']
+DECODE_BLOCK_SIZE = 1024 * 1024
+DETECT_SAMPLE_BYTES = 10000
+# Début du fichier conservé pour deviner le séparateur
+HEADER_SAMPLE_BYTES = 64 * 1024
+SNIFF_DELIMITERS = ',;\t|'
+# Lignes (en-tête compris) qui doivent avoir le même nombre de champs avec le séparateur deviné
+SNIFF_CHECK_ROWS = 20
+
+
+def pyarrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_engines():
+    """Moteurs utilisables dans cet environnement, du plus rapide au plus lent"""
+    return (['pyarrow'] if pyarrow_available() else []) + ['c']
+
+
+def default_engine():
+    return available_engines()[0]
+
+
+def detect_bytes_encoding(raw_data):
+    detected = chardet.detect(raw_data)
+    return detected['encoding'] if detected['confidence'] > 0.7 else 'utf-8'
+
+
+def detect_encoding(file_path, sample_size=DETECT_SAMPLE_BYTES):
+    """Détecte l'encodage d'un fichier texte à partir de ses premiers octets"""
+    with open(file_path, 'rb') as f:
+        raw_data = f.read(sample_size)
+    return detect_bytes_encoding(raw_data)
+
+
+def candidate_encodings(detected):
+    """Encodages à essayer, dans l'ordre : celui détecté puis ceux de secours (sans doublon)"""
+    candidates = []
+    for encoding in [detected] + FALLBACK_ENCODINGS:
+        if encoding and encoding.lower() not in [c.lower() for c in candidates]:
+            candidates.append(encoding)
+    return candidates
+
+
+def decodes_cleanly(file_path, encoding, block_size=DECODE_BLOCK_SIZE):
+    """Vérifie que tout le fichier se décode avec `encoding`, par blocs et sans le parser"""
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)()
+    except LookupError:
+        return False
+    try:
+        with open(file_path, 'rb') as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    decoder.decode(b'', final=True)
+                    return True
+                decoder.decode(block)
+    except UnicodeDecodeError:
+        return False
+
+
+def resolve_encoding(file_path):
+    """
+    Encodage à utiliser pour lire le fichier : celui détecté par chardet s'il
+    décode tout le fichier, sinon le premier encodage de secours qui y parvient.
+    iso-8859-1 décode n'importe quel octet, la recherche aboutit donc toujours.
+    """
+    for encoding in candidate_encodings(detect_encoding(file_path)):
+        if decodes_cleanly(file_path, encoding):
+            return encoding
+    return FALLBACK_ENCODINGS[-1]
+
+
+def _splits_consistently(text, delimiter):
+    """L'en-tête et les premières lignes ont-ils tous le même nombre de champs (plus d'un) ?"""
+    rows = [row for row in itertools.islice(csv.reader(io.StringIO(text), delimiter=delimiter), SNIFF_CHECK_ROWS)
+            if row]
+    return bool(rows) and len(rows[0]) > 1 and all(len(row) == len(rows[0]) for row in rows)
+
+
+def sniff_delimiter(text):
+    """
+    Séparateur deviné sur les premières lignes (',' par défaut). Un autre
+    séparateur n'est retenu que s'il découpe l'en-tête et les premières lignes
+    en un même nombre de champs : csv.Sniffer se trompe sur des CSV à virgules
+    ordinaires (texte entre guillemets contenant des ';', fichier à une colonne).
+    """
+    try:
+        delimiter = csv.Sniffer().sniff(text, delimiters=SNIFF_DELIMITERS).delimiter
+    except csv.Error:
+        return ','
+    if delimiter != ',' and not _splits_consistently(text, delimiter):
+        return ','
+    return delimiter
+
+
+class StreamingSniffer:
+    """
+    Encodage et séparateur d'un CSV déterminés pendant la réception des
+    octets (upload), sans relire le fichier ensuite.
+
+    Mêmes règles que resolve_encoding : chaque encodage candidat décode le
+    flux au fil de l'eau et est écarté à la première erreur ; on retient le
+    premier qui a tout décodé.
+    """
+
+    def __init__(self, header_size=HEADER_SAMPLE_BYTES):
+        self.header_size = max(header_size, DETECT_SAMPLE_BYTES)
+        self.header = bytearray()
+        self._decoders = None
+
+    def _start_decoding(self):
+        detected = detect_bytes_encoding(bytes(self.header[:DETECT_SAMPLE_BYTES]))
+        self._decoders = {}
+        for encoding in candidate_encodings(detected):
+            try:
+                self._decoders[encoding] = codecs.getincrementaldecoder(encoding)()
+            except LookupError:
+                continue
+        self._decode(bytes(self.header))
+
+    def _decode(self, data, final=False):
+        for encoding, decoder in list(self._decoders.items()):
+            try:
+                decoder.decode(data, final=final)
+            except UnicodeDecodeError:
+                del self._decoders[encoding]
+
+    def feed(self, chunk):
+        if self._decoders is not None:
+            self._decode(chunk)
+            return
+        self.header += chunk
+        if len(self.header) >= self.header_size:
+            self._start_decoding()
+
+    def finish(self):
+        """Retourne {'encoding', 'delimiter'} une fois tout le fichier reçu"""
+        if self._decoders is None:
+            self._start_decoding()
+        self._decode(b'', final=True)
+        encoding = next(iter(self._decoders), FALLBACK_ENCODINGS[-1])
+
+        text = bytes(self.header[:self.header_size]).decode(encoding, errors='replace')
+        if len(self.header) >= self.header_size and '\n' in text:
+            # Dernière ligne probablement tronquée
+            text = text[:text.rindex('\n')]
+        return {'encoding': encoding, 'delimiter': sniff_delimiter(text)}
+
+
+def read_csv(file_path, encoding, engine=None, **options):
+    """pd.read_csv avec le moteur demandé (ou le plus rapide disponible) et repli sur le moteur C"""
+    engine = engine or default_engine()
+    if engine == 'pyarrow' and pyarrow_available():
+        try:
+            return pd.read_csv(file_path, encoding=encoding, engine='pyarrow', **options)
+        except (ValueError, NotImplementedError):
+            # Option non gérée par pyarrow (nrows, encoding_errors, ...)
+            pass
+    return pd.read_csv(file_path, encoding=encoding, engine='c', **options)
@@ -0,0 +1,109 @@
+"""
+Échantillonnage des lignes d'un dataset pour les visuels coûteux (KDE, nuages de points).
+
+L'échantillon est tiré une fois par dataset (tirage uniforme sans remise,
+graine fixe) et enregistré à côté du snapshot : toutes les colonnes et tous
+les processus utilisent les mêmes lignes. Les comptages d'histogramme, eux,
+restent calculés sur la colonne complète.
+"""
+import math
+import os
+
+import numpy as np
+
+from .metrics import timed
+
+
+SAMPLE_FILE_TEMPLATE = 'sample_{size}.npy'
+KDE_GRID_POINTS = 200
+KDE_BLOCK_SIZE = 10_000
+
+
+def sample_indices(num_rows, size, seed=0):
+    """Indices (triés) de `size` lignes tirées uniformément parmi `num_rows`, ou None si tout tient"""
+    if not size or num_rows <= size:
+        return None
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(num_rows, size=size, replace=False))
+
+
+def load_or_create_sample_index(num_rows, size, sample_dir=None):
+    """
+    Indices de l'échantillon, relus depuis `sample_dir` s'il a déjà été tiré.
+
+    Le fichier vit dans le répertoire du snapshot : réécrire le snapshot
+    (fichier source modifié) supprime aussi l'échantillon.
+    """
+    if not size or num_rows <= size:
+        return None
+
+    path = os.path.join(sample_dir, SAMPLE_FILE_TEMPLATE.format(size=size)) if sample_dir else None
+    if path and os.path.exists(path):
+        try:
+            index = np.load(path)
+            if len(index) == size and index[-1] < num_rows:
+                return index
+        except (OSError, ValueError):
+            pass
+
+    index = sample_indices(num_rows, size)
+    if path and os.path.isdir(sample_dir):
+        tmp_path = f'{path}.tmp-{os.getpid()}.npy'
+        np.save(tmp_path, index)
+        os.replace(tmp_path, path)
+    return index
+
+
+def gaussian_kde_curve(values, grid):
+    """Densité d'un noyau gaussien (bande passante de Scott) évaluée sur `grid`, ou None"""
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n < 2:
+        return None
+    std = values.std(ddof=1)
+    if not std > 0:
+        return None
+    bandwidth = std * n ** (-1 / 5)
+
+    density = np.zeros(len(grid))
+    # Par blocs : la matrice grille x valeurs reste de taille bornée
+    for start in range(0, n, KDE_BLOCK_SIZE):
+        z = (grid[:, None] - values[None, start:start + KDE_BLOCK_SIZE]) / bandwidth
+        density += np.exp(-0.5 * z * z).sum(axis=1)
+    return density / (n * bandwidth * math.sqrt(2 * math.pi))
+
+
+def histogram_data(values, bins=30, sample=None):
+    """
+    Données d'un histogramme : comptages exacts sur `values` (colonne complète)
+    et courbe KDE, à l'échelle des comptages, estimée sur `sample` s'il est fourni.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return None
+
+    counts, edges = np.histogram(values, bins=bins)
+
+    kde_values = values if sample is None else np.asarray(sample, dtype=np.float64)
+    kde_values = kde_values[np.isfinite(kde_values)]
+    grid = np.linspace(edges[0], edges[-1], KDE_GRID_POINTS)
+    with timed('kde', points=len(kde_values)):
+        density = gaussian_kde_curve(kde_values, grid)
+    kde = None
+    if density is not None:
+        bin_width = edges[1] - edges[0]
+        # Chiffres significatifs limités : la courbe n'a pas besoin de plus pour être tracée
+        kde = {
+            'x': [float(f'{x:.6g}') for x in grid],
+            'y': [float(f'{y:.4g}') for y in density * len(values) * bin_width],
+        }
+
+    return {
+        'bin_edges': edges.tolist(),
+        'counts': counts.tolist(),
+        'kde': kde,
+        'count': len(values),
+        'sampled': sample is not None and len(kde_values) < len(values),
+        'sample_size': len(kde_values),
+    }
@@ -0,0 +1,284 @@
+"""
+Statistiques fusionnables, calculées par morceaux (chunks) en mémoire bornée.
+
+Chaque structure se met à jour avec un tableau numpy entier (vectorisé) et
+se fusionne avec une autre instance : des chunks traités séparément, voire
+dans des processus différents, donnent le même résultat qu'une seule passe.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class RunningMoments:
+    """
+    Effectif, moyenne et moments centrés d'ordre 2 à 4, min et max.
+
+    Fusion par les formules de Chan/Pébay : numériquement stable, sans
+    jamais conserver les valeurs elles-mêmes.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = None
+        self.max = None
+
+    @classmethod
+    def from_values(cls, values):
+        moments = cls()
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return moments
+        moments.n = len(values)
+        moments.mean = float(values.mean())
+        delta = values - moments.mean
+        delta2 = delta * delta
+        moments.m2 = float(delta2.sum())
+        moments.m3 = float((delta2 * delta).sum())
+        moments.m4 = float((delta2 * delta2).sum())
+        moments.min = float(values.min())
+        moments.max = float(values.max())
+        return moments
+
+    def update(self, values):
+        self.merge(RunningMoments.from_values(values))
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.__dict__.update(other.__dict__)
+            return self
+
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+        delta_n = delta / n
+
+        m2 = self.m2 + other.m2 + delta * delta_n * na * nb
+        m3 = (self.m3 + other.m3
+              + delta * delta_n * delta_n * na * nb * (na - nb)
+              + 3 * delta_n * (na * other.m2 - nb * self.m2))
+        m4 = (self.m4 + other.m4
+              + delta * delta_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+              + 6 * delta_n * delta_n * (na * na * other.m2 + nb * nb * self.m2)
+              + 4 * delta_n * (na * other.m3 - nb * self.m3))
+
+        self.n = n
+        self.mean += delta_n * nb
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Variance non biaisée (ddof=1), comme pandas"""
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.n > 1 else math.nan
+
+    @property
+    def skewness(self):
+        """Coefficient d'asymétrie ajusté (même formule que pandas.Series.skew)"""
+        n = self.n
+        if n < 3:
+            return math.nan
+        if self.m2 == 0:
+            return 0.0
+        return n * (n - 1) ** 0.5 / (n - 2) * self.m3 / self.m2 ** 1.5
+
+    @property
+    def kurtosis(self):
+        """Kurtosis en excès non biaisée (même formule que pandas.Series.kurtosis)"""
+        n = self.n
+        if n < 4:
+            return math.nan
+        if self.m2 == 0:
+            return 0.0
+        numerator = n * (n + 1) * (n - 1) * self.m4
+        denominator = (n - 2) * (n - 3) * self.m2 ** 2
+        adjustment = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        return numerator / denominator - adjustment
+
+
+class KLLSketch:
+    """
+    Sketch KLL de quantiles approchés (erreur de rang ~1.65/k).
+
+    Tant qu'aucune compaction n'a eu lieu, les quantiles sont exacts et
+    calculés comme pandas (interpolation linéaire).
+    """
+
+    def __init__(self, k=400, seed=0):
+        self.k = k
+        self.count = 0
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                # Nombre impair : le plus grand élément reste à ce niveau
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                body = items[:len(items) - len(keep)]
+                offset = int(self._rng.integers(2))
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], body[offset::2]])
+                self._levels[level] = keep
+            level += 1
+
+    @property
+    def is_exact(self):
+        return all(len(items) == 0 for items in self._levels[1:])
+
+    def _weighted_items(self):
+        """Éléments conservés triés, avec leur poids (2^niveau) : le total des poids vaut count"""
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(level_items), 2 ** level, dtype=np.float64)
+                                  for level, level_items in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+    def count_below(self, points):
+        """Nombre (approché) de valeurs strictement inférieures à chaque point ; exact sans compaction"""
+        points = np.asarray(points, dtype=np.float64)
+        if self.count == 0:
+            return np.zeros(len(points))
+        items, weights = self._weighted_items()
+        cumulative = np.concatenate([[0.0], np.cumsum(weights)])
+        return cumulative[np.searchsorted(items, points, side='left')]
+
+    def quantile(self, q):
+        if self.count == 0:
+            return math.nan
+        if self.is_exact:
+            return float(np.quantile(self._levels[0], q))
+
+        items, weights = self._weighted_items()
+        # Rang "milieu" de chaque élément, puis interpolation linéaire comme np.quantile
+        positions = np.cumsum(weights) - weights / 2
+        return float(np.interp(q * weights.sum(), positions, items))
+
+
+class HyperLogLog:
+    """Estimation du nombre de valeurs distinctes (erreur relative ~1.04/sqrt(2^p))"""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    @staticmethod
+    def hash_values(values):
+        return pd.util.hash_array(np.asarray(values))
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        self.update_hashes(self.hash_values(values))
+
+    def update_hashes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        p = self.p
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        remaining = hashes & np.uint64((1 << (64 - p)) - 1)
+
+        # Longueur binaire exacte : deux moitiés de 32 bits converties sans perte en float64
+        high = (remaining >> np.uint64(32)).astype(np.float64)
+        low = (remaining & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        bit_length = np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+        rank = (64 - p) - bit_length + 1
+
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Petites cardinalités : comptage linéaire
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class FrequentItems:
+    """Valeurs les plus fréquentes (résumé de Misra-Gries fusionnable)"""
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        self._absorb(pd.Series(values).value_counts())
+
+    def merge(self, other):
+        self._absorb(other.counts)
+        return self
+
+    def _absorb(self, counts):
+        merged = self.counts.add(counts, fill_value=0).astype(np.int64)
+        if len(merged) > self.capacity:
+            merged = merged.sort_values(ascending=False)
+            threshold = merged.iloc[self.capacity]
+            merged = merged.iloc[:self.capacity] - threshold
+            merged = merged[merged > 0]
+        self.counts = merged
+
+    def relabel(self, label):
+        """Remplace chaque valeur suivie par label(valeur), en cumulant les comptes qui se confondent"""
+        if not self.counts.empty:
+            self.counts = self.counts.groupby(self.counts.index.map(label)).sum().astype(np.int64)
+        return self
+
+    def most_common(self, n=None):
+        """(valeur, compte) par compte décroissant (à égalité, ordre des valeurs) ; comptes minorés"""
+        if self.counts.empty:
+            return []
+        counts = self.counts.sort_index(kind='stable').sort_values(ascending=False, kind='stable')
+        return list(counts.iloc[:n].items())
+
+    def mode(self):
+        """Valeur la plus fréquente ; à égalité, la plus petite (comme pandas.Series.mode)"""
+        if self.counts.empty:
+            return None
+        top = self.counts[self.counts == self.counts.max()]
+        return top.sort_index().index[0]
@@ -0,0 +1,173 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+
+# Incrémenter à chaque changement du format sur disque
+SNAPSHOT_VERSION = 2
+MANIFEST_NAME = 'manifest.json'
+
+
+def file_fingerprint(file_path):
+    """Empreinte légère d'un fichier source (taille + date de modification)"""
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _is_native_column(series):
+    """Colonnes stockables telles quelles dans un .npy (et donc mappables en mémoire)"""
+    dtype = series.dtype
+    if not isinstance(dtype, np.dtype):
+        return False
+    return dtype.kind in 'biufmM'
+
+
+def read_manifest(snapshot_dir):
+    """Lit le manifeste d'un snapshot, ou None s'il n'existe pas"""
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_snapshot_fresh(snapshot_dir, source_path):
+    """Vérifie que le snapshot existe et correspond au fichier source actuel"""
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None or manifest.get('version') != SNAPSHOT_VERSION:
+        return False
+    try:
+        return manifest.get('source') == file_fingerprint(source_path)
+    except OSError:
+        return False
+
+
+def write_snapshot(df, snapshot_dir, source_path):
+    """
+    Écrit un snapshot colonnaire du DataFrame : un fichier .npy par colonne.
+
+    Les colonnes numériques, booléennes et dates sont stockées brutes ; les
+    autres (texte, catégories) sont encodées en codes entiers + catégories.
+    L'écriture se fait dans un répertoire temporaire renommé à la fin pour
+    qu'un lecteur ne voie jamais un snapshot incomplet.
+    """
+    tmp_dir = f'{snapshot_dir}.tmp-{os.getpid()}'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    try:
+        columns = []
+        for i, col in enumerate(df.columns):
+            series = df.iloc[:, i]
+            entry = {'name': col, 'dtype': str(series.dtype), 'file': f'col_{i}.npy'}
+
+            if _is_native_column(series):
+                entry['storage'] = 'native'
+                np.save(os.path.join(tmp_dir, entry['file']), series.to_numpy())
+            else:
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    entry['storage'] = 'category'
+                    codes = series.cat.codes.to_numpy()
+                    categories = series.cat.categories.to_numpy(dtype=object)
+                else:
+                    entry['storage'] = 'codes'
+                    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+                    categories = np.asarray(uniques, dtype=object)
+                entry['categories_file'] = f'col_{i}_categories.npy'
+                np.save(os.path.join(tmp_dir, entry['file']), codes.astype(np.int32))
+                np.save(os.path.join(tmp_dir, entry['categories_file']), categories, allow_pickle=True)
+
+            columns.append(entry)
+
+        manifest = {
+            'version': SNAPSHOT_VERSION,
+            'source': file_fingerprint(source_path),
+            'num_rows': len(df),
+            'columns': columns,
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, default=str)
+
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        os.makedirs(os.path.dirname(snapshot_dir) or '.', exist_ok=True)
+        os.rename(tmp_dir, snapshot_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return manifest
+
+
+def _load_column(snapshot_dir, entry):
+    values = np.load(os.path.join(snapshot_dir, entry['file']), mmap_mode='r')
+    if entry['storage'] == 'native':
+        # Vue ndarray ordinaire : la mémoire reste celle du fichier mappé
+        return values.view(np.ndarray)
+
+    categories = np.load(os.path.join(snapshot_dir, entry['categories_file']), allow_pickle=True)
+    if entry['storage'] == 'category':
+        return pd.Categorical.from_codes(np.asarray(values), categories=categories)
+
+    # Le code -1 (valeur manquante) pointe sur le NaN ajouté en fin de tableau
+    lookup = np.append(categories, np.array([np.nan], dtype=object))
+    restored = lookup[np.asarray(values)]
+    if entry['dtype'] != 'object':
+        try:
+            return pd.array(restored, dtype=entry['dtype'])
+        except (TypeError, ValueError):
+            pass
+    return restored
+
+
+def load_snapshot(snapshot_dir, columns=None):
+    """
+    Recharge un snapshot ; les colonnes natives restent mappées en mémoire (lecture seule).
+
+    Avec `columns`, seuls les fichiers de ces colonnes sont ouverts.
+    """
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Aucun snapshot dans {snapshot_dir}")
+
+    entries = manifest['columns']
+    if columns is not None:
+        wanted = set(columns)
+        entries = [entry for entry in entries if entry['name'] in wanted]
+        missing = wanted - {entry['name'] for entry in entries}
+        if missing:
+            raise KeyError(f"Colonnes absentes du snapshot: {sorted(missing)}")
+
+    data = {}
+    names = []
+    for i, entry in enumerate(entries):
+        data[i] = _load_column(snapshot_dir, entry)
+        names.append(entry['name'])
+
+    df = pd.DataFrame(data, index=pd.RangeIndex(manifest['num_rows']), copy=False)
+    df.columns = names
+    return df
+
+
+def snapshot_bytes(snapshot_dir, columns=None):
+    """Taille sur disque des fichiers d'un snapshot (des seules colonnes demandées avec `columns`)"""
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        return 0
+    wanted = set(columns) if columns is not None else None
+    files = [MANIFEST_NAME]
+    for entry in manifest['columns']:
+        if wanted is None or entry['name'] in wanted:
+            files += [entry['file']] + ([entry['categories_file']] if 'categories_file' in entry else [])
+    return sum(os.path.getsize(os.path.join(snapshot_dir, name)) for name in files
+               if os.path.exists(os.path.join(snapshot_dir, name)))
+
+
+def delete_snapshot(snapshot_dir):
+    """Supprime un snapshot (sans erreur s'il n'existe pas)"""
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
@@ -0,0 +1,354 @@
+"""
+Profilage par morceaux des CSV plus gros que la mémoire disponible.
+
+Le fichier est lu avec `chunksize` ; chaque colonne accumule des statistiques
+fusionnables (voir sketches.py). La mémoire utilisée dépend de la taille
+d'un chunk, pas de celle du fichier. Les résultats ont la même forme que
+ceux de DatasetAnalyzer (get_descriptive_stats, get_column_stats, ...).
+Les graphiques sont tirés des mêmes résumés : histogramme d'après le sketch
+de quantiles, barres d'après les valeurs fréquentes (comptes approchés dès
+que la colonne dépasse leur capacité).
+"""
+import copy
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from .charts import HISTOGRAM_BINS, MAX_CATEGORIES
+from .correlation import CorrelationAccumulator, matrix_to_frame, rank_pairs
+from .metrics import BYTES_LOADED, ROWS_PROCESSED, timed
+from .readers import resolve_encoding
+from .sketches import FrequentItems, HyperLogLog, KLLSketch, RunningMoments
+
+
+DEFAULT_CHUNKSIZE = 100_000
+PREVIEW_ROWS = 5
+
+
+def _category_label(value):
+    # Valeurs suivies tant que la colonne semblait numérique (float64) : 1.0 -> '1' comme dans le CSV
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class ColumnProfile:
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.missing = 0
+        self.numeric = True
+        self.is_float = False
+        self.is_bool = True
+        self.distinct = HyperLogLog()
+        self.moments = RunningMoments()
+        self.quantiles = KLLSketch()
+        self.frequent = FrequentItems()
+
+    def update(self, series):
+        self.rows += len(series)
+        missing = series.isna()
+        self.missing += int(missing.sum())
+        values = series[~missing].to_numpy()
+
+        is_number = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+        self.is_bool = self.is_bool and pd.api.types.is_bool_dtype(series)
+        if self.numeric and not is_number:
+            self._mark_non_numeric()
+
+        if self.numeric:
+            values = values.astype(np.float64)
+            self.is_float = self.is_float or series.dtype.kind == 'f'
+            self.moments.update(values)
+            self.quantiles.update(values)
+        # Valeurs fréquentes de toutes les colonnes : mode des numériques, barres des catégorielles
+        self.frequent.update(values)
+        self.distinct.update(values)
+
+    def _mark_non_numeric(self):
+        # Une valeur non numérique suffit : pandas lirait la colonne entière en object
+        self.numeric = False
+        self.moments = self.quantiles = None
+        self.frequent.relabel(_category_label)
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.missing += other.missing
+        self.is_bool = self.is_bool and other.is_bool
+        self.distinct.merge(other.distinct)
+        if self.numeric and not other.numeric:
+            self._mark_non_numeric()
+        if self.numeric:
+            self.is_float = self.is_float or other.is_float
+            self.moments.merge(other.moments)
+            self.quantiles.merge(other.quantiles)
+            self.frequent.merge(other.frequent)
+        elif other.numeric:
+            self.frequent.merge(copy.deepcopy(other.frequent).relabel(_category_label))
+        else:
+            self.frequent.merge(other.frequent)
+        return self
+
+    @property
+    def dtype(self):
+        if self.numeric:
+            return 'float64' if self.is_float else 'int64'
+        return 'bool' if self.is_bool else 'object'
+
+    def _native(self, value):
+        # Colonnes entières : min, max, mode restent des entiers comme avec pandas
+        if value is None or self.is_float or (isinstance(value, float) and math.isnan(value)):
+            return value
+        return int(value)
+
+    def describe(self):
+        """Valeurs de DataFrame.describe() + variance, skewness, kurtosis"""
+        m = self.moments
+        if m.n == 0:
+            values = [0.0] + [math.nan] * 10
+        else:
+            values = [
+                float(m.n), m.mean, m.std, m.min,
+                self.quantiles.quantile(0.25), self.quantiles.quantile(0.5), self.quantiles.quantile(0.75),
+                m.max, m.variance, m.skewness, m.kurtosis,
+            ]
+        return values
+
+    def column_stats(self):
+        m = self.moments
+        if m.n == 0:
+            return None
+        q1 = self.quantiles.quantile(0.25)
+        q3 = self.quantiles.quantile(0.75)
+        mode = self.frequent.mode()
+        if mode is None:
+            # Aucune valeur répétée : pandas renvoie toutes les valeurs triées, donc le minimum
+            mode = m.min
+        return {
+            'count': m.n,
+            'missing': self.missing,
+            'mean': m.mean,
+            'median': self.quantiles.quantile(0.5),
+            'mode': self._native(mode),
+            'std': m.std,
+            'variance': m.variance,
+            'min': self._native(m.min),
+            'max': self._native(m.max),
+            'q1': q1,
+            'q3': q3,
+            'iqr': q3 - q1,
+            'range': self._native(m.max - m.min),
+            'skewness': m.skewness,
+            'kurtosis': m.kurtosis,
+        }
+
+
+    def histogram_data(self, bins=HISTOGRAM_BINS):
+        """
+        Histogramme (même forme que sampling.histogram_data, sans KDE) déduit
+        du sketch de quantiles, exact tant qu'il n'a pas été compacté ou que
+        les valeurs distinctes tiennent dans le résumé des valeurs fréquentes.
+        """
+        m = self.moments
+        if m.n == 0:
+            return None
+        low, high = (m.min - 0.5, m.max + 0.5) if m.min == m.max else (m.min, m.max)
+        edges = np.linspace(low, high, bins + 1)
+        frequent = self.frequent.counts
+        exact = self.quantiles.is_exact or int(frequent.sum()) == m.n
+        if int(frequent.sum()) == m.n:
+            # Peu de valeurs distinctes, toutes suivies par le résumé des valeurs fréquentes : comptages exacts
+            counts, _ = np.histogram(frequent.index.to_numpy(dtype=np.float64), bins=edges, weights=frequent.to_numpy())
+            counts = counts.astype(np.int64)
+        else:
+            # Classes [a, b[ sauf la dernière, fermée (comme np.histogram)
+            below = np.append(self.quantiles.count_below(edges[:-1]), m.n)
+            counts = np.diff(np.round(below)).astype(np.int64)
+        return {
+            'bin_edges': edges.tolist(),
+            'counts': counts.tolist(),
+            'kde': None,
+            'count': m.n,
+            'sampled': False,
+            'sample_size': m.n,
+            'approximate': not exact,
+        }
+
+    def bar_chart_data(self, max_categories=MAX_CATEGORIES):
+        """Comptages des catégories les plus fréquentes (même forme que charts.bar_chart_data)"""
+        total = self.rows - self.missing
+        if total == 0:
+            return None
+        top = self.frequent.most_common(max_categories)
+        num_categories = max(self.distinct.estimate(), len(top))
+        labels = [_category_label(value) for value, count in top]
+        counts = [int(count) for value, count in top]
+        if num_categories > max_categories:
+            labels = labels[:max_categories - 1] + ['Autres']
+            counts = counts[:max_categories - 1] + [max(total - sum(counts[:max_categories - 1]), 0)]
+        return {
+            'labels': labels,
+            'counts': counts,
+            'num_categories': num_categories,
+            'total': total,
+            'approximate': True,
+        }
+
+
+class StreamingProfiler:
+    """Profil d'un CSV en une passe, par morceaux, en mémoire bornée"""
+
+    streaming = True
+    DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max',
+                      'variance', 'skewness', 'kurtosis']
+
+    def __init__(self, file_path, chunksize=DEFAULT_CHUNKSIZE, encoding=None, **read_options):
+        self.file_path = file_path
+        self.chunksize = chunksize
+        self.encoding = encoding
+        self.read_options = read_options
+        self.columns = {}
+        self.correlations = CorrelationAccumulator()
+        self.num_rows = 0
+        self.memory_usage = 0
+        # Premières et dernières lignes du fichier (aperçu)
+        self.head = None
+        self.tail = None
+
+    def iter_chunks(self):
+        if not self.encoding:
+            self.encoding = resolve_encoding(self.file_path)
+        return pd.read_csv(self.file_path, chunksize=self.chunksize, encoding=self.encoding,
+                           encoding_errors='replace', **self.read_options)
+
+    def update(self, chunk):
+        self.num_rows += len(chunk)
+        ROWS_PROCESSED.inc(len(chunk), source='stream')
+        self.memory_usage += int(chunk.memory_usage(deep=True).sum())
+        if self.head is None:
+            self.head = chunk.head(PREVIEW_ROWS)
+        # Le dernier chunk peut être plus court que l'aperçu
+        self.tail = pd.concat([self.tail, chunk.tail(PREVIEW_ROWS)]).tail(PREVIEW_ROWS)
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(col)
+            self.columns[col].update(chunk[col])
+        
+        # Sommes et produits croisés des colonnes numériques de ce chunk
+        numeric = [col for col in chunk.columns
+                   if pd.api.types.is_numeric_dtype(chunk[col]) and not pd.api.types.is_bool_dtype(chunk[col])]
+        self.correlations.update(chunk[numeric])
+
+    def merge(self, other):
+        """Fusionne le profil d'un autre ensemble de chunks (ex. calculé par un autre processus)"""
+        self.num_rows += other.num_rows
+        self.memory_usage += other.memory_usage
+        for col, profile in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(profile)
+            else:
+                self.columns[col] = profile
+        self.correlations.merge(other.correlations)
+        # `other` couvre la suite du fichier
+        if self.head is None:
+            self.head = other.head
+        if other.tail is not None:
+            self.tail = pd.concat([self.tail, other.tail]).tail(PREVIEW_ROWS)
+        return self
+
+    def profile(self, on_chunk=None):
+        with timed('stream_profile', path=self.file_path) as timer:
+            for chunk in self.iter_chunks():
+                self.update(chunk)
+                if on_chunk:
+                    on_chunk(self)
+            timer.fields['rows'] = self.num_rows
+        BYTES_LOADED.inc(os.path.getsize(self.file_path), source='stream')
+        return self
+
+    def get_basic_info(self):
+        return {
+            'num_rows': self.num_rows,
+            'num_columns': len(self.columns),
+            'column_names': list(self.columns),
+            'memory_usage': self.memory_usage,
+        }
+
+    def get_data_preview(self, head=PREVIEW_ROWS, tail=PREVIEW_ROWS):
+        empty = pd.DataFrame(columns=list(self.columns))
+        head_df = self.head.head(head) if self.head is not None else empty
+        tail_df = self.tail.tail(tail) if self.tail is not None else empty
+        return {
+            'head': head_df.to_html(classes='table table-striped', table_id='head-table'),
+            'tail': tail_df.to_html(classes='table table-striped', table_id='tail-table'),
+        }
+
+    def get_numeric_columns(self):
+        return [col for col, profile in self.columns.items() if profile.numeric]
+
+    def detect_column_types(self):
+        column_info = {}
+        for col, profile in self.columns.items():
+            if profile.numeric:
+                col_type = 'numérique'
+            elif self.num_rows > 20 and profile.distinct.estimate() / self.num_rows < 0.05:
+                col_type = 'catégoriel'
+            else:
+                col_type = 'texte'
+
+            column_info[col] = {
+                'type': col_type,
+                'dtype': profile.dtype,
+                'missing_count': profile.missing,
+                'missing_percent': round((profile.missing / self.num_rows) * 100, 2) if self.num_rows else 0.0,
+            }
+        return column_info
+
+    def get_descriptive_stats(self):
+        numeric_columns = self.get_numeric_columns()
+        if not numeric_columns:
+            return None
+        stats = pd.DataFrame(
+            {col: self.columns[col].describe() for col in numeric_columns},
+            index=self.DESCRIBE_INDEX,
+        )
+        return stats.round(3)
+
+    def get_column_stats(self, column_name):
+        profile = self.columns.get(column_name)
+        if profile is None or not profile.numeric:
+            return None
+        stats = profile.column_stats()
+        if stats is None:
+            return None
+        return {k: round(v, 3) if isinstance(v, (int, float)) and v is not None else v for k, v in stats.items()}
+
+    def get_correlation_matrix(self, method='pearson'):
+        """Matrice de Pearson issue des sommes cumulées (seule méthode calculable en une passe)"""
+        if method != 'pearson':
+            return None
+        numeric_columns = self.get_numeric_columns()
+        if len(numeric_columns) < 2:
+            return None
+        matrix = self.correlations.correlation_matrix(numeric_columns).round(3)
+        return matrix_to_frame(matrix, numeric_columns)
+
+    def get_correlation_pairs(self, threshold=0.5, method='pearson', top_n=None):
+        corr_matrix = self.get_correlation_matrix(method=method)
+        if corr_matrix is None:
+            return []
+        return rank_pairs(corr_matrix.to_numpy(), corr_matrix.columns.tolist(), threshold=threshold, top_n=top_n)
+
+    def get_histogram_data(self, column_name, bins=HISTOGRAM_BINS):
+        profile = self.columns.get(column_name)
+        if profile is None or not profile.numeric:
+            return None
+        return profile.histogram_data(bins=bins)
+
+    def get_bar_chart_data(self, column_name, max_categories=MAX_CATEGORIES):
+        profile = self.columns.get(column_name)
+        if profile is None:
+            return None
+        return profile.bar_chart_data(max_categories=max_categories)
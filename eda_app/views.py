@@ -1,40 +1,71 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404
 from django.contrib import messages
 from django.core.files.storage import default_storage
-from django.views.decorators.csrf import csrf_exempt
+from django.core.paginator import Paginator
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.utils.cache import get_conditional_response
 from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag, urlencode
+from django.conf import settings
+from django.urls import reverse
 from .forms import DatasetUploadForm
+from .jobs import enqueue_analysis
 from .models import Dataset
-from django.http import JsonResponse
+from .offload import OffloadBusy, check_cancelled, offload
+from .request_profiler import profilable
+from .uploads import HashingUploadHandler
+from .results import (
+    build_column_stats_payload, build_correlations_payload, build_statistics_payload, cached_charts, cached_image,
+    StreamedDatasetError, chart_digest, chart_options, chartable_columns, convert_numpy_types, correlation_frame,
+    get_or_compute_result, heatmap_digest, heatmap_options, read_chart, results_response,
+)
+from .utils.charts import CHART_FORMATS, render_heatmap, render_heatmap_tile, to_base64
+from .utils.correlation import METHODS as CORRELATION_METHODS, ORDERS as HEATMAP_ORDERS, arrange_heatmap
+from .utils.data_analyzer import ANALYZER_VERSION
+from .utils.metrics import REGISTRY, timed
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+import functools
+import hashlib
+import json
+import logging
 import os
 import numpy as np
 import pandas as pd
 
 
-def convert_numpy_types(obj):
-    """Convertit les types numpy/pandas en types Python natifs pour la sérialisation JSON"""
-    if isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, pd.Series):
-        return obj.tolist()
-    elif isinstance(obj, pd.DataFrame):
-        return obj.to_dict()
-    elif isinstance(obj, dict):
-        return {key: convert_numpy_types(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_numpy_types(item) for item in obj]
-    else:
-        return obj
+logger = logging.getLogger(__name__)
 
 
 def home(request):
     return render(request, 'eda_app/home.html')
 
+@csrf_exempt
 def upload_dataset(request):
+    # Le gestionnaire d'upload doit être en place avant toute lecture de request.POST,
+    # y compris par le middleware CSRF : la vérification est donc faite par _upload_dataset
+    request.upload_handlers = [HashingUploadHandler(request)]
+    return _upload_dataset(request)
+
+
+def _upload_response(request, dataset, is_ajax, message, **extra):
+    if is_ajax:
+        return JsonResponse({
+            'success': True,
+            'dataset_id': dataset.id,
+            'progress_url': reverse('dataset_progress', args=[dataset.id]),
+            'overview_url': reverse('dataset_overview', args=[dataset.id]),
+            **extra,
+        })
+    messages.success(request, message)
+    return redirect('dataset_list')
+
+
+@csrf_protect
+def _upload_dataset(request):
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    
     if request.method == 'POST':
         form = DatasetUploadForm(request.POST, request.FILES)
         if form.is_valid():
@@ -43,29 +74,54 @@ def upload_dataset(request):
             # Validation extension
             valid_extensions = ['.csv', '.xls', '.xlsx']
             if not any(file.name.lower().endswith(ext) for ext in valid_extensions):
-                messages.error(request, 'Format non supporté. Utilisez CSV, XLS ou XLSX.')
+                error_message = 'Format non supporté. Utilisez CSV, XLS ou XLSX.'
+                if is_ajax:
+                    return JsonResponse({'success': False, 'error': error_message}, status=400)
+                messages.error(request, error_message)
                 return render(request, 'eda_app/upload.html', {'form': form})
             
             try:
-                # Sauvegarde fichier
+                # Contenu identique déjà importé : son fichier, son snapshot et ses résultats sont réutilisés
+                content_hash = getattr(file, 'content_hash', '')
+                duplicate = Dataset.find_duplicate(content_hash)
+                if duplicate is not None:
+                    logger.info("Upload identique à un dataset existant", extra={
+                        'dataset_id': duplicate.id, 'content_hash': content_hash, 'file_name': file.name,
+                    })
+                    return _upload_response(
+                        request, duplicate, is_ajax,
+                        f'Fichier {file.name} identique à "{duplicate.name}", analyse existante réutilisée.',
+                        duplicate=True,
+                    )
+                
+                # Sauvegarde fichier (fichier temporaire déplacé, pas recopié)
                 file_path = default_storage.save(f'datasets/{file.name}', file)
                 
-                # Sauvegarde en base
+                # Sauvegarde en base ; encodage et séparateur déjà détectés pendant l'upload
+                sniffed = getattr(file, 'sniffed', None) or {}
                 dataset = Dataset.objects.create(
                     name=file.name,
                     file_path=file_path,
-                    size=file.size
+                    size=file.size,
+                    content_hash=content_hash,
+                    encoding=sniffed.get('encoding', ''),
+                    delimiter=sniffed.get('delimiter', ''),
                 )
                 
-                # Analyse du fichier
-                if dataset.analyze_and_update():
-                    messages.success(request, f'Fichier {file.name} uploadé et analysé avec succès!')
-                    return redirect('dataset_overview', dataset_id=dataset.id)
-                else:
-                    messages.error(request, 'Erreur lors de l\'analyse du fichier.')
+                # Analyse en arrière-plan : la requête rend la main immédiatement
+                enqueue_analysis(dataset)
+                
+                return _upload_response(request, dataset, is_ajax,
+                                        f'Fichier {file.name} uploadé, analyse en cours...')
                     
             except Exception as e:
-                messages.error(request, f'Erreur lors du traitement: {str(e)}')
+                error_message = f'Erreur lors du traitement: {str(e)}'
+                if is_ajax:
+                    return JsonResponse({'success': False, 'error': error_message}, status=500)
+                messages.error(request, error_message)
+        
+        elif is_ajax:
+            return JsonResponse({'success': False, 'error': 'Fichier invalide.'}, status=400)
                 
         return render(request, 'eda_app/upload.html', {'form': form})
     else:
@@ -73,17 +129,33 @@ def upload_dataset(request):
     
     return render(request, 'eda_app/upload.html', {'form': form})
 
+
+def dataset_progress(request, dataset_id):
+    """Vue AJAX : avancement de l'analyse en arrière-plan"""
+    dataset = get_object_or_404(Dataset, id=dataset_id)
+    return JsonResponse({
+        'status': dataset.status,
+        'progress': dataset.progress,
+        'error': dataset.error_message or None,
+        'num_rows': dataset.num_rows,
+        'num_columns': dataset.num_columns,
+    })
+
 def dataset_list(request):
     datasets = Dataset.objects.all().order_by('-upload_date')
     return render(request, 'eda_app/dataset_list.html', {'datasets': datasets})
 
 
+@profilable
 def dataset_overview(request, dataset_id):
     dataset = get_object_or_404(Dataset, id=dataset_id)
     
+    if dataset.is_processing:
+        messages.info(request, f'Analyse de {dataset.name} en cours ({dataset.progress}%).')
+        return redirect('dataset_list')
+    
     try:
-        from .utils.data_analyzer import DatasetAnalyzer
-        analyzer = DatasetAnalyzer(dataset.get_full_path())
+        analyzer = dataset.get_analyzer()
         
         # Données de base
         basic_info = analyzer.get_basic_info()
@@ -99,7 +171,9 @@ def dataset_overview(request, dataset_id):
         column_stats = None
         
         if selected_column and selected_column in numeric_columns:
-            histogram_data = analyzer.generate_histogram(selected_column)
+            # Même image que l'export PNG de la colonne : rendue une fois, puis relue du cache disque
+            [(path, error)] = cached_charts(dataset, lambda: analyzer, [(selected_column, 'histogram')])
+            histogram_data = to_base64(read_chart(path)) if path else None
             column_stats = analyzer.get_column_stats(selected_column)
         
         context = {
@@ -111,6 +185,7 @@ def dataset_overview(request, dataset_id):
             'selected_column': selected_column,
             'histogram_data': histogram_data,
             'column_stats': column_stats,
+            'sheet_names': dataset.get_sheet_names(),
         }
         
         return render(request, 'eda_app/overview.html', context)
@@ -120,131 +195,583 @@ def dataset_overview(request, dataset_id):
         return redirect('dataset_list')
 
 
+def _busy_response():
+    response = JsonResponse({'error': 'Serveur occupé, réessayez dans un instant'}, status=503)
+    response['Retry-After'] = '2'
+    return response
+
+
+def _statistics_results(dataset, selected_column):
+    """Résultats persistés de l'onglet Statistiques (calculés au premier accès)"""
+    # Statistiques descriptives et informations sur les colonnes
+    results = [get_or_compute_result(
+        dataset, 'statistics', lambda: build_statistics_payload(dataset.get_analyzer())
+    )]
+    
+    # Statistiques par colonne sélectionnée
+    if selected_column and selected_column in results[0].payload['numeric_columns']:
+        results.append(get_or_compute_result(
+            dataset, 'column_stats',
+            lambda: build_column_stats_payload(dataset.get_analyzer(columns=[selected_column]), selected_column),
+            key=selected_column,
+        ))
+    return results
+
+
 @csrf_exempt
-def dataset_statistics(request, dataset_id):
-    """Vue AJAX pour les statistiques descriptives"""
-    dataset = get_object_or_404(Dataset, id=dataset_id)
+@profilable
+async def dataset_statistics(request, dataset_id):
+    """Vue AJAX pour les statistiques descriptives (servies depuis les résultats persistés)"""
+    dataset = await aget_object_or_404(Dataset, id=dataset_id)
+    selected_column = request.GET.get('column')
     
     try:
-        from .utils.data_analyzer import DatasetAnalyzer
-        analyzer = DatasetAnalyzer(dataset.get_full_path())
-        
-        # Statistiques descriptives pour toutes les colonnes numériques
-        descriptive_stats = analyzer.get_descriptive_stats()
-        
-        # Informations sur les colonnes
-        column_info = analyzer.detect_column_types()
-        numeric_columns = analyzer.get_numeric_columns()
-        
-        # Statistiques par colonne sélectionnée
-        selected_column = request.GET.get('column')
-        column_stats = None
-        if selected_column and selected_column in numeric_columns:
-            column_stats = analyzer.get_column_stats(selected_column)
+        # Calcul hors de la boucle ; requêtes identiques simultanées : un seul calcul
+        results = await offload(lambda: _statistics_results(dataset, selected_column),
+                                key=(dataset.id, 'statistics', selected_column))
         
-        data = {
-            'descriptive_stats': convert_numpy_types(descriptive_stats.to_dict() if descriptive_stats is not None else None),
-            'column_info': convert_numpy_types(column_info),
-            'numeric_columns': convert_numpy_types(numeric_columns),
-            'selected_column': selected_column,
-            'column_stats': convert_numpy_types(column_stats),
-        }
+        def build_response():
+            data = dict(results[0].payload)
+            data['selected_column'] = selected_column
+            data['column_stats'] = results[1].payload['column_stats'] if len(results) > 1 else None
+            with timed('serialize'):
+                return JsonResponse(data)
         
-        return JsonResponse(data)
+        return await offload(lambda: results_response(request, results, build_response))
         
+    except OffloadBusy:
+        return _busy_response()
+    except StreamedDatasetError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
-        import traceback
-        print(f"Erreur dans dataset_statistics: {e}")
-        print(traceback.format_exc())
+        logger.exception("Erreur dans dataset_statistics", extra={'dataset_id': dataset_id})
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _distributions_data(dataset):
+    """Graphiques (PNG en base64) et statistiques de toutes les colonnes de l'onglet Distributions"""
+    analyzer = dataset.get_analyzer()
+    
+    # Informations sur les colonnes
+    column_info = analyzer.detect_column_types()
+    numeric_columns = analyzer.get_numeric_columns()
+    categorical_columns = [col for col, info in column_info.items() if info['type'] == 'catégoriel']
+    
+    # Graphiques lus dans le cache disque ; les absents sont rendus sur CHART_RENDER_WORKERS processus
+    # (histogrammes : comptages exacts, seule la KDE utilise l'échantillon)
+    check_cancelled()
+    columns = [(col, 'histogram') for col in numeric_columns] + [(col, 'bar_chart') for col in categorical_columns]
+    charts = cached_charts(dataset, lambda: analyzer, columns, workers=getattr(settings, 'CHART_RENDER_WORKERS', 0))
+    numeric_charts = charts[:len(numeric_columns)]
+    categorical_charts = charts[len(numeric_columns):]
+    
+    # Distributions pour les variables numériques
+    numeric_distributions = {}
+    for col, (path, error) in zip(numeric_columns, numeric_charts):
+        try:
+            if error is not None:
+                raise error
+            column_stats = analyzer.get_column_stats(col)
+            numeric_distributions[col] = {
+                'histogram': to_base64(read_chart(path)) if path else None,
+                'stats': convert_numpy_types(column_stats),
+                **analyzer.get_sample_info(col),
+            }
+        except Exception as e:
+            logger.warning("Erreur pour la colonne numérique %s: %s", col, e, extra={'dataset_id': dataset.id})
+            numeric_distributions[col] = {'error': str(e)}
+    
+    # Distributions pour les variables catégorielles
+    categorical_distributions = {}
+    for col, (path, error) in zip(categorical_columns, categorical_charts):
+        if error is not None:
+            logger.warning("Erreur pour la colonne catégorielle %s: %s", col, error, extra={'dataset_id': dataset.id})
+            categorical_distributions[col] = {'error': str(error)}
+        else:
+            categorical_distributions[col] = {
+                'bar_chart': to_base64(read_chart(path)) if path else None
+            }
+    
+    return {
+        'numeric_distributions': numeric_distributions,
+        'categorical_distributions': categorical_distributions,
+        'column_info': convert_numpy_types(column_info),
+        'numeric_columns': convert_numpy_types(numeric_columns),
+        'categorical_columns': convert_numpy_types(categorical_columns),
+        # Type MIME des images en base64 (CHART_FORMAT)
+        'image_type': CHART_FORMATS[chart_options()['image_format']],
+    }
+
+
 @csrf_exempt
-def dataset_distributions(request, dataset_id):
+@profilable
+async def dataset_distributions(request, dataset_id):
     """Vue AJAX pour les distributions des variables"""
-    dataset = get_object_or_404(Dataset, id=dataset_id)
+    dataset = await aget_object_or_404(Dataset, id=dataset_id)
     
     try:
-        from .utils.data_analyzer import DatasetAnalyzer
-        analyzer = DatasetAnalyzer(dataset.get_full_path())
-        
-        # Informations sur les colonnes
-        column_info = analyzer.detect_column_types()
-        numeric_columns = analyzer.get_numeric_columns()
-        categorical_columns = [col for col, info in column_info.items() if info['type'] == 'catégoriel']
-        
-        # Distributions pour les variables numériques
-        numeric_distributions = {}
-        for col in numeric_columns:
-            try:
-                histogram_data = analyzer.generate_histogram(col)
-                column_stats = analyzer.get_column_stats(col)
-                numeric_distributions[col] = {
-                    'histogram': histogram_data,
-                    'stats': convert_numpy_types(column_stats)
-                }
-            except Exception as e:
-                print(f"Erreur pour la colonne numérique {col}: {e}")
-                numeric_distributions[col] = {'error': str(e)}
-        
-        # Distributions pour les variables catégorielles
-        categorical_distributions = {}
-        for col in categorical_columns:
-            try:
-                bar_chart_data = analyzer.generate_bar_chart(col)
-                categorical_distributions[col] = {
-                    'bar_chart': bar_chart_data
-                }
-            except Exception as e:
-                print(f"Erreur pour la colonne catégorielle {col}: {e}")
-                categorical_distributions[col] = {'error': str(e)}
+        def compute():
+            data = _distributions_data(dataset)
+            with timed('serialize'):
+                return JsonResponse(data).content
         
-        data = {
-            'numeric_distributions': numeric_distributions,
-            'categorical_distributions': categorical_distributions,
-            'column_info': convert_numpy_types(column_info),
-            'numeric_columns': convert_numpy_types(numeric_columns),
-            'categorical_columns': convert_numpy_types(categorical_columns),
-        }
-        
-        return JsonResponse(data)
+        # Le contenu ne dépend d'aucun paramètre : les requêtes simultanées le partagent,
+        # chacune avec sa propre réponse
+        content = await offload(compute, key=(dataset.id, 'distributions'))
+        return HttpResponse(content, content_type='application/json')
         
+    except OffloadBusy:
+        return _busy_response()
+    except StreamedDatasetError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
-        import traceback
-        print(f"Erreur dans dataset_distributions: {e}")
-        print(traceback.format_exc())
+        logger.exception("Erreur dans dataset_distributions", extra={'dataset_id': dataset_id})
         return JsonResponse({'error': str(e)}, status=500)
 
 
-@csrf_exempt
-def dataset_correlations(request, dataset_id):
-    """Vue AJAX pour la matrice de corrélations"""
+def _distributions_page(dataset, request):
+    """Page (?page, ?page_size) des colonnes ayant un graphique de distribution"""
+    try:
+        page_size = min(max(int(request.GET.get('page_size', 12)), 1), 100)
+    except ValueError:
+        page_size = 12
+    return Paginator(chartable_columns(dataset), page_size).get_page(request.GET.get('page'))
+
+
+def _page_info(page):
+    return {
+        'page': page.number,
+        'num_pages': page.paginator.num_pages,
+        'total': page.paginator.count,
+        'next_page': page.next_page_number() if page.has_next() else None,
+    }
+
+
+def _column_entry(dataset, index, name, chart_type):
+    return {
+        'index': index,
+        'name': name,
+        'chart_type': chart_type,
+        'data_url': reverse('dataset_column_chart_data', args=[dataset.id, index]),
+        # URL versionnée par l'empreinte du graphique : cachée indéfiniment par le navigateur
+        'chart_url': _chart_file_url(dataset, index, name, chart_type),
+    }
+
+
+@profilable
+def dataset_distribution_columns(request, dataset_id):
+    """Vue AJAX : manifeste paginé des colonnes de l'onglet Distributions (graphiques chargés à part)"""
     dataset = get_object_or_404(Dataset, id=dataset_id)
     
     try:
-        from .utils.data_analyzer import DatasetAnalyzer
-        analyzer = DatasetAnalyzer(dataset.get_full_path())
+        page = _distributions_page(dataset, request)
         
-        # Matrice de corrélations
-        correlation_matrix = analyzer.get_correlation_matrix()
+        # Seules les colonnes numériques de la page sont chargées
+        histogram_columns = [name for index, name, chart_type in page if chart_type == 'histogram']
+        analyzer = dataset.get_analyzer(columns=histogram_columns) if histogram_columns else None
+        entries = []
+        for index, name, chart_type in page:
+            entry = _column_entry(dataset, index, name, chart_type)
+            if chart_type == 'histogram':
+                entry['stats'] = convert_numpy_types(analyzer.get_column_stats(name))
+                entry.update(analyzer.get_sample_info(name))
+            entries.append(entry)
         
-        # Informations sur les colonnes numériques
-        numeric_columns = analyzer.get_numeric_columns()
+        return JsonResponse({'columns': entries, **_page_info(page)})
         
-        # Corrélations par paires
-        correlation_pairs = analyzer.get_correlation_pairs()
+    except StreamedDatasetError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def _ndjson(message):
+    return json.dumps(message, cls=DjangoJSONEncoder) + '\n'
+
+
+def _streamed_column(dataset, analyzer, index, name, chart_type):
+    """Ligne NDJSON d'une colonne : statistiques et données du graphique (dessiné par le navigateur)"""
+    entry = _column_entry(dataset, index, name, chart_type)
+    try:
+        if chart_type == 'histogram':
+            entry['data'] = analyzer.get_histogram_data(name)
+            entry['stats'] = analyzer.get_column_stats(name)
+            entry.update(analyzer.get_sample_info(name))
+        else:
+            entry['data'] = analyzer.get_bar_chart_data(name)
+        if entry['data'] is None:
+            entry['error'] = 'Colonne vide'
+    except Exception as e:
+        logger.warning("Erreur pour la colonne %s: %s", name, e, extra={'dataset_id': dataset.id})
+        entry['error'] = str(e)
+    return _ndjson({'type': 'column', **convert_numpy_types(entry)})
+
+
+async def dataset_distributions_stream(request, dataset_id):
+    """
+    Onglet Distributions en flux NDJSON : une ligne d'en-tête (pagination), puis
+    une ligne par colonne dès que ses données sont prêtes, puis {"type": "done"}.
+    
+    Mêmes paramètres ?page et ?page_size que le manifeste. Sous ASGI le flux
+    est asynchrone (calculs déportés, arrêtés si le client se déconnecte) ;
+    sous WSGI, un générateur synchrone produit les mêmes lignes.
+    """
+    dataset = await aget_object_or_404(Dataset, id=dataset_id)
+    
+    def prepare():
+        page = _distributions_page(dataset, request)
+        columns = list(page)
+        analyzer = dataset.get_analyzer(columns=[name for index, name, chart_type in columns]) if columns else None
+        return page, columns, analyzer
+    
+    try:
+        page, columns, analyzer = await offload(prepare)
+    except OffloadBusy:
+        return _busy_response()
+    except StreamedDatasetError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        logger.exception("Erreur dans dataset_distributions_stream", extra={'dataset_id': dataset_id})
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    header = _ndjson({'type': 'page', **_page_info(page)})
+    done = _ndjson({'type': 'done'})
+    
+    if isinstance(request, ASGIRequest):
+        async def lines():
+            yield header
+            for column in columns:
+                try:
+                    yield await offload(functools.partial(_streamed_column, dataset, analyzer, *column))
+                except OffloadBusy:
+                    yield _ndjson({'type': 'error', 'error': 'Serveur occupé, réessayez dans un instant'})
+                    return
+            yield done
+    else:
+        def lines():
+            yield header
+            for column in columns:
+                yield _streamed_column(dataset, analyzer, *column)
+            yield done
+    
+    response = StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par un proxy (nginx) : chaque ligne part dès qu'elle est prête
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _column_chart_etag(dataset, column_index, variant):
+    # Le graphique ne dépend que du fichier, de la colonne et de la version de l'analyseur
+    fingerprint = f'{dataset.get_cache_key()}-{column_index}-{ANALYZER_VERSION}-{variant}'
+    return quote_etag(hashlib.sha1(fingerprint.encode()).hexdigest())
+
+
+def _chart_file_url(dataset, column_index, column_name, chart_type):
+    return reverse('dataset_column_chart_file', args=[
+        dataset.id, column_index, chart_digest(dataset, column_name, chart_type), chart_options()['image_format'],
+    ])
+
+
+def _column_chart(dataset, column_index):
+    """(nom, type de graphique) de la colonne, 404 si elle n'a pas de graphique"""
+    charts = {index: (name, chart_type) for index, name, chart_type in chartable_columns(dataset)}
+    if column_index not in charts:
+        raise Http404('Pas de graphique pour cette colonne')
+    return charts[column_index]
+
+
+def dataset_column_chart(request, dataset_id, column_index):
+    """Export d'une colonne en image : redirige vers l'URL versionnée de son graphique"""
+    dataset = get_object_or_404(Dataset, id=dataset_id)
+    column_name, chart_type = _column_chart(dataset, column_index)
+    return redirect(_chart_file_url(dataset, column_index, column_name, chart_type))
+
+
+@profilable
+def dataset_column_chart_file(request, dataset_id, column_index, digest, extension):
+    """Graphique de distribution d'une colonne, rendu côté serveur, servi depuis le cache disque"""
+    dataset = get_object_or_404(Dataset, id=dataset_id)
+    column_name, chart_type = _column_chart(dataset, column_index)
+    
+    image_format = chart_options()['image_format']
+    if digest != chart_digest(dataset, column_name, chart_type) or extension != image_format:
+        # Empreinte d'une version précédente (fichier ou paramètres de rendu changés)
+        return redirect(_chart_file_url(dataset, column_index, column_name, chart_type))
+    
+    [(path, error)] = cached_charts(dataset, lambda: dataset.get_analyzer(columns=[column_name]),
+                                    [(column_name, chart_type)])
+    if error is not None:
+        raise error
+    if path is None:
+        raise Http404('Colonne vide')
+    
+    # Le contenu d'une URL versionnée ne change jamais
+    response = FileResponse(open(path, 'rb'), content_type=CHART_FORMATS[image_format])
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+@profilable
+def dataset_column_chart_data(request, dataset_id, column_index):
+    """Données d'un graphique de distribution (JSON compact), dessiné par le navigateur"""
+    dataset = get_object_or_404(Dataset, id=dataset_id)
+    column_name, chart_type = _column_chart(dataset, column_index)
+    
+    etag = _column_chart_etag(dataset, column_index, 'data')
+    response = get_conditional_response(request, etag=etag)
+    
+    if response is None:
+        analyzer = dataset.get_analyzer(columns=[column_name])
+        try:
+            if chart_type == 'histogram':
+                data = analyzer.get_histogram_data(column_name)
+            else:
+                data = analyzer.get_bar_chart_data(column_name)
+        except StreamedDatasetError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        if data is None:
+            raise Http404('Colonne vide')
+        with timed('serialize'):
+            response = JsonResponse(convert_numpy_types({
+                'name': column_name,
+                'chart_type': chart_type,
+                'data': data,
+            }))
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
+def _correlations_result(dataset, method):
+    """Résultat persisté des corrélations pour `method` (calculé au premier accès)"""
+    def compute():
+        # Les corrélations n'ont besoin que des colonnes numériques
+        numeric_columns = get_or_compute_result(
+            dataset, 'statistics', lambda: build_statistics_payload(dataset.get_analyzer())
+        ).payload['numeric_columns']
+        return build_correlations_payload(dataset.get_analyzer(columns=numeric_columns), method=method)
+    
+    # Pearson (précalculé par le job) sous la clé vide, les autres méthodes à la demande
+    return get_or_compute_result(dataset, 'correlations', compute, key='' if method == 'pearson' else method)
+
+
+def _correlation_method_error(dataset, method):
+    """Réponse 400 si `method` n'est pas disponible pour ce dataset, sinon None"""
+    if method not in CORRELATION_METHODS:
+        return JsonResponse({'error': f'Méthode inconnue: {method}'}, status=400)
+    if method != 'pearson' and dataset.should_stream():
+        # Seul Pearson se cumule en une passe par morceaux
+        return JsonResponse({'error': f'Méthode {method} indisponible pour les fichiers profilés par morceaux'}, status=400)
+    return None
+
+
+@csrf_exempt
+@profilable
+async def dataset_correlations(request, dataset_id):
+    """
+    Vue AJAX pour la matrice de corrélations (servie depuis les résultats persistés).
+    
+    ?method=pearson|spearman|kendall choisit la méthode, ?top=N limite le nombre de paires renvoyées.
+    """
+    dataset = await aget_object_or_404(Dataset, id=dataset_id)
+    
+    method = request.GET.get('method', 'pearson')
+    error = _correlation_method_error(dataset, method)
+    if error is not None:
+        return error
+    try:
+        top_n = int(request.GET['top']) if request.GET.get('top') else None
+    except ValueError:
+        return JsonResponse({'error': 'Paramètre top invalide'}, status=400)
+    
+    try:
+        result = await offload(lambda: _correlations_result(dataset, method),
+                               key=(dataset.id, 'correlations', method))
         
-        data = {
-            'correlation_matrix': convert_numpy_types(correlation_matrix.to_dict() if correlation_matrix is not None else None),
-            'numeric_columns': convert_numpy_types(numeric_columns),
-            'correlation_pairs': convert_numpy_types(correlation_pairs),
-        }
+        def build_response():
+            payload = dict(result.payload)
+            if top_n is not None:
+                payload['correlation_pairs'] = payload['correlation_pairs'][:max(top_n, 0)]
+            with timed('serialize'):
+                return JsonResponse(payload)
         
-        return JsonResponse(data)
+        # La liste des paires dépend de top : elle fait partie de l'ETag
+        return await offload(lambda: results_response(request, [result], build_response, variant=f'top={top_n}'))
         
+    except OffloadBusy:
+        return _busy_response()
+    except StreamedDatasetError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
     
+
+def _heatmap_arguments(request, dataset):
+    """(méthode, ordre, réponse d'erreur ou None) d'une requête de heatmap"""
+    method = request.GET.get('method', 'pearson')
+    order = request.GET.get('order', 'cluster')
+    error = _correlation_method_error(dataset, method)
+    if error is None and order not in HEATMAP_ORDERS:
+        error = JsonResponse({'error': f'Ordre inconnu: {order}'}, status=400)
+    return method, order, error
+
+
+def _heatmap_frame(dataset, method, order, max_columns=None):
+    """Matrice de corrélations persistée, réduite et réordonnée pour la heatmap"""
+    frame = correlation_frame(_correlations_result(dataset, method).payload)
+    with timed('heatmap_layout', columns=0 if frame is None else len(frame)):
+        return arrange_heatmap(frame, max_columns=max_columns, order=order)
+
+
+def _heatmap_image_response(request, dataset, digest, render):
+    """Image de heatmap servie depuis le cache disque, revalidable par son empreinte"""
+    etag = quote_etag(digest)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        path = cached_image(dataset, digest, render)
+        if path is None:
+            raise Http404('Pas de corrélations pour ce dataset')
+        response = FileResponse(open(path, 'rb'), content_type=CHART_FORMATS[chart_options()['image_format']])
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
+@profilable
+def dataset_correlation_heatmap(request, dataset_id):
+    """
+    Manifeste de la heatmap des corrélations : colonnes dans l'ordre affiché,
+    image d'ensemble et blocs (triangle inférieur) à charger à la demande.
+    
+    ?method= comme pour les corrélations, ?order=cluster|original.
+    """
+    dataset = get_object_or_404(Dataset, id=dataset_id)
+    method, order, error = _heatmap_arguments(request, dataset)
+    if error is not None:
+        return error
+    
+    try:
+        result = _correlations_result(dataset, method)
+    except StreamedDatasetError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    options = heatmap_options()
+    
+    def build_response():
+        frame = _heatmap_frame(dataset, method, order)
+        columns = [] if frame is None else frame.columns.tolist()
+        tile_size = options['tile_size']
+        grid = -(-len(columns) // tile_size)
+        query = urlencode({'method': method, 'order': order})
+        tiles = [{
+            'row': row,
+            'col': col,
+            'rows': [row * tile_size, min((row + 1) * tile_size, len(columns))],
+            'cols': [col * tile_size, min((col + 1) * tile_size, len(columns))],
+            'url': f"{reverse('dataset_correlation_heatmap_tile', args=[dataset.id, row, col])}?{query}",
+        } for row in range(grid) for col in range(row + 1)]
+        return JsonResponse({
+            'method': method,
+            'order': order,
+            'columns': columns,
+            'tile_size': tile_size,
+            'grid': grid,
+            'tiles': tiles,
+            'overview_url': f"{reverse('dataset_correlation_heatmap_overview', args=[dataset.id])}?{query}",
+            'image_type': CHART_FORMATS[chart_options()['image_format']],
+        })
+    
+    return results_response(request, [result], build_response, variant=repr(sorted(options.items())))
+
+
+@profilable
+def dataset_correlation_heatmap_overview(request, dataset_id):
+    """
+    Heatmap d'ensemble (image) : les ?top=N colonnes les plus corrélées
+    (HEATMAP_MAX_COLUMNS par défaut, 0 = toutes), cases matricielles sans
+    valeurs au-delà de quelques dizaines de colonnes.
+    """
+    dataset = get_object_or_404(Dataset, id=dataset_id)
+    method, order, error = _heatmap_arguments(request, dataset)
+    if error is not None:
+        return error
+    try:
+        top = int(request.GET['top']) if request.GET.get('top') else heatmap_options()['max_columns']
+    except ValueError:
+        return JsonResponse({'error': 'Paramètre top invalide'}, status=400)
+    
+    def render():
+        frame = _heatmap_frame(dataset, method, order, max_columns=max(top, 0) or None)
+        return render_heatmap(frame, **chart_options())
+    
+    return _heatmap_image_response(request, dataset, heatmap_digest(dataset, method, order, f'overview-{top}'), render)
+
+
+@profilable
+def dataset_correlation_heatmap_tile(request, dataset_id, row, col):
+    """Bloc (row, col) de la heatmap, HEATMAP_TILE_SIZE colonnes de côté, rendu au premier accès"""
+    dataset = get_object_or_404(Dataset, id=dataset_id)
+    method, order, error = _heatmap_arguments(request, dataset)
+    if error is not None:
+        return error
+    tile_size = heatmap_options()['tile_size']
+    
+    def render():
+        frame = _heatmap_frame(dataset, method, order)
+        if frame is None:
+            return None
+        block = frame.iloc[row * tile_size:(row + 1) * tile_size, col * tile_size:(col + 1) * tile_size]
+        if block.empty:
+            raise Http404('Bloc hors de la matrice')
+        return render_heatmap_tile(block, **chart_options())
+    
+    digest = heatmap_digest(dataset, method, order, f'tile-{tile_size}-{row}-{col}')
+    return _heatmap_image_response(request, dataset, digest, render)
+
+
+def _supervision_allowed(request):
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1'])
+
+
+def metrics(request):
+    """Mesures du processus au format texte Prometheus (réservé aux adresses de METRICS_ALLOWED_IPS)"""
+    if not _supervision_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def analyzer_cache_stats(request):
+    """Compteurs du cache des analyseurs (dimensionnement du budget mémoire), réservés comme /metrics/"""
+    if not _supervision_allowed(request):
+        return HttpResponseForbidden()
+    from .utils.analyzer_cache import get_analyzer_cache
+    return JsonResponse(get_analyzer_cache().stats())
+
+
+def select_sheet(request, dataset_id):
+    """Change la feuille analysée d'un classeur Excel (son snapshot existe déjà : pas de relecture du classeur)"""
+    dataset = get_object_or_404(Dataset, id=dataset_id)
+    if request.method != 'POST':
+        return redirect('dataset_overview', dataset_id=dataset.id)
+    
+    sheet_name = request.POST.get('sheet_name', '')
+    if sheet_name not in dataset.get_sheet_names():
+        messages.error(request, f'Feuille inconnue : {sheet_name}')
+        return redirect('dataset_overview', dataset_id=dataset.id)
+    
+    if sheet_name != dataset.sheet_name:
+        dataset.sheet_name = sheet_name
+        dataset.save(update_fields=['sheet_name'])
+        from .utils.analyzer_cache import get_analyzer_cache
+        get_analyzer_cache().invalidate(dataset.id)
+        enqueue_analysis(dataset)
+        messages.info(request, f'Analyse de la feuille "{sheet_name}" en cours...')
+        return redirect('dataset_list')
+    
+    return redirect('dataset_overview', dataset_id=dataset.id)
+
+
 def delete_dataset(request, dataset_id):
     if request.method == 'POST':
         dataset = get_object_or_404(Dataset, id=dataset_id)
@@ -253,6 +780,7 @@ def delete_dataset(request, dataset_id):
             # Supprimer le fichier physique
             if dataset.file_path and default_storage.exists(dataset.file_path):
                 default_storage.delete(dataset.file_path)
+            dataset.delete_artifacts()
             
             # Supprimer l'entrée en base
             dataset_name = dataset.name
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # En premier : la durée mesurée couvre toute la chaîne (voir eda_app/middleware.py)
+    'eda_app.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -121,6 +123,71 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Budget mémoire (en octets) du cache des datasets chargés, par processus
+ANALYZER_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512MB
+
+# Textes à forte cardinalité stockés en chaînes Arrow (nécessite pyarrow)
+ANALYZER_ARROW_STRINGS = False
+
+# Moteur de lecture des CSV : 'pyarrow', 'c' ou None (le plus rapide disponible)
+CSV_READER_ENGINE = None
+
+# Analyses en arrière-plan (voir eda_app/jobs.py)
+ANALYSIS_WORKERS = 2
+ANALYSIS_POLL_INTERVAL = 2.0  # secondes
+# Démarrer le runner dans le processus web ; False si `manage.py run_analysis_worker` tourne à part
+ANALYSIS_RUNNER_AUTOSTART = True
+
+# Au-delà de cette taille (octets), les CSV sont profilés par morceaux de STREAMING_CHUNKSIZE lignes
+STREAMING_PROFILE_THRESHOLD = 1024 * 1024 * 1024  # 1GB
+STREAMING_CHUNKSIZE = 100_000
+
+# Processus de rendu des graphiques de l'onglet Distributions (0 ou 1 : rendu en série)
+CHART_RENDER_WORKERS = 4
+
+# Vues async (statistiques, distributions, corrélations) : threads de calcul et calculs en file au plus
+ASYNC_ANALYSIS_WORKERS = 4
+ASYNC_ANALYSIS_MAX_PENDING = 32
+
+# Lignes échantillonnées (une fois par dataset) pour les courbes de densité ; None = toutes
+CHART_SAMPLE_SIZE = 100_000
+
+# Rendu des graphiques servis : résolution et format ('png', 'webp' ou 'svg')
+CHART_DPI = 150
+CHART_FORMAT = 'png'
+
+# Cache disque des graphiques (None = MEDIA_ROOT/charts), borné en octets (LRU)
+CHART_CACHE_DIR = None
+CHART_CACHE_MAX_BYTES = 256 * 1024 * 1024  # 256MB
+# Graphiques rendus à l'avance par l'analyse en arrière-plan (premières colonnes)
+CHART_PREWARM_COLUMNS = 24
+
+# Heatmap des corrélations : colonnes les plus corrélées gardées dans l'image d'ensemble (0 = toutes)
+# et côté des blocs servis à la demande pour explorer les grandes matrices
+HEATMAP_MAX_COLUMNS = 50
+HEATMAP_TILE_SIZE = 40
+
+# Adresses autorisées à lire /metrics/ (format Prometheus) ; les mesures sont propres à chaque processus
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Profils de requêtes demandés par le staff (?profile=1) ; None = MEDIA_ROOT/profiles
+PROFILES_DIR = None
+
+# Logs structurés (clé=valeur) ; passer eda_app.utils.metrics à DEBUG pour la durée de chaque étape
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'keyvalue': {'()': 'eda_app.utils.logfmt.KeyValueFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'keyvalue'},
+    },
+    'loggers': {
+        'eda_app': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 